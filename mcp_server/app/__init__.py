@@ -5,4 +5,6 @@ This package initializes and configures the main Starlette application.
 - create_starlette_app: Sets up and configures the Starlette app.
 - handle_sse: Manages SSE connections for the MCP server.
 - health_check: Provides a health check endpoint for the server.
+- metrics: Exposes runtime counters (Graph requests, 401 recovery).
+- app_lifespan: Starts and closes shared resources (Graph HTTP client).
 """
@@ -3,6 +3,8 @@ from starlette.middleware.cors import CORSMiddleware
 from starlette.routing import Route, Mount
 
 from app.health_check import health_check
+from app.lifespan import app_lifespan
+from app.metrics import metrics
 from app.sse_handler import handle_sse
 from transports.sse_transport import create_sse_transport
 from routes.api import routes as api_routes
@@ -19,8 +21,10 @@ def create_starlette_app():
             Route("/sse", endpoint=lambda req: handle_sse(req, email_mcp_server, sse)),
             Mount("/messages/", app=sse.handle_post_message),
             Route("/health", endpoint=health_check),
+            Route("/metrics", endpoint=metrics),
             *api_routes  # API routes for email, calendar, contacts
         ],
+        lifespan=app_lifespan,
     )
 
     app.add_middleware(
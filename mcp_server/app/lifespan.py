@@ -0,0 +1,37 @@
+from contextlib import asynccontextmanager
+
+from config import settings
+from services.auth.account_pool import account_pool
+from services.graph.graph_client import start_graph_client, close_graph_client
+from services.email.send_jobs import cancel_send_jobs
+from services.sync import DeltaSyncScheduler, close_mail_store
+
+
+@asynccontextmanager
+async def service_lifespan():
+    """Starts shared resources (Graph HTTP client, account pool, background sync) and closes them on exit; yields the Graph client."""
+    graph_client = await start_graph_client()
+    await account_pool.start()
+    sync_scheduler = DeltaSyncScheduler()
+    if settings.SYNC_ENABLED:
+        sync_scheduler.start()
+    try:
+        yield graph_client
+    finally:
+        await sync_scheduler.stop()
+        await cancel_send_jobs()
+        close_mail_store()
+        await account_pool.close()
+        await close_graph_client()
+
+
+@asynccontextmanager
+async def app_lifespan(app):
+    """Runs the shared services for the lifetime of the Starlette app."""
+    async with service_lifespan() as graph_client:
+        app.state.graph_client = graph_client
+        # Serialize tools/list once, before the first client asks for it
+        # (imported here so stdio_main.py's service_lifespan doesn't build the HTTP tool routes)
+        from routes.tools_api import load_tool_catalogue
+        await load_tool_catalogue()
+        yield
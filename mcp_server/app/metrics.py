@@ -0,0 +1,12 @@
+from starlette.responses import JSONResponse
+
+from services.graph.graph_client import get_graph_metrics
+from services.email import fetch_cache, message_cache
+
+async def metrics(request):
+    """Runtime counters for the Graph request layer and the email caches."""
+    return JSONResponse({
+        "graph": get_graph_metrics(),
+        "fetch_cache": fetch_cache.metrics(),
+        "message_cache": message_cache.metrics()
+    })
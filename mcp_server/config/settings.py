@@ -6,10 +6,83 @@ load_dotenv()
 
 # Microsoft Graph API
 GRAPH_API_URL = os.getenv("GRAPH_API_URL", "https://graph.microsoft.com/v1.0")
+# Ask for immutable item ids (stable across folder moves) on every request
+GRAPH_IMMUTABLE_IDS = os.getenv("GRAPH_IMMUTABLE_IDS", "true").lower() == "true"
 OUTLOOK_CLIENT_ID = os.getenv("OUTLOOK_CLIENT_ID")
 OUTLOOK_TENANT_ID = os.getenv("OUTLOOK_TENANT_ID")
 OUTLOOK_SCOPES = os.getenv("OUTLOOK_SCOPES").split()
 
 # Server Configuration
 PORT = int(os.getenv("PORT", 8000))
+UDS_PATH = os.getenv("UDS_PATH")  # listen on this Unix domain socket instead of TCP (POSIX only)
 DEBUG = os.getenv("DEBUG", "false").lower() == "true"
+
+# Microsoft Graph HTTP client (shared, pooled connection settings)
+GRAPH_HTTP2 = os.getenv("GRAPH_HTTP2", "true").lower() == "true"
+GRAPH_MAX_CONNECTIONS = int(os.getenv("GRAPH_MAX_CONNECTIONS", 100))
+GRAPH_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GRAPH_MAX_KEEPALIVE_CONNECTIONS", 20))
+GRAPH_KEEPALIVE_EXPIRY = float(os.getenv("GRAPH_KEEPALIVE_EXPIRY", 120))
+GRAPH_TIMEOUT = float(os.getenv("GRAPH_TIMEOUT", 30))
+GRAPH_CONNECT_TIMEOUT = float(os.getenv("GRAPH_CONNECT_TIMEOUT", 10))
+GRAPH_WARMUP = os.getenv("GRAPH_WARMUP", "true").lower() == "true"
+
+# Token management
+TOKEN_REFRESH_MARGIN = int(os.getenv("TOKEN_REFRESH_MARGIN", 300))  # seconds before expiry to refresh
+TOKEN_REFRESH_RETRY_INTERVAL = int(os.getenv("TOKEN_REFRESH_RETRY_INTERVAL", 60))
+TOKEN_STORE_DIR = os.getenv("TOKEN_STORE_DIR")  # defaults to the services/auth directory
+TOKEN_STORE_POLL_INTERVAL = int(os.getenv("TOKEN_STORE_POLL_INTERVAL", 5))  # seconds between token file change checks
+
+# Multi-mailbox support
+DEFAULT_ACCOUNT = os.getenv("DEFAULT_ACCOUNT", "default").strip().lower()
+MAX_LIVE_ACCOUNTS = int(os.getenv("MAX_LIVE_ACCOUNTS", 256))
+
+# Uvicorn workers (token files, login and send job status are shared between worker processes; one worker runs the sync)
+WORKERS = int(os.getenv("WORKERS", 1))
+
+# Graph JSON batching ($batch)
+GRAPH_BATCH_MAX_RETRIES = int(os.getenv("GRAPH_BATCH_MAX_RETRIES", 3))
+GRAPH_BATCH_RETRY_BASE_DELAY = float(os.getenv("GRAPH_BATCH_RETRY_BASE_DELAY", 1))
+GRAPH_BATCH_MAX_RETRY_DELAY = float(os.getenv("GRAPH_BATCH_MAX_RETRY_DELAY", 30))
+# Concurrent $batch calls per fan-out (Exchange allows ~4 concurrent requests per mailbox)
+GRAPH_FANOUT_CONCURRENCY = int(os.getenv("GRAPH_FANOUT_CONCURRENCY", 4))
+
+# Graph throttling / retry policy (applies to every Graph call)
+GRAPH_MAX_RETRIES = int(os.getenv("GRAPH_MAX_RETRIES", 4))
+GRAPH_RETRY_BASE_DELAY = float(os.getenv("GRAPH_RETRY_BASE_DELAY", 1))
+GRAPH_MAX_RETRY_DELAY = float(os.getenv("GRAPH_MAX_RETRY_DELAY", 60))  # longer Retry-After values are not waited out
+GRAPH_RETRY_BUDGET = float(os.getenv("GRAPH_RETRY_BUDGET", 20))  # retries a mailbox may burst
+GRAPH_RETRY_BUDGET_REFILL = float(os.getenv("GRAPH_RETRY_BUDGET_REFILL", 0.5))  # retries regained per second
+
+# Mailbox sending quota pacing (Exchange Online: 30 messages/minute, 10,000 recipients/day)
+SEND_PACING = os.getenv("SEND_PACING", "true").lower() == "true"
+SEND_MESSAGES_PER_MINUTE = int(os.getenv("SEND_MESSAGES_PER_MINUTE", 30))
+SEND_RECIPIENTS_PER_DAY = int(os.getenv("SEND_RECIPIENTS_PER_DAY", 10000))
+SEND_BURST = int(os.getenv("SEND_BURST", 10))  # messages per paced wave (one $batch, at most 20)
+SEND_PACING_MAX_WAIT = int(os.getenv("SEND_PACING_MAX_WAIT", 900))  # seconds; longer sends are rejected
+# Paced sends expected to take longer than this run as background jobs (below the stdio proxy's 30 s tool call timeout)
+SEND_BLOCKING_MAX_WAIT = int(os.getenv("SEND_BLOCKING_MAX_WAIT", 20))
+
+# Email listing
+FETCH_MAX_PAGES = int(os.getenv("FETCH_MAX_PAGES", 10))  # pages scanned when matches are filtered while paging
+FETCH_CACHE_TTL = float(os.getenv("FETCH_CACHE_TTL", 30))  # seconds; 0 disables the fetch cache
+FETCH_CACHE_MAX_ENTRIES = int(os.getenv("FETCH_CACHE_MAX_ENTRIES", 256))
+FETCH_CACHE_MAX_BYTES = int(os.getenv("FETCH_CACHE_MAX_BYTES", 32 * 1024 * 1024))  # encoded size of all cached results; 0 = entry count only
+FOLDER_CACHE_TTL = int(os.getenv("FOLDER_CACHE_TTL", 300))  # seconds before the folder tree is delta-refreshed
+MESSAGE_CACHE_MAX_BYTES = int(os.getenv("MESSAGE_CACHE_MAX_BYTES", 32 * 1024 * 1024))  # ETag-revalidated messages; 0 disables
+TOOL_RESULT_MAX_BYTES = int(os.getenv("TOOL_RESULT_MAX_BYTES", 256 * 1024))  # /tool_call results are trimmed above this; 0 disables
+
+# Delta sync / local mail store
+MAIL_STORE_PATH = os.getenv("MAIL_STORE_PATH")  # defaults to .mailstore/mailbox.sqlite3 next to main.py
+SYNC_ENABLED = os.getenv("SYNC_ENABLED", "false").lower() == "true"  # background sync from the app lifespan
+# "folder:interval_seconds" pairs, e.g. "inbox:60,sentitems:300"
+SYNC_FOLDERS = {
+    folder.strip(): int(interval or 300)
+    for folder, _, interval in (item.partition(":") for item in os.getenv("SYNC_FOLDERS", "inbox:60").split(","))
+    if folder.strip()
+}
+SYNC_ACCOUNTS = os.getenv("SYNC_ACCOUNTS", "").lower().split()  # defaults to DEFAULT_ACCOUNT
+SYNC_INITIAL_DAYS = int(os.getenv("SYNC_INITIAL_DAYS", 30))  # history pulled by the first sync of a folder
+SYNC_PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", 200))
+SYNC_INCLUDE_BODY = os.getenv("SYNC_INCLUDE_BODY", "true").lower() == "true"  # plain-text bodies for local search
+SYNC_TOMBSTONE_DAYS = float(os.getenv("SYNC_TOMBSTONE_DAYS", 30))  # removals kept for get_new_emails clients; older tokens get a reset
+LOCAL_SEARCH_STALE_AFTER = int(os.getenv("LOCAL_SEARCH_STALE_AFTER", 600))  # seconds before the mirror counts as stale
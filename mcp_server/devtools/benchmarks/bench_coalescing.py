@@ -0,0 +1,115 @@
+"""
+Request coalescing load test for email fetches
+
+Fires bursts of concurrent fetches (a few distinct listings plus single-message
+reads, requested by many callers at once) against a local stub with realistic
+latency, and counts the Graph requests that reach the stub:
+- uncoalesced: every caller issues its own request
+- coalesced: fetch_outlook_emails(), where identical in-flight reads share one
+
+The response cache is disabled (FETCH_CACHE_TTL=0) so only in-flight
+coalescing is measured.
+
+Usage (from the mcp_server directory):
+    python devtools/benchmarks/bench_coalescing.py --callers 200 --distinct 5 --latency-ms 150
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+os.environ.setdefault("OUTLOOK_SCOPES", "Mail.Read")
+os.environ["TOKEN_STORE_DIR"] = tempfile.mkdtemp(prefix="bench-tokens-")
+os.environ["MAIL_STORE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench-store-"), "mailbox.sqlite3")
+os.environ["FETCH_CACHE_TTL"] = "0"
+
+import httpx  # noqa: E402
+
+from services.auth.account_pool import account_pool  # noqa: E402
+from services.email import fetch_cache  # noqa: E402
+from services.email.fetch_emails import fetch_outlook_emails, _fetch_outlook_emails  # noqa: E402
+from services.graph import graph_client  # noqa: E402
+
+upstream = {"requests": 0}
+
+MESSAGES = [
+    {
+        "id": f"AAMkAGI2TG93AAA{i:06d}=",
+        "subject": f"Status update {i}",
+        "from": {"emailAddress": {"address": "sender@contoso.com"}},
+        "receivedDateTime": "2024-05-01T10:00:00Z",
+        "isRead": False,
+        "bodyPreview": "Quarterly numbers and the usual follow-ups.",
+    }
+    for i in range(25)
+]
+
+
+def stub_handler(latency: float):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        upstream["requests"] += 1
+        await asyncio.sleep(latency)
+        if request.url.path.endswith("/messages"):
+            return httpx.Response(200, json={"value": MESSAGES[:int(request.url.params.get("$top", 10))]})
+        return httpx.Response(200, json=MESSAGES[0])
+    return handler
+
+
+def workload(callers: int, distinct: int) -> list:
+    """Caller i asks for one of `distinct` listings, or (every 4th caller) one of `distinct` messages."""
+    folders = ["inbox", "sentitems", "drafts", "archive", "junkemail", "deleteditems"]
+    calls = []
+    for i in range(callers):
+        if i % 4 == 3:
+            calls.append({"email_id": MESSAGES[i % distinct]["id"]})
+        else:
+            calls.append({"folder": folders[i % min(distinct, len(folders))]})
+    return calls
+
+
+async def burst(fetch, calls: list) -> tuple:
+    upstream["requests"] = 0
+    started = time.perf_counter()
+    results = await asyncio.gather(*(fetch(**call) for call in calls))
+    elapsed = time.perf_counter() - started
+    assert all(result["status"] == "success" for result in results), results
+    return upstream["requests"], elapsed
+
+
+async def uncoalesced(**call):
+    arguments = dict(folder="inbox", is_read=None, sender=None, email_id=None, subject=None, top=10,
+                     received_after=None, received_before=None, include_body=False, cursor=None, page_size=None)
+    arguments.update(call)
+    return await _fetch_outlook_emails(account=None, **arguments)
+
+
+async def run(callers: int, distinct: int, latency_ms: int) -> None:
+    graph_client._client = httpx.AsyncClient(transport=httpx.MockTransport(stub_handler(latency_ms / 1000)))
+    account_pool.get().token_manager.set_token_result({"access_token": "bench", "expires_in": 3600})
+    calls = workload(callers, distinct)
+
+    print(f"{callers} concurrent callers, {distinct} distinct listings/messages, {latency_ms} ms Graph latency")
+    print(f"{'mode':>12} {'graph requests':>15} {'seconds':>8}")
+    baseline = await burst(uncoalesced, calls)
+    coalesced = await burst(fetch_outlook_emails, calls)
+    for name, (requests, elapsed) in (("uncoalesced", baseline), ("coalesced", coalesced)):
+        print(f"{name:>12} {requests:>15} {elapsed:>8.2f}")
+    print(f"coalescing: {baseline[0] / coalesced[0]:.0f}x fewer Graph requests")
+    print(f"fetch cache counters: {fetch_cache.metrics()}")
+
+    await account_pool.close()
+    await graph_client.close_graph_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count Graph requests for concurrent identical fetches")
+    parser.add_argument("--callers", type=int, default=200)
+    parser.add_argument("--distinct", type=int, default=5)
+    parser.add_argument("--latency-ms", type=int, default=150)
+    args = parser.parse_args()
+    asyncio.run(run(args.callers, args.distinct, args.latency_ms))
@@ -0,0 +1,103 @@
+"""
+Fan-out benchmark for individual sends
+
+Starts a local stub of the Graph `$batch` endpoint (fixed latency per call) and
+times `send_outlook_email(send_individual=True)` for N recipients at different
+GRAPH_FANOUT_CONCURRENCY values. No Microsoft account or network access is
+needed: the default account gets a fake in-memory token.
+
+Usage (from the mcp_server directory):
+    python devtools/benchmarks/bench_fanout.py --recipients 200 --latency 0.2 --concurrency 1 2 4 8
+
+Expected: wall time ~= ceil(N / 20 / concurrency) * latency.
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+PORT = _free_port()
+os.environ.setdefault("OUTLOOK_SCOPES", "Mail.Send Mail.ReadWrite")
+os.environ["GRAPH_API_URL"] = f"http://127.0.0.1:{PORT}/v1.0"
+os.environ["GRAPH_WARMUP"] = "false"
+os.environ["SEND_PACING"] = "false"  # measure fan-out, not quota pacing
+os.environ["TOKEN_STORE_DIR"] = tempfile.mkdtemp(prefix="bench-tokens-")
+
+import uvicorn  # noqa: E402
+from starlette.applications import Starlette  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+from config import settings  # noqa: E402
+from services.auth.account_pool import account_pool  # noqa: E402
+from services.email.send_email import send_outlook_email  # noqa: E402
+from services.graph import close_graph_client  # noqa: E402
+
+LATENCY = 0.2
+stub_stats = {"calls": 0, "in_flight": 0, "max_in_flight": 0}
+
+
+async def stub_batch(request: Request) -> JSONResponse:
+    """Fake Graph $batch: waits LATENCY seconds and accepts every sub-request."""
+    payload = await request.json()
+    stub_stats["calls"] += 1
+    stub_stats["in_flight"] += 1
+    stub_stats["max_in_flight"] = max(stub_stats["max_in_flight"], stub_stats["in_flight"])
+    try:
+        await asyncio.sleep(LATENCY)
+    finally:
+        stub_stats["in_flight"] -= 1
+    return JSONResponse({"responses": [{"id": r["id"], "status": 202, "headers": {}, "body": None} for r in payload["requests"]]})
+
+
+async def run(recipients: int, levels: list[int]) -> None:
+    app = Starlette(routes=[Route("/v1.0/$batch", stub_batch, methods=["POST"])])
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=PORT, log_level="warning"))
+    serve_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    account_pool.get().token_manager.set_token_result({"access_token": "bench", "expires_in": 3600})
+    addresses = [f"user{i}@example.com" for i in range(recipients)]
+
+    print(f"{recipients} recipients, {LATENCY * 1000:.0f} ms per $batch call")
+    print(f"{'concurrency':>11} {'calls':>6} {'max in flight':>14} {'seconds':>8} {'speed-up':>9}")
+    baseline = None
+    for level in levels:
+        settings.GRAPH_FANOUT_CONCURRENCY = level
+        stub_stats.update(calls=0, max_in_flight=0)
+        started = time.perf_counter()
+        result = await send_outlook_email(addresses, "Benchmark", "Hello", send_individual=True)
+        elapsed = time.perf_counter() - started
+        assert result["summary"]["succeeded"] == recipients, result["summary"]
+        baseline = baseline or elapsed
+        print(f"{level:>11} {stub_stats['calls']:>6} {stub_stats['max_in_flight']:>14} {elapsed:>8.2f} {baseline / elapsed:>8.1f}x")
+
+    await account_pool.close()
+    await close_graph_client()
+    server.should_exit = True
+    await serve_task
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concurrent $batch fan-out against a local stub")
+    parser.add_argument("--recipients", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub latency per $batch call in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    LATENCY = args.latency
+    asyncio.run(run(args.recipients, args.concurrency))
@@ -0,0 +1,106 @@
+"""
+Projection benchmark for message listings
+
+Serves realistic Graph messages (HTML bodies, recipient lists) from a local stub
+that honours `$select`, then compares a summary listing (the default, projected
+with $select) with a full listing (include_body=True) by:
+- bytes on the wire (Graph response bodies)
+- JSON encode time of the result returned to MCP clients / /api/fetch-emails
+
+Usage (from the mcp_server directory):
+    python devtools/benchmarks/bench_projection.py --top 100 --body-kb 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+os.environ.setdefault("OUTLOOK_SCOPES", "Mail.Read")
+os.environ["TOKEN_STORE_DIR"] = tempfile.mkdtemp(prefix="bench-tokens-")
+
+import httpx  # noqa: E402
+
+from services.auth.account_pool import account_pool  # noqa: E402
+from services.email.fetch_emails import fetch_outlook_emails  # noqa: E402
+from services.graph import graph_client  # noqa: E402
+
+wire = {"bytes": 0}
+
+
+def make_messages(count: int, body_kb: int) -> list:
+    html = "<html><body>" + ("<p>Quarterly numbers and the usual follow-ups.</p>" * (body_kb * 1024 // 50)) + "</body></html>"
+    return [
+        {
+            "id": f"AAMkAGI2TG93AAA{i:06d}=",
+            "createdDateTime": "2024-05-01T10:00:00Z",
+            "receivedDateTime": "2024-05-01T10:00:00Z",
+            "sentDateTime": "2024-05-01T09:59:58Z",
+            "subject": f"Status update {i}",
+            "bodyPreview": "Quarterly numbers and the usual follow-ups." * 3,
+            "importance": "normal",
+            "isRead": i % 2 == 0,
+            "hasAttachments": False,
+            "conversationId": f"AAQkAGI2TG93{i:06d}=",
+            "webLink": f"https://outlook.office365.com/owa/?ItemID=AAMkAGI2TG93AAA{i:06d}%3D",
+            "body": {"contentType": "html", "content": html},
+            "from": {"emailAddress": {"name": "Sender", "address": "sender@contoso.com"}},
+            "toRecipients": [{"emailAddress": {"name": f"User {n}", "address": f"user{n}@contoso.com"}} for n in range(10)],
+            "ccRecipients": [{"emailAddress": {"name": f"Cc {n}", "address": f"cc{n}@contoso.com"}} for n in range(5)],
+        }
+        for i in range(count)
+    ]
+
+
+def stub_handler(messages: list):
+    def handler(request: httpx.Request) -> httpx.Response:
+        top = int(request.url.params.get("$top", 10))
+        select = request.url.params.get("$select")
+        page = messages[:top]
+        if select:
+            fields = select.split(",")
+            page = [{field: message[field] for field in fields if field in message} for message in page]
+        content = json.dumps({"value": page}).encode()
+        wire["bytes"] += len(content)
+        return httpx.Response(200, content=content, headers={"Content-Type": "application/json"})
+    return handler
+
+
+async def measure(top: int, include_body: bool) -> tuple:
+    wire["bytes"] = 0
+    result = await fetch_outlook_emails(top=top, include_body=include_body)
+    assert result["status"] == "success", result
+    started = time.perf_counter()
+    for _ in range(20):
+        encoded = json.dumps(result)
+    encode_ms = (time.perf_counter() - started) / 20 * 1000
+    return wire["bytes"], len(encoded), encode_ms
+
+
+async def run(top: int, body_kb: int) -> None:
+    graph_client._client = httpx.AsyncClient(transport=httpx.MockTransport(stub_handler(make_messages(top, body_kb))))
+    account_pool.get().token_manager.set_token_result({"access_token": "bench", "expires_in": 3600})
+
+    print(f"{top} messages, ~{body_kb} KB HTML body each")
+    print(f"{'mode':>8} {'wire bytes':>12} {'result bytes':>13} {'encode ms':>10}")
+    summary = await measure(top, include_body=False)
+    full = await measure(top, include_body=True)
+    for name, (wire_bytes, result_bytes, encode_ms) in (("summary", summary), ("full", full)):
+        print(f"{name:>8} {wire_bytes:>12,} {result_bytes:>13,} {encode_ms:>10.2f}")
+    print(f"summary mode: {full[0] / summary[0]:.0f}x fewer bytes on the wire, {full[2] / summary[2]:.0f}x faster to encode")
+
+    await account_pool.close()
+    await graph_client.close_graph_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare $select summary listings with full message listings")
+    parser.add_argument("--top", type=int, default=100)
+    parser.add_argument("--body-kb", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.top, args.body_kb))
@@ -0,0 +1,145 @@
+"""
+stdio path benchmark: in-process server vs. proxy + HTTP server
+
+Launches each Claude stdio path the way an MCP client does and measures:
+- startup: process launch until initialize and the first tools/list are answered
+- per-call latency of a tool that needs no Graph access (login_status_tool)
+
+Paths:
+- in-process: python stdio_main.py
+- proxy + HTTP: uvicorn app (port chosen at random) + devtools/claude/proxy_claude_stdio.py
+- proxy + UDS: the same over a Unix domain socket (MCP_HTTP_UDS; POSIX only)
+
+No Microsoft sign-in is needed; tokens are kept in a temporary directory.
+
+Usage (from the mcp_server directory):
+    python devtools/benchmarks/bench_stdio.py --calls 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+ENV = {
+    **os.environ,
+    "OUTLOOK_SCOPES": os.environ.get("OUTLOOK_SCOPES", "Mail.Read"),
+    "TOKEN_STORE_DIR": tempfile.mkdtemp(prefix="bench-tokens-"),
+    "MAIL_STORE_PATH": os.path.join(tempfile.mkdtemp(prefix="bench-store-"), "mailbox.sqlite3"),
+    "GRAPH_WARMUP": "false",
+    "SYNC_ENABLED": "false",
+}
+
+
+class StdioClient:
+    """Minimal line-delimited JSON-RPC client for a subprocess."""
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+        self.next_id = 0
+
+    async def request(self, method: str, params: dict | None = None) -> dict:
+        self.next_id += 1
+        message = {"jsonrpc": "2.0", "id": self.next_id, "method": method}
+        if params is not None:
+            message["params"] = params
+        self.process.stdin.write((json.dumps(message) + "\n").encode())
+        await self.process.stdin.drain()
+        while True:
+            response = json.loads(await self.process.stdout.readline())
+            if response.get("id") == self.next_id:
+                return response
+
+    async def notify(self, method: str) -> None:
+        self.process.stdin.write((json.dumps({"jsonrpc": "2.0", "method": method}) + "\n").encode())
+        await self.process.stdin.drain()
+
+
+async def spawn(*args: str, env: dict) -> asyncio.subprocess.Process:
+    return await asyncio.create_subprocess_exec(
+        sys.executable, *args, cwd=ROOT, env=env,
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+    )
+
+
+async def measure(client: StdioClient, started: float, calls: int) -> dict:
+    await client.request("initialize", {
+        "protocolVersion": "2024-11-05", "capabilities": {}, "clientInfo": {"name": "bench", "version": "1"}
+    })
+    await client.notify("notifications/initialized")
+    tools = await client.request("tools/list")
+    assert tools.get("result", {}).get("tools"), tools
+    startup = time.perf_counter() - started
+
+    latencies = []
+    for _ in range(calls):
+        call_started = time.perf_counter()
+        result = await client.request("tools/call", {"name": "login_status_tool", "arguments": {}})
+        latencies.append((time.perf_counter() - call_started) * 1000)
+        assert "result" in result, result
+    latencies.sort()
+    return {
+        "startup_s": startup,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+    }
+
+
+async def bench_in_process(calls: int) -> dict:
+    started = time.perf_counter()
+    process = await spawn("stdio_main.py", env=ENV)
+    try:
+        return await measure(StdioClient(process), started, calls)
+    finally:
+        process.stdin.close()
+        await process.wait()
+
+
+async def bench_proxy(calls: int, uds: bool = False) -> dict:
+    if uds:
+        path = os.path.join(tempfile.mkdtemp(prefix="bench-uds-"), "mcp.sock")
+        env = {**ENV, "MCP_HTTP_UDS": path}
+        listen = ["--uds", path, "--timeout-keep-alive", "300"]
+    else:
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        env = {**ENV, "MCP_HTTP_BASE_URL": f"http://127.0.0.1:{port}"}
+        listen = ["--port", str(port)]
+    started = time.perf_counter()
+    server = await spawn(
+        "-m", "uvicorn", "app.create_app:create_starlette_app", "--factory",
+        *listen, "--log-level", "warning", env=env,
+    )
+    proxy = await spawn(os.path.join("devtools", "claude", "proxy_claude_stdio.py"), env=env)
+    try:
+        return await measure(StdioClient(proxy), started, calls)
+    finally:
+        proxy.stdin.close()
+        await proxy.wait()
+        server.terminate()
+        await server.wait()
+
+
+async def run(calls: int) -> None:
+    results = {"in-process": await bench_in_process(calls), "proxy + HTTP": await bench_proxy(calls)}
+    if hasattr(socket, "AF_UNIX"):
+        results["proxy + UDS"] = await bench_proxy(calls, uds=True)
+    print(f"{calls} sequential tools/call (login_status_tool)")
+    print(f"{'path':>13} {'startup s':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, result in results.items():
+        print(f"{name:>13} {result['startup_s']:>10.2f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the in-process stdio server with the proxy + HTTP path")
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.calls))
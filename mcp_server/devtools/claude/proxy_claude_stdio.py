@@ -1,157 +1,261 @@
-import sys
+"""
+Claude stdio <-> HTTP proxy for the Outlook MCP server
+
+Claude Desktop talks JSON-RPC over stdin/stdout; this proxy forwards its
+requests to the server's HTTP tool endpoints (/tools, /tool_call).
+
+Requests are handled concurrently: every request runs as its own task over one
+pooled async HTTP client, and responses are written as soon as they complete,
+correlated by their JSON-RPC `id` - so a slow tools/call never holds up a
+tools/list behind it.
+
+- notifications/cancelled stops the matching in-flight request (no response is
+  sent for it, as the MCP spec requires)
+- Backpressure: at most MAX_IN_FLIGHT requests run at once; beyond that the
+  proxy stops reading stdin until one completes
+- On end of input, in-flight requests are allowed to finish before exiting
+- tools/list is cached with the server's ETag and revalidated with
+  If-None-Match (a bodyless 304 while the tool set is unchanged); the cached
+  list is kept serialized, so answering only splices in the request id
+- tools/call responses are written through without being decoded and re-encoded
+- MCP_HTTP_UDS: talk to a co-located server over its Unix domain socket
+  (persistent keep-alive connections, no TCP port) instead of MCP_HTTP_BASE_URL
+"""
+
+import asyncio
 import json
-import requests
-import time
+import os
+import sys
+import threading
 
-HTTP_BASE_URL = "http://localhost:8000"
+import httpx
 
-def wait_for_server():
-    """Wait for the HTTP server to be available"""
-    max_retries = 30
-    for i in range(max_retries):
-        try:
-            resp = requests.get(f"{HTTP_BASE_URL}/tools", timeout=2)
-            if resp.status_code == 200:
-                return True
-        except requests.exceptions.RequestException:
-            time.sleep(1)
-    return False
-
-def main():
-    print("MCP Proxy started", file=sys.stderr, flush=True)
-    
-    # Wait for server to be ready
-    if not wait_for_server():
-        print("Failed to connect to HTTP server", file=sys.stderr, flush=True)
-        return
-    
-    try:
+HTTP_BASE_URL = os.getenv("MCP_HTTP_BASE_URL", "http://localhost:8000")
+# Server's Unix domain socket (main.py with UDS_PATH); used instead of TCP when set
+HTTP_UDS_PATH = os.getenv("MCP_HTTP_UDS")
+
+# Concurrent requests forwarded to the server before stdin reading pauses
+MAX_IN_FLIGHT = 32
+# Lines read from stdin but not yet dispatched
+READ_AHEAD = 64
+
+TOOLS_LIST_TIMEOUT = 5
+TOOL_CALL_TIMEOUT = 30
+SERVER_WAIT_SECONDS = 30
+
+SERVER_INFO = {"name": "outlook-email-mcp-server", "version": "1.0.0"}
+
+# Newest first; tool results carry structuredContent, defined since 2025-06-18
+PROTOCOL_VERSIONS = ("2025-06-18", "2025-03-26", "2024-11-05")
+
+
+def log(message: str) -> None:
+    print(message, file=sys.stderr, flush=True)
+
+
+def write_message(message: dict | str) -> None:
+    """Write one JSON-RPC message (dict or pre-encoded JSON) to stdout (called from the event loop only, so lines never interleave)."""
+    sys.stdout.write((message if isinstance(message, str) else json.dumps(message)) + "\n")
+    sys.stdout.flush()
+
+
+def error_response(request_id, code: int, message: str) -> dict:
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+def is_valid_id(request_id) -> bool:
+    """JSON-RPC ids are strings, integers or null (bool is not an integer here)."""
+    return request_id is None or (isinstance(request_id, (str, int)) and not isinstance(request_id, bool))
+
+
+def start_stdin_reader(loop: asyncio.AbstractEventLoop, queue: asyncio.Queue) -> None:
+    """
+    Read stdin lines in a thread (works with pipes on every platform) and hand them to the loop.
+
+    The thread waits for room in the bounded queue before reading on, so a busy
+    proxy stops consuming stdin and the client sees normal pipe backpressure.
+    None is queued at end of input.
+    """
+    def read() -> None:
         for line in sys.stdin:
+            asyncio.run_coroutine_threadsafe(queue.put(line), loop).result()
+        asyncio.run_coroutine_threadsafe(queue.put(None), loop).result()
+
+    threading.Thread(target=read, name="stdin-reader", daemon=True).start()
+
+
+class Proxy:
+    """Dispatches JSON-RPC messages from stdin to concurrent handler tasks."""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.in_flight: dict = {}
+        self.slots = asyncio.Semaphore(MAX_IN_FLIGHT)
+        self.server_ready = asyncio.Event()
+        # Serialized tools array from the last tools/list and its ETag
+        self.tools_json: str | None = None
+        self.tools_etag: str | None = None
+
+    async def wait_for_server(self) -> None:
+        """Poll /tools until the HTTP server answers (tool requests wait for this)."""
+        for _ in range(SERVER_WAIT_SECONDS):
+            try:
+                resp = await self.client.get("/tools", timeout=2)
+                if resp.status_code == 200:
+                    self.server_ready.set()
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(1)
+        log("Failed to connect to HTTP server")
+
+    async def forward(self, method: str, request_id, params: dict) -> dict | str:
+        if not self.server_ready.is_set():
             try:
-                request = json.loads(line.strip())
-                method = request.get("method")
-                request_id = request.get("id", 0)
-
-                if method == "initialize":
-                    # Handle initialization
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "protocolVersion": "2024-11-05",
-                            "capabilities": {
-                                "tools": {}
-                            },
-                            "serverInfo": {
-                                "name": "outlook-email-mcp-server",
-                                "version": "1.0.0"
-                            }
-                        }
-                    }
-                    print(json.dumps(response), flush=True)
-
-                elif method == "tools/list":
-                    # Get tools from HTTP server and format properly
-                    try:
-                        resp = requests.get(f"{HTTP_BASE_URL}/tools?id={request_id}", timeout=5)
-                        if resp.status_code == 200:
-                            server_response = resp.json()
-                            # Extract tools from server response and format for MCP
-                            tools = server_response.get("result", {}).get("tools", [])
-                            response = {
-                                "jsonrpc": "2.0",
-                                "id": request_id,
-                                "result": {
-                                    "tools": tools
-                                }
-                            }
-                        else:
-                            response = {
-                                "jsonrpc": "2.0",
-                                "id": request_id,
-                                "error": {"code": -32000, "message": "Failed to get tools from server"}
-                            }
-                    except requests.exceptions.RequestException as e:
-                        response = {
-                            "jsonrpc": "2.0",
-                            "id": request_id,
-                            "error": {"code": -32000, "message": f"Server connection error: {str(e)}"}
-                        }
-                    print(json.dumps(response), flush=True)
-
-                elif method == "tools/call":
-                    # Forward tool calls to HTTP server
-                    try:
-                        payload = {**request["params"], "id": request_id}
-                        resp = requests.post(f"{HTTP_BASE_URL}/tool_call", json=payload, timeout=30)
-                        if resp.status_code == 200:
-                            response_data = resp.json()
-                        else:
-                            response_data = {
-                                "jsonrpc": "2.0",
-                                "id": request_id,
-                                "error": {"code": -32000, "message": f"HTTP {resp.status_code}: {resp.text}"}
-                            }
-                    except requests.exceptions.RequestException as e:
-                        response_data = {
-                            "jsonrpc": "2.0",
-                            "id": request_id,
-                            "error": {"code": -32000, "message": f"Request failed: {str(e)}"}
-                        }
-                    print(json.dumps(response_data), flush=True)
-
-                elif method == "resources/list":
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "resources": []
-                        }
-                    }
-                    print(json.dumps(response), flush=True)
-
-                elif method == "prompts/list":
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {
-                            "prompts": []
-                        }
-                    }
-                    print(json.dumps(response), flush=True)
-
-                elif method == "notifications/initialized":
-                    # Acknowledge without result
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": {}
-                    }
-                    print(json.dumps(response), flush=True)
-
-                else:
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "error": {"code": -32601, "message": f"Method '{method}' not found"}
-                    }
-                    print(json.dumps(response), flush=True)
-
-            except json.JSONDecodeError as e:
-                print(f"JSON decode error: {e}", file=sys.stderr, flush=True)
-            except Exception as e:
-                print(f"Error: {e}", file=sys.stderr, flush=True)
-                response = {
-                    "jsonrpc": "2.0",
-                    "id": request.get("id", 0) if 'request' in locals() else 0,
-                    "error": {"code": -32000, "message": f"Internal error: {str(e)}"}
-                }
-                print(json.dumps(response), flush=True)
+                await asyncio.wait_for(self.server_ready.wait(), SERVER_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                return error_response(request_id, -32000, "Server connection error: server not reachable")
+
+        if method == "tools/list":
+            return await self.list_tools(request_id)
+
+        # tools/call
+        try:
+            resp = await self.client.post("/tool_call", json={**params, "id": request_id}, timeout=TOOL_CALL_TIMEOUT)
+        except httpx.HTTPError as e:
+            return error_response(request_id, -32000, f"Request failed: {str(e)}")
+        if resp.status_code != 200:
+            return error_response(request_id, -32000, f"HTTP {resp.status_code}: {resp.text}")
+        # Already a compact, single-line JSON-RPC response for this id - pass it through as is
+        return resp.text
+
+    async def list_tools(self, request_id) -> dict | str:
+        headers = {"If-None-Match": self.tools_etag} if self.tools_etag else None
+        try:
+            resp = await self.client.get("/tools", params={"id": request_id}, headers=headers, timeout=TOOLS_LIST_TIMEOUT)
+        except httpx.HTTPError as e:
+            return error_response(request_id, -32000, f"Server connection error: {str(e)}")
+        if resp.status_code == 200:
+            tools = resp.json().get("result", {}).get("tools", [])
+            self.tools_json = json.dumps(tools)
+            self.tools_etag = resp.headers.get("ETag")
+        elif resp.status_code != 304 or self.tools_json is None:
+            return error_response(request_id, -32000, "Failed to get tools from server")
+        return f'{{"jsonrpc": "2.0", "id": {json.dumps(request_id)}, "result": {{"tools": {self.tools_json}}}}}'
+
+    async def handle(self, request: dict) -> dict | str:
+        method = request.get("method")
+        request_id = request.get("id")
+        if method == "initialize":
+            # Agree to the client's version if supported, otherwise offer the newest
+            requested = (request.get("params") or {}).get("protocolVersion")
+            version = requested if requested in PROTOCOL_VERSIONS else PROTOCOL_VERSIONS[0]
+            return {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "result": {"protocolVersion": version, "capabilities": {"tools": {}}, "serverInfo": SERVER_INFO}
+            }
+        if method in ("tools/list", "tools/call"):
+            return await self.forward(method, request_id, request.get("params") or {})
+        if method == "resources/list":
+            return {"jsonrpc": "2.0", "id": request_id, "result": {"resources": []}}
+        if method == "prompts/list":
+            return {"jsonrpc": "2.0", "id": request_id, "result": {"prompts": []}}
+        if method == "ping":
+            return {"jsonrpc": "2.0", "id": request_id, "result": {}}
+        return error_response(request_id, -32601, f"Method '{method}' not found")
+
+    async def run_request(self, request: dict) -> None:
+        try:
+            response = await self.handle(request)
+        except Exception as e:
+            log(f"Error: {e}")
+            response = error_response(request.get("id"), -32000, f"Internal error: {str(e)}")
+        write_message(response)
 
+    def _finished(self, request_id, task: asyncio.Task) -> None:
+        # Runs for completed and cancelled (even not yet started) tasks alike
+        if self.in_flight.get(request_id) is task:
+            del self.in_flight[request_id]
+        self.slots.release()
+
+    def dispatch(self, line: str) -> bool:
+        """
+        Start handling one input line.
+
+        Returns:
+            bool: True if a request task was started (and holds an in-flight slot).
+        """
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            log(f"JSON decode error: {e}")
+            return False
+        if not isinstance(request, dict):
+            return False
+
+        if "id" not in request:
+            # Notifications get no response
+            if request.get("method") == "notifications/cancelled":
+                params = request.get("params")
+                request_id = params.get("requestId") if isinstance(params, dict) else None
+                task = self.in_flight.get(request_id) if is_valid_id(request_id) else None
+                if task is not None:
+                    task.cancel()
+            return False
+
+        if not is_valid_id(request["id"]):
+            # An unhashable id (list, object) cannot be tracked in in_flight; answer instead of crashing
+            write_message(error_response(None, -32600, "Invalid Request: id must be a string, integer or null"))
+            return False
+
+        # A cancelled task never writes a response
+        task = asyncio.create_task(self.run_request(request))
+        task.add_done_callback(lambda done, request_id=request["id"]: self._finished(request_id, done))
+        self.in_flight[request["id"]] = task
+        return True
+
+    async def run(self, queue: asyncio.Queue) -> None:
+        while True:
+            # Backpressure: no new request is read until an in-flight slot is free
+            await self.slots.acquire()
+            line = await queue.get()
+            if line is None:
+                self.slots.release()
+                break
+            if not line.strip() or not self.dispatch(line.strip()):
+                self.slots.release()
+        # End of input: let in-flight requests finish and answer
+        if self.in_flight:
+            await asyncio.gather(*self.in_flight.values(), return_exceptions=True)
+
+
+async def main() -> None:
+    log("MCP Proxy started")
+    limits = httpx.Limits(max_connections=MAX_IN_FLIGHT, max_keepalive_connections=MAX_IN_FLIGHT)
+    if HTTP_UDS_PATH:
+        # The server keeps idle UDS connections for 300 s; drop ours a little earlier
+        uds_limits = httpx.Limits(max_connections=MAX_IN_FLIGHT, max_keepalive_connections=MAX_IN_FLIGHT, keepalive_expiry=240)
+        # The host part of the URL only fills the Host header
+        transport = httpx.AsyncHTTPTransport(uds=HTTP_UDS_PATH, limits=uds_limits)
+        client = httpx.AsyncClient(base_url="http://localhost", transport=transport)
+    else:
+        client = httpx.AsyncClient(base_url=HTTP_BASE_URL, limits=limits)
+    async with client:
+        proxy = Proxy(client)
+        waiter = asyncio.create_task(proxy.wait_for_server())
+        queue: asyncio.Queue = asyncio.Queue(maxsize=READ_AHEAD)
+        start_stdin_reader(asyncio.get_running_loop(), queue)
+        try:
+            await proxy.run(queue)
+        finally:
+            waiter.cancel()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
     except KeyboardInterrupt:
         pass
     except Exception as e:
-        print(f"Fatal error: {e}", file=sys.stderr, flush=True)
-
-if __name__ == "__main__":
-    main()
+        log(f"Fatal error: {e}")
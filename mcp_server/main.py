@@ -1,4 +1,6 @@
 import os
+import socket
+import stat
 import sys
 
 # Dynamically set PYTHONPATH based on the environment
@@ -8,6 +10,7 @@ if "mcp_server" not in sys.path:
 from services.auth.graph_auth import validate_graph_auth_on_startup
 import uvicorn
 from app.create_app import create_starlette_app
+from config import settings
 
 # Ensure token is available on startup
 validate_graph_auth_on_startup()
@@ -15,6 +18,38 @@ validate_graph_auth_on_startup()
 
 app = create_starlette_app()
 
+
+def remove_stale_socket(path: str) -> None:
+    """
+    Delete a socket file left behind by a previous run.
+
+    Raises:
+        SystemExit: If a server is still listening on the socket.
+    """
+    if not (os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode)):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)  # nobody listens - stale socket from a previous run
+        return
+    finally:
+        probe.close()
+    sys.exit(f"Error: {path} is in use by a running server (address in use)")
+
+
 if __name__ == "__main__":
     # print("Starting Outlook MCP server...")
-    uvicorn.run(app, host="127.0.0.1", port=8000)
+    if settings.UDS_PATH:
+        # Co-located clients (the stdio proxy) connect over a Unix domain socket - no TCP port to manage
+        remove_stale_socket(settings.UDS_PATH)
+        # Keep idle connections open, so the proxy reuses one persistent connection
+        listen = {"uds": settings.UDS_PATH, "timeout_keep_alive": 300}
+    else:
+        listen = {"host": "127.0.0.1", "port": 8000}
+    if settings.WORKERS > 1:
+        # Workers import this module themselves; the shared token files are process-safe
+        uvicorn.run("main:app", workers=settings.WORKERS, **listen)
+    else:
+        uvicorn.run(app, **listen)
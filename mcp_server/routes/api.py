@@ -1,4 +1,5 @@
 from routes.email_api import email_routes
 from routes.tools_api import tool_routes
+from routes.auth_api import auth_routes
 
-routes = email_routes + tool_routes
+routes = email_routes + tool_routes + auth_routes
@@ -0,0 +1,23 @@
+from starlette.routing import Route
+from starlette.responses import JSONResponse
+from starlette.requests import Request
+from services.auth.account_pool import account_pool
+
+async def login_route(request: Request):
+    try:
+        data = await request.json() if await request.body() else {}
+        result = await account_pool.get(data.get("account"), create=True).device_login.start()
+        return JSONResponse(result, status_code=202)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+async def login_status_route(request: Request):
+    account = request.query_params.get("account")
+    if not account_pool.is_known(account):
+        return JSONResponse({"account": account_pool.resolve(account), "state": "idle"})
+    return JSONResponse(account_pool.get(account).device_login.status())
+
+auth_routes = [
+    Route("/api/auth/login", login_route, methods=["POST"]),
+    Route("/api/auth/login-status", login_status_route, methods=["GET"]),
+]
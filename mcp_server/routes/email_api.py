@@ -6,6 +6,8 @@ from services.email.fetch_emails import fetch_outlook_emails
 from services.email.reply_email import reply_to_outlook_email
 from services.email.delete_email import delete_outlook_email
 from services.email.forward_email import forward_outlook_email
+from services.email.send_jobs import get_send_job_status
+from services.sync import get_new_emails, search_local_emails
 
 from starlette.requests import Request
 from starlette.responses import JSONResponse
@@ -23,6 +25,7 @@ async def send_email_route(request: Request):
         cc = data.get("cc", [])
         bcc = data.get("bcc", [])
         send_individual = data.get("send_individual", False)
+        account = data.get("account")
 
         if not recipient or not subject:
             return JSONResponse({"error": "Missing required fields: 'recipient' and 'subject'"}, status_code=400)
@@ -45,7 +48,8 @@ async def send_email_route(request: Request):
             content_type=content_type,
             cc=cc_list,
             bcc=bcc_list,
-            send_individual=send_individual
+            send_individual=send_individual,
+            account=account
         )
 
         return JSONResponse(result)
@@ -62,7 +66,29 @@ async def fetch_emails_route(request: Request):
         sender = data.get("sender")
         email_id = data.get("email_id")
         subject = data.get("subject")
-        result = await fetch_outlook_emails(folder, is_read, sender, email_id, subject)
+        account = data.get("account")
+        received_after = data.get("received_after")
+        received_before = data.get("received_before")
+        top = int(data.get("top", 10))
+        include_body = data.get("include_body") == "true"
+        cursor = data.get("cursor")
+        page_size = int(data["page_size"]) if "page_size" in data else None
+        bypass_cache = data.get("bypass_cache") == "true"
+        result = await fetch_outlook_emails(
+            folder,
+            is_read,
+            sender,
+            email_id,
+            subject,
+            top=top,
+            account=account,
+            received_after=received_after,
+            received_before=received_before,
+            include_body=include_body,
+            cursor=cursor,
+            page_size=page_size,
+            bypass_cache=bypass_cache
+        )
         return JSONResponse(result)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
@@ -72,23 +98,25 @@ async def reply_email_route(request: Request):
         data = await request.json()
         email_id = data.get("email_id")
         reply_message = data.get("reply_message")
+        account = data.get("account")
         
         if not email_id or not reply_message:
             return JSONResponse({"error": "Missing required fields: email_id and reply_message"}, status_code=400)
             
-        result = await reply_to_outlook_email(email_id, reply_message)
+        result = await reply_to_outlook_email(email_id, reply_message, account=account)
         return JSONResponse(result)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 async def delete_email_route(request: Request):
     try:
         data = await request.json()
-        email_id = data.get("email_id")   
+        email_id = data.get("email_id")
+        account = data.get("account")
         
         if not email_id:
             return JSONResponse({"error": "Missing required field: email_id"}, status_code=400)
             
-        result = await delete_outlook_email(email_id)
+        result = await delete_outlook_email(email_id, account=account)
         return JSONResponse(result)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
@@ -102,6 +130,7 @@ async def forward_email_route(request: Request):
         additional_message = data.get("additional_message", "")
         content_type = data.get("content_type", "Text")
         send_individual = data.get("send_individual", False)
+        account = data.get("account")
 
         
         if not email_id or not to_recipient:
@@ -125,16 +154,50 @@ async def forward_email_route(request: Request):
             bcc_recipients=bcc_list, 
             additional_message=additional_message, 
             content_type=content_type,
-            send_individual=send_individual
+            send_individual=send_individual,
+            account=account
         )
         return JSONResponse(result)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
+async def new_emails_route(request: Request):
+    try:
+        data = request.query_params
+        folder = data.get("folder", "inbox")
+        since = int(data.get("since", 0))
+        top = int(data.get("top", 50))
+        account = data.get("account")
+        result = await get_new_emails(folder, since, top, account=account)
+        return JSONResponse(result)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+async def search_route(request: Request):
+    try:
+        data = request.query_params
+        query = data.get("q") or data.get("query")
+        folder = data.get("folder")
+        top = int(data.get("top", 20))
+        account = data.get("account")
+        if not query:
+            return JSONResponse({"error": "Missing required query parameter: 'q'"}, status_code=400)
+        result = await search_local_emails(query, folder, top, account=account)
+        return JSONResponse(result)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+async def send_job_route(request: Request):
+    result = get_send_job_status(request.path_params["job_id"], account=request.query_params.get("account"))
+    return JSONResponse(result, status_code=404 if result["status"] == "error" else 200)
+
 email_routes = [
     Route("/api/send-email", send_email_route, methods=["POST"]),
     Route("/api/fetch-emails", fetch_emails_route, methods=["GET"]),
     Route("/api/reply-email", reply_email_route, methods=["POST"]),
     Route("/api/delete-email", delete_email_route, methods=["DELETE"]),
     Route("/api/forward-email", forward_email_route, methods=["POST"]),
+    Route("/api/new-emails", new_emails_route, methods=["GET"]),
+    Route("/api/search", search_route, methods=["GET"]),
+    Route("/api/send-jobs/{job_id}", send_job_route, methods=["GET"]),
 ]
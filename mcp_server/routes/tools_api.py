@@ -1,21 +1,38 @@
+import hashlib
+import json
+from typing import Any
 from starlette.routing import Route
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, Response
 from starlette.requests import Request
 from server.mcp_email_server import create_email_mcp_server
+from server.tool_results import encode_tool_result
 
 mcp_app = create_email_mcp_server()
 
-async def tools(request: Request):
-    request_id = request.query_params.get("id", 0)
-    
-    try:
+# First MCP revision defining structuredContent in tool results
+PROTOCOL_VERSION = "2025-06-18"
+
+# tools/list result, serialized once: the tool set does not change after startup
+_catalogue = {"body": None, "etag": None}
+
+
+async def load_tool_catalogue() -> bytes:
+    """
+    Serialize the tools/list result once and derive its ETag.
+
+    Called by the app lifespan at startup (and lazily by the first request).
+
+    Returns:
+        bytes: The JSON-encoded `result` object of a tools/list response.
+    """
+    if _catalogue["body"] is None:
         tools_list = await mcp_app.list_tools()
-        
+
         # Convert tools to proper MCP format
         formatted_tools = []
         for tool in tools_list:
             tool_dict = tool.model_dump() if hasattr(tool, 'model_dump') else tool
-            
+
             # Ensure proper structure for MCP
             formatted_tool = {
                 "name": tool_dict.get("name"),
@@ -27,55 +44,90 @@ async def tools(request: Request):
                 })
             }
             formatted_tools.append(formatted_tool)
-        
-        return JSONResponse({
-            "jsonrpc": "2.0",
-            "id": int(request_id),
-            "result": {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {
-                    "tools": {}
-                },
-                "tools": formatted_tools,
-                "serverInfo": {
-                    "name": "outlook-email-mcp-server",
-                    "version": "1.0.0"
-                }
+
+        body = json.dumps({
+            "protocolVersion": PROTOCOL_VERSION,
+            "capabilities": {
+                "tools": {}
+            },
+            "tools": formatted_tools,
+            "serverInfo": {
+                "name": "outlook-email-mcp-server",
+                "version": "1.0.0"
             }
-        })
+        }, separators=(",", ":")).encode()
+        _catalogue["etag"] = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        _catalogue["body"] = body
+    return _catalogue["body"]
+
+
+async def tools(request: Request):
+    request_id = request.query_params.get("id", "0")
+    # JSON-RPC ids may be numbers or strings
+    request_id = int(request_id) if request_id.lstrip("-").isdigit() else request_id
+
+    try:
+        result = await load_tool_catalogue()
+        headers = {"ETag": _catalogue["etag"], "Cache-Control": "no-cache"}
+        if_none_match = request.headers.get("if-none-match", "")
+        if _catalogue["etag"] in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+            return Response(status_code=304, headers=headers)
+
+        # Only the id differs between responses - splice it around the pre-serialized result
+        body = b'{"jsonrpc":"2.0","id":' + json.dumps(request_id).encode() + b',"result":' + result + b'}'
+        return Response(body, media_type="application/json", headers=headers)
     except Exception as e:
         return JSONResponse({
             "jsonrpc": "2.0",
-            "id": int(request_id),
+            "id": request_id,
             "error": {
                 "code": -32000,
                 "message": f"Failed to list tools: {str(e)}"
             }
         })
 
+def tool_output(result: Any) -> Any:
+    """
+    Recover a tool's return value from what FastMCP.call_tool returns.
+
+    FastMCP renders a dict as one text block of indented JSON; that is parsed
+    back so the result can be sent as structuredContent. Releases that return
+    structured output alongside the content blocks are used as is.
+
+    Args:
+        result (Any): Return value of mcp_app.call_tool().
+
+    Returns:
+        Any: The tool's dict result, or its text for tools returning strings.
+    """
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], dict):
+        return result[1]
+    if isinstance(result, dict):
+        return result
+    text = "\n".join(block.text for block in result if getattr(block, "type", None) == "text")
+    if len(result) == 1 and text.startswith("{"):
+        try:
+            return json.loads(text)
+        except ValueError:
+            pass
+    return text
+
+
 async def tool_call(request: Request):
     data = await request.json()
+    request_id = data.get("id", 1)
     try:
         result = await mcp_app.call_tool(
-            name=data["name"], 
-            arguments=data.get("arguments", data.get("input", {}))  # Handle both field names
+            data["name"],
+            data.get("arguments", data.get("input", {}))  # Handle both field names
         )
-        return JSONResponse({
-            "jsonrpc": "2.0",
-            "id": data.get("id", 1),
-            "result": {
-                "content": [  # MCP expects content array format
-                    {
-                        "type": "text",
-                        "text": str(result)
-                    }
-                ]
-            }
-        })
+        result = tool_output(result)
+        body = b'{"jsonrpc":"2.0","id":' + json.dumps(request_id).encode() + b',"result":' + encode_tool_result(result) + b'}'
+        return Response(body, media_type="application/json")
     except Exception as e:
         return JSONResponse({
             "jsonrpc": "2.0",
-            "id": data.get("id", 1),
+            "id": request_id,
             "error": {
                 "code": -32000,
                 "message": f"Tool execution failed: {str(e)}"
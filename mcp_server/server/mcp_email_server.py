@@ -4,27 +4,65 @@ from services.email.fetch_emails import fetch_outlook_emails
 from services.email.reply_email import reply_to_outlook_email
 from services.email.delete_email import delete_outlook_email
 from services.email.forward_email import forward_outlook_email
-from services.auth.graph_auth import authenticate_and_get_token
+from services.email.send_jobs import get_send_job_status
+from services.sync import get_new_emails, search_local_emails
+from services.auth.account_pool import account_pool
 from utils.input_utils import normalize_email_list
-import os
+import asyncio
 from typing import Literal
 
 
-def create_email_mcp_server():
-    mcp_app = FastMCP("outlook-email-mcp-server")
+def create_email_mcp_server(lifespan=None):
+    """
+    Create the FastMCP server exposing the email tools.
+
+    Args:
+        lifespan: Optional FastMCP lifespan (e.g. starting the shared services when
+                  the server runs on its own over stdio, see stdio_main.py).
+    """
+    mcp_app = FastMCP("outlook-email-mcp-server", lifespan=lifespan)
 
     @mcp_app.tool()
-    async def login_tool() -> str:
-        """Authenticate with Microsoft Outlook via Device Code Flow"""
-        token = authenticate_and_get_token()
-        return "✅ Login successful. You can now use Outlook tools."
+    async def login_tool(account: str = None) -> dict:
+        """
+        Start authenticating with Microsoft Outlook via Device Code Flow.
+
+        Returns immediately with a code and URL; the user signs in there while
+        the server keeps working. Use login_status_tool to check when it completes.
+
+        Args:
+            account: Mailbox account key to sign in (e.g. "alice@contoso.com"; default account if omitted)
+        """
+        return await account_pool.get(account, create=True).device_login.start()
 
     @mcp_app.tool()
-    async def logout_tool() -> str:
-        """Clear saved Outlook access token"""
-        token_path = "mcp_server/.token.json"
-        if os.path.exists(token_path):
-            os.remove(token_path)
+    async def login_status_tool(account: str = None) -> dict:
+        """
+        Check the progress of a login started with login_tool.
+
+        Args:
+            account: Mailbox account key (default account if omitted)
+
+        Returns:
+            dict: {"account": ..., "state": "idle" | "pending" | "complete" | "failed", ...}
+        """
+        if not account_pool.is_known(account):
+            return {"account": account_pool.resolve(account), "state": "idle"}
+        return account_pool.get(account).device_login.status()
+
+    @mcp_app.tool()
+    async def logout_tool(account: str = None) -> str:
+        """
+        Clear saved Outlook access token
+
+        Args:
+            account: Mailbox account key to sign out (default account if omitted)
+        """
+        if not account_pool.is_known(account):
+            return "ℹ️ No token was found to delete."
+        context = account_pool.get(account)
+        context.token_manager.invalidate()
+        if await asyncio.to_thread(context.msal_account.clear_token_cache):
             return "🔒 Logout successful. Access token deleted."
         else:
             return "ℹ️ No token was found to delete."
@@ -37,7 +75,8 @@ def create_email_mcp_server():
         content_type: Literal["Text", "HTML"] = "Text",
         cc: str = "",
         bcc: str = "",
-        send_individual: bool = False
+        send_individual: bool = False,
+        account: str = None
     ):
         """
         Enhanced MCP tool to send emails via Microsoft Graph API with advanced recipient management.
@@ -59,6 +98,7 @@ def create_email_mcp_server():
             send_individual (bool): Email delivery mode:
                                   - False (default): Send one email to all recipients
                                   - True: Send separate individual emails to each recipient
+            account (str): Optional mailbox account to send from (default account if omitted).
 
         Returns:
             dict: Detailed status information with the following structure:
@@ -67,6 +107,8 @@ def create_email_mcp_server():
                   - For group emails: {"recipients": [...], "status": "sent"}
                   - For individual emails: {"recipient": "email", "status": "sent"}
                   - For errors: {"status": "error", "message": "error details"}
+            Large individual sends that take longer to pace than a tool call may wait return
+            {"status": "accepted", "job_id": ...} right away; poll send_job_status_tool(job_id).
 
         Features:
             ✅ Multiple recipients support (comma or semicolon-separated lists)
@@ -131,7 +173,8 @@ def create_email_mcp_server():
             content_type=content_type,
             cc=cc_list,
             bcc=bcc_list,
-            send_individual=send_individual
+            send_individual=send_individual,
+            account=account
         )
 
     @mcp_app.tool()
@@ -140,36 +183,71 @@ def create_email_mcp_server():
         is_read: bool = None,
         sender: str = None,
         email_id: str = None,
-        subject: str = None
+        subject: str = None,
+        account: str = None,
+        received_after: str = None,
+        received_before: str = None,
+        top: int = 10,
+        include_body: bool = False,
+        cursor: str = None,
+        page_size: int = None,
+        bypass_cache: bool = False
     ):
         """
         Fetch emails from Outlook.
         
         Args:
-            folder: The folder to fetch emails from (default: inbox)
+            folder: The folder to fetch emails from: well-known name (inbox, sentitems, ...), folder path like "Inbox/Projects/Q3", or folder name (default: inbox)
             is_read: Filter by read status (True/False)
             sender: Filter by sender email address
             email_id: Fetch a specific email by ID
-            subject: Filter emails containing this text in subject (supports natural language queries)
+            subject: Filter emails containing all of these words in the subject (searched server-side; each word or word start, e.g. "invoic", must begin a subject word)
+            account: Mailbox account to read (default account if omitted)
+            received_after: Only emails received at/after this ISO 8601 date or datetime
+            received_before: Only emails received before this ISO 8601 date or datetime
+            top: Maximum number of emails to return (default: 10)
+            include_body: Also return full messages with bodies (default: summaries only)
+            cursor: next_cursor from a previous result to get the next results (other filters are then ignored)
+            page_size: Messages Graph returns per page, up to 1000 (default: based on top)
+            bypass_cache: Always read from Outlook, ignoring results cached in the last few seconds
             
         Returns:
-            Email data including IDs for use with reply_email_tool
+            Email summaries (id, subject, from, received, is_read, preview) including IDs
+            for use with reply_email_tool; full messages under "emails" with include_body=True;
+            next_cursor when more results are available
             
         Examples:
             - fetch_email_tool(subject="meeting notes") - finds emails with "meeting notes" in subject
             - fetch_email_tool(is_read=False) - finds all unread emails
             - fetch_email_tool(email_id="ABC123") - fetches a specific email by ID
+            - fetch_email_tool(sender="boss@example.com", received_after="2024-05-01") - recent emails from a sender
+            - fetch_email_tool(cursor="eyJ1cmwiOi...") - the next results of a previous listing
         """
-        return await fetch_outlook_emails(folder, is_read, sender, email_id, subject)
+        return await fetch_outlook_emails(
+            folder,
+            is_read,
+            sender,
+            email_id,
+            subject,
+            top=top,
+            account=account,
+            received_after=received_after,
+            received_before=received_before,
+            include_body=include_body,
+            cursor=cursor,
+            page_size=page_size,
+            bypass_cache=bypass_cache
+        )
         
     @mcp_app.tool()
-    async def reply_email_tool(email_id: str, reply_message: str):
+    async def reply_email_tool(email_id: str, reply_message: str, account: str = None):
         """
         Reply to an email using its ID.
         
         Args:
             email_id: The ID of the email to reply to (get this from fetch_email_tool results)
             reply_message: The content of the reply
+            account: Mailbox account that owns the email (default account if omitted)
             
         Returns:
             Status of the reply operation
@@ -178,15 +256,16 @@ def create_email_mcp_server():
             1. First use fetch_email_tool to get emails and their IDs
             2. Then use this tool with the ID of the email you want to reply to
         """
-        return await reply_to_outlook_email(email_id, reply_message)
+        return await reply_to_outlook_email(email_id, reply_message, account=account)
     
     @mcp_app.tool()
-    async def delete_email_tool(email_id: str):
+    async def delete_email_tool(email_id: str, account: str = None):
         """
         Deletes an email using its ID.
         
         Args:
-            email_id: The ID of the email to delete (get this from fetch_email_tool results)            
+            email_id: The ID of the email to delete (get this from fetch_email_tool results)
+            account: Mailbox account that owns the email (default account if omitted)
             
         Returns:
             Status of the delete operation
@@ -195,7 +274,54 @@ def create_email_mcp_server():
             1. First use fetch_email_tool to get emails and their IDs
             2. Then use this tool with the ID of the email you want to delete
         """
-        return await delete_outlook_email(email_id)
+        return await delete_outlook_email(email_id, account=account)
+
+    @mcp_app.tool()
+    async def get_new_emails_tool(folder: str = "inbox", since: int = 0, top: int = 50, account: str = None):
+        """
+        Get what changed in a folder since the last check (new, updated and removed emails).
+
+        Uses an incremental delta sync, so repeated calls are cheap.
+
+        Args:
+            folder: The folder to check (default: inbox)
+            since: sync_token returned by the previous call (0 returns everything stored locally)
+            top: Maximum number of changed emails to return (default: 50)
+            account: Mailbox account to check (default account if omitted)
+
+        Returns:
+            changed (email summaries), removed (email IDs), sync_token to pass as `since` next time
+            (if truncated is true, more changes are waiting: call again with the new sync_token;
+            if reset is true, the token was too old and the changes are everything stored - replace what you kept)
+
+        Example:
+            1. result = get_new_emails_tool()
+            2. Later: get_new_emails_tool(since=result["sync_token"])
+        """
+        return await get_new_emails(folder, since, top, account=account)
+
+    @mcp_app.tool()
+    async def search_local_email_tool(query: str, folder: str = None, top: int = 20, account: str = None):
+        """
+        Search emails instantly in the local mirror (full-text over subject, sender, preview and body).
+
+        Much faster than fetch_email_tool and never throttled, but only covers emails
+        already synced or fetched - check `stale` / `freshness` in the result, and use
+        get_new_emails_tool or fetch_email_tool when the mirror is out of date.
+
+        Args:
+            query: Words to search for (all must match; prefixes match too)
+            folder: Only search this folder (default: all mirrored folders)
+            top: Maximum number of results (default: 20)
+            account: Mailbox account to search (default account if omitted)
+
+        Returns:
+            Ranked results (email summaries with folder, score and snippet), took_ms, freshness and stale
+
+        Example:
+            - search_local_email_tool(query="budget review") - best matches for both words
+        """
+        return await search_local_emails(query, folder, top, account=account)
 
     @mcp_app.tool()
     async def forward_email_tool(
@@ -205,7 +331,8 @@ def create_email_mcp_server():
         bcc_recipients: str = "", 
         additional_message: str = "", 
         content_type: str = "Text",
-        send_individual: bool = False
+        send_individual: bool = False,
+        account: str = None
     ):
         """
         Enhanced MCP tool to forward emails via Microsoft Graph API with advanced recipient management.
@@ -226,6 +353,7 @@ def create_email_mcp_server():
             send_individual (bool): Forward delivery mode:
                                   - False (default): Send one forward to all recipients
                                   - True: Send separate individual forwards to each recipient
+            account (str): Optional mailbox account to forward from (default account if omitted)
             
         Returns:
             dict: Detailed status information with the following structure:
@@ -234,6 +362,8 @@ def create_email_mcp_server():
                   - For group forwards: {"recipients": [...], "status": "forwarded"}
                   - For individual forwards: {"recipient": "email", "status": "forwarded"}
                   - For errors: {"status": "error", "message": "error details"}
+            Large individual forwards that take longer to pace than a tool call may wait return
+            {"status": "accepted", "job_id": ...} right away; poll send_job_status_tool(job_id).
         
         Features:
             ✅ Multiple recipients support (comma or semicolon-separated lists)
@@ -296,7 +426,23 @@ def create_email_mcp_server():
             bcc_recipients=bcc_list, 
             additional_message=additional_message, 
             content_type=content_type,
-            send_individual=send_individual
+            send_individual=send_individual,
+            account=account
         )
 
+    @mcp_app.tool()
+    async def send_job_status_tool(job_id: str, account: str = None) -> dict:
+        """
+        Check on a large send or forward that is being paced in the background.
+
+        Args:
+            job_id: job_id returned when send_email_tool or forward_email_tool answered "accepted"
+            account: Mailbox account the send was made from (default account if omitted)
+
+        Returns:
+            state ("running", "complete", "failed" or "cancelled"), processed / total messages,
+            the pacing estimate, and when complete the same result the send tool would have returned
+        """
+        return get_send_job_status(job_id, account=account)
+
     return mcp_app
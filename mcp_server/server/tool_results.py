@@ -0,0 +1,139 @@
+"""
+Tool Result Encoding for Outlook MCP Server
+
+Turns the dict a tool returns into the `result` object of a JSON-RPC
+tools/call response, encoded once as compact JSON.
+
+Key Features:
+- `structuredContent` carries the result as JSON, and a compact JSON text
+  rendering goes in `content` for clients that only read text
+- The result is encoded a single time; the text block reuses those bytes
+- `isError` is set for results with "status": "error"
+- Results larger than TOOL_RESULT_MAX_BYTES are cut down with hints on how
+  to page instead of being returned whole: full messages (include_body) are
+  dropped first, then list items from the end (clearing next_cursor, which
+  would skip them), then the text is truncated
+
+Dependencies:
+- utils.json_utils: Compact JSON encoding (orjson when installed)
+- config.settings: TOOL_RESULT_MAX_BYTES
+"""
+
+from typing import Any, Tuple
+from config import settings
+from utils.json_utils import dumps_bytes
+
+# Lists that can be cut short when a result is too large, in the order they are tried
+TRIMMABLE_LISTS = ("email_summaries", "results", "messages")
+
+
+def _drop_full_messages(result: dict) -> dict:
+    result = {key: value for key, value in result.items() if key != "emails"}
+    result["truncated"] = {
+        "omitted": "emails",
+        "hint": "Full messages did not fit in the result size limit; fetch them one at a time with email_id",
+    }
+    return result
+
+
+def _trim_list(result: dict, key: str, max_bytes: int) -> dict:
+    """
+    Keep as many leading items of result[key] as fit in max_bytes.
+
+    A next_cursor in the result points past the whole, untrimmed list, so
+    following it would skip the dropped items; it is cleared and the hint asks
+    for the same query with a smaller top instead.
+    """
+    items = result[key]
+
+    def trimmed(kept: int) -> dict:
+        reduced = {**result, key: items[:kept], "truncated": {
+            **result.get("truncated", {}),
+            "returned": kept,
+            "total": len(items),
+            "hint": f"Only the first {kept} of {len(items)} {key} fit in the result size limit. Repeat the same "
+                    f"query with top={max(kept, 1)} (and include_body=False) and page on with the next_cursor that returns",
+        }}
+        if "next_cursor" in reduced:
+            reduced["next_cursor"] = None
+        return reduced
+
+    # Measured with the widest counts, so the final (shorter or equal) encoding fits too
+    size = len(dumps_bytes({**trimmed(len(items)), key: []})) + 4
+    kept = 0
+    for item in items:
+        size += len(dumps_bytes(item)) + 1
+        if size > max_bytes:
+            break
+        kept += 1
+    return trimmed(kept)
+
+
+def fit_result(result: dict, max_bytes: int) -> Tuple[dict, bytes]:
+    """
+    Reduce a result until its JSON encoding fits in max_bytes.
+
+    Args:
+        result (dict): Tool result.
+        max_bytes (int): Size limit of the encoded result.
+
+    Returns:
+        Tuple[dict, bytes]: The (possibly reduced) result and its encoding. The
+        encoding can still exceed max_bytes if no list was left to trim.
+    """
+    encoded = dumps_bytes(result)
+    if len(encoded) <= max_bytes:
+        return result, encoded
+    if isinstance(result.get("emails"), list):
+        result = _drop_full_messages(result)
+        encoded = dumps_bytes(result)
+    for key in TRIMMABLE_LISTS:
+        if len(encoded) <= max_bytes:
+            break
+        if isinstance(result.get(key), list) and result[key]:
+            result = _trim_list(result, key, max_bytes)
+            encoded = dumps_bytes(result)
+    return result, encoded
+
+
+def encode_tool_result(result: Any) -> bytes:
+    """
+    Encode a tool's return value as the `result` of a tools/call response.
+
+    Args:
+        result (Any): Value returned by the tool (usually a dict; strings are sent as plain text).
+
+    Returns:
+        bytes: JSON of {"content": [...], "structuredContent": {...}, "isError": bool}.
+    """
+    if isinstance(result, str):
+        return b'{"content":[{"type":"text","text":' + dumps_bytes(result) + b'}],"isError":false}'
+
+    structured = result if isinstance(result, dict) else {"result": result}
+    max_bytes = settings.TOOL_RESULT_MAX_BYTES
+    if max_bytes > 0:
+        structured, encoded = fit_result(structured, max_bytes)
+    else:
+        encoded = dumps_bytes(structured)
+
+    if max_bytes > 0 and len(encoded) > max_bytes:
+        # Nothing left to trim (e.g. one very large message): send the beginning as text only
+        text = encoded[:max_bytes].decode("utf-8", errors="ignore")
+        structured = {
+            "status": structured.get("status"),
+            "truncated": {
+                "bytes": len(encoded),
+                "hint": f"Result of {len(encoded)} bytes exceeds the result size limit; the text content holds its first {max_bytes} bytes",
+            },
+        }
+        encoded = dumps_bytes(structured)
+        text_json = dumps_bytes(text)
+    else:
+        # The text rendering is the same compact JSON, escaped as a string
+        text_json = dumps_bytes(encoded.decode())
+
+    is_error = b"true" if structured.get("status") == "error" else b"false"
+    return (
+        b'{"content":[{"type":"text","text":' + text_json + b'}],"structuredContent":' + encoded
+        + b',"isError":' + is_error + b'}'
+    )
@@ -0,0 +1,176 @@
+"""
+Mailbox Account Pool for Outlook MCP Server
+
+A single server process can serve many mailboxes. Each mailbox is identified by
+an account key (usually its address; DEFAULT_ACCOUNT when none is given) and is
+backed by a live AccountContext that bundles everything account-specific:
+
+- MsalAccount: MSAL application and token cache file
+- TokenManager: in-memory access token with background refresh
+- DeviceLogin: pollable device code login state
+- state: a dict where other services keep per-account caches
+
+Contexts are created on first use and kept in a bounded LRU pool
+(MAX_LIVE_ACCOUNTS). Only accounts that can have a token get one: the default
+account, accounts with a token file and accounts with a login in progress.
+Any other account key is rejected until login_tool signs it in, so arbitrary
+strings never start token polling tasks. When the pool is full the least recently used context is
+evicted: its background refresh stops and its in-memory state is dropped. The
+token cache file stays on disk, so an evicted account comes back without a new
+login. The pooled Graph HTTP client is shared by all accounts.
+
+Dependencies:
+- services.auth.graph_auth: Per-account MSAL state
+- services.auth.token_manager: Per-account in-memory tokens
+- services.auth.device_login: Per-account device code login
+- config.settings: DEFAULT_ACCOUNT and MAX_LIVE_ACCOUNTS
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from config import settings
+from services.auth.graph_auth import MsalAccount, token_cache_path
+from services.auth.token_manager import TokenManager
+from services.auth.device_login import DeviceLogin
+
+
+class AccountContext:
+    """Live, in-memory state of one mailbox account."""
+
+    def __init__(self, account: str):
+        self.account = account
+        self.msal_account = MsalAccount(account)
+        self.token_manager = TokenManager(self.msal_account)
+        self.device_login = DeviceLogin(self.msal_account, self.token_manager)
+        # Per-account caches owned by other services (keyed by service name)
+        self.state: dict = {}
+        self.last_used = time.time()
+
+    async def start(self) -> None:
+        await self.token_manager.start()
+
+    async def close(self) -> None:
+        await self.device_login.cancel()
+        await self.token_manager.stop()
+
+
+class AccountPool:
+    """Bounded LRU pool of live account contexts."""
+
+    def __init__(self, max_size: int = settings.MAX_LIVE_ACCOUNTS):
+        self.max_size = max_size
+        self._contexts: "OrderedDict[str, AccountContext]" = OrderedDict()
+        # Close tasks of evicted contexts, referenced until they finish
+        self._closing: set[asyncio.Task] = set()
+        self.evictions = 0
+
+    @staticmethod
+    def resolve(account: str | None) -> str:
+        """Normalize an account key (None/empty means DEFAULT_ACCOUNT)."""
+        account = (account or "").strip()
+        return account.lower() if account else settings.DEFAULT_ACCOUNT
+
+    def is_known(self, account: str | None) -> bool:
+        """
+        Check whether an account can have a token: it is live, the default account,
+        has a token file, or has a login in progress (in any worker).
+        """
+        key = self.resolve(account)
+        if key in self._contexts or key == settings.DEFAULT_ACCOUNT:
+            return True
+        token_file = token_cache_path(key)
+        return os.path.exists(token_file) or os.path.exists(f"{token_file}.login")
+
+    def get(self, account: str | None = None, create: bool = False) -> AccountContext:
+        """
+        Return the live context for an account, creating it if needed.
+
+        Creating a context is cheap (no I/O); its token is loaded lazily on the
+        first request and then refreshed in the background.
+
+        Args:
+            account (str | None): Account key (default account if None).
+            create (bool): Create the context even for an unknown account (to sign it in).
+
+        Returns:
+            AccountContext: The account's context, marked as most recently used.
+
+        Raises:
+            RuntimeError: If the account is unknown (see is_known()) and create is False.
+        """
+        key = self.resolve(account)
+        context = self._contexts.get(key)
+        if context is None:
+            if not create and not self.is_known(key):
+                raise RuntimeError(f"Account '{key}' is not signed in. Sign it in with login_tool(account=...) first")
+            context = AccountContext(key)
+            self._contexts[key] = context
+            context.token_manager.start_background_refresh()
+            self._evict_if_needed()
+        else:
+            self._contexts.move_to_end(key)
+        context.last_used = time.time()
+        return context
+
+    def _evict_if_needed(self) -> None:
+        while len(self._contexts) > self.max_size:
+            # Never evict an account whose user is in the middle of signing in
+            candidates = [k for k, c in self._contexts.items() if c.device_login.state != "pending"]
+            if not candidates:
+                return
+            context = self._contexts.pop(candidates[0])
+            self.evictions += 1
+            task = asyncio.create_task(context.close())
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    def accounts(self) -> list[str]:
+        """Account keys currently held in memory, least recently used first."""
+        return list(self._contexts)
+
+    async def start(self) -> None:
+        """Create the default account context and load its token."""
+        await self.get(settings.DEFAULT_ACCOUNT).start()
+
+    async def close(self) -> None:
+        """Stop all live contexts (used on shutdown)."""
+        contexts = list(self._contexts.values())
+        self._contexts.clear()
+        await asyncio.gather(
+            *(context.close() for context in contexts), *self._closing, return_exceptions=True
+        )
+
+    def metrics(self) -> dict:
+        return {"live_accounts": len(self._contexts), "max_accounts": self.max_size, "evictions": self.evictions}
+
+
+# Process-wide account pool used by all services
+account_pool = AccountPool()
+
+
+async def get_graph_auth_headers(account: str | None = None) -> dict:
+    """
+    Generate HTTP headers required for authenticated Microsoft Graph API requests.
+
+    The token is served from memory; it is only refreshed (once, for all
+    concurrent callers) when it is missing or close to expiry.
+
+    Args:
+        account (str | None): Mailbox account key (default account if None).
+
+    Returns:
+        dict: A dictionary containing the required HTTP headers:
+              - Authorization: Bearer token for API authentication
+              - Content-Type: JSON content type for request body
+
+    Raises:
+        RuntimeError: If unable to acquire a valid access token.
+    """
+    token = await account_pool.get(account).token_manager.get_token()
+
+    return {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json"
+    }
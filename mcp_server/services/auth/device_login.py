@@ -0,0 +1,157 @@
+"""
+Non-Blocking Device Code Login for Outlook MCP Server
+
+MSAL's device code flow polls Microsoft's token endpoint until the user finishes
+signing in, which can take up to 15 minutes. This module runs that polling in a
+worker thread and exposes the login as a pollable state machine, so the event
+loop (and every other SSE session and HTTP route) keeps serving requests while a
+user logs in.
+
+States:
+- idle: No login has been started
+- pending: Device code issued, waiting for the user to sign in
+- complete: Sign-in finished, token is available
+- failed: Sign-in failed, was declined or timed out
+
+Every state change is also written next to the account's token file
+("<token file>.login"), so with several uvicorn workers a status query that
+lands on another worker than the one polling still sees the login, and a
+second login_tool call returns the pending code instead of starting a new flow.
+
+Dependencies:
+- services.auth.graph_auth: MSAL device flow primitives (per account)
+- services.auth.token_store: Atomic writes of the shared login state file
+- services.auth.token_manager: Receives the new token on completion
+- services.auth.account_pool: Owns one DeviceLogin per account context
+"""
+
+import asyncio
+import json
+import time
+from services.auth.graph_auth import MsalAccount
+from services.auth.token_manager import TokenManager
+from services.auth.token_store import TokenFileStore
+
+
+class DeviceLogin:
+    """Tracks a device code login for one account, running in a background worker thread."""
+
+    def __init__(self, msal_account: MsalAccount, token_manager: TokenManager):
+        self.msal_account = msal_account
+        self.token_manager = token_manager
+        self.state = "idle"
+        self.error: str | None = None
+        self.completed_at: float | None = None
+        self._flow: dict | None = None
+        self._task: asyncio.Task | None = None
+        # Concurrent start() calls would otherwise each request a device code
+        self._start_lock = asyncio.Lock()
+        self.shared = TokenFileStore(f"{msal_account.cache_file}.login")
+
+    def _local_status(self) -> dict:
+        status = {"account": self.msal_account.account, "state": self.state}
+        if self.state == "pending" and self._flow:
+            status.update({
+                "message": self._flow.get("message", ""),
+                "user_code": self._flow.get("user_code", ""),
+                "verification_uri": self._flow.get("verification_uri", ""),
+                "expires_at": self._flow.get("expires_at", 0),
+            })
+        if self.state == "failed":
+            status["error"] = self.error
+        if self.state == "complete":
+            status["completed_at"] = self.completed_at
+        return status
+
+    def _publish(self) -> None:
+        try:
+            self.shared.write(json.dumps(self._local_status()))
+        except (OSError, TypeError) as e:
+            print(f"Warning: Could not share login state of '{self.msal_account.account}': {e}")
+
+    def _shared_status(self) -> dict | None:
+        """The last login state written by any worker, or None if there is none."""
+        try:
+            data = self.shared.read()
+            status = json.loads(data) if data else None
+        except (OSError, ValueError):
+            return None
+        if not isinstance(status, dict) or "state" not in status:
+            return None
+        if status["state"] == "pending" and status.get("expires_at", 0) <= time.time():
+            # The worker polling it exited (or the code ran out) without recording an outcome
+            status = {"account": status.get("account"), "state": "failed", "error": "Device code expired"}
+        return status
+
+    def status(self) -> dict:
+        """
+        Return the current login state (as last recorded by any worker).
+
+        Returns:
+            dict: State information:
+                - account: The account key
+                - state: "idle", "pending", "complete" or "failed"
+                - message / user_code / verification_uri / expires_in: while pending
+                - error: when failed
+        """
+        status = self._shared_status() or self._local_status()
+        expires_at = status.pop("expires_at", None)
+        if status["state"] == "pending" and expires_at is not None:
+            status["expires_in"] = max(int(expires_at - time.time()), 0)
+        return status
+
+    async def start(self) -> dict:
+        """
+        Start a device code login, or return the one already in progress.
+
+        Only the (short) device code request runs before returning; polling for
+        completion happens in a worker thread.
+
+        Returns:
+            dict: The login status including the user code and verification URL.
+
+        Raises:
+            ValueError: If the device flow cannot be initiated.
+        """
+        async with self._start_lock:
+            if self.state == "pending":
+                return self.status()
+            shared = self.status()
+            if shared["state"] == "pending":
+                # Started by another worker, which is polling for it
+                return shared
+
+            flow = await asyncio.to_thread(self.msal_account.initiate_device_flow)
+            print(flow["message"])
+
+            self._flow = flow
+            self.state = "pending"
+            self.error = None
+            self._publish()
+            self._task = asyncio.create_task(self._wait_for_completion(flow))
+            return self.status()
+
+    async def _wait_for_completion(self, flow: dict) -> None:
+        try:
+            result = await asyncio.to_thread(self.msal_account.complete_device_flow, flow)
+            self.token_manager.set_token_result(result)
+            self.state = "complete"
+            self.completed_at = time.time()
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+        finally:
+            self._flow = None
+            self._publish()
+
+    async def cancel(self) -> None:
+        """Abort a pending login (used on shutdown and account eviction)."""
+        if self._flow is not None:
+            # MSAL stops polling once the flow has expired
+            self._flow["expires_at"] = 0
+        if self._task is not None:
+            try:
+                await self._task
+            except Exception:
+                pass
+            self._task = None
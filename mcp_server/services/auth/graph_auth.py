@@ -2,13 +2,16 @@
 Microsoft Graph Authentication Module for Outlook MCP Server
 
 This module handles authentication with Microsoft Graph API using the OAuth 2.0 Device Code Flow.
-It provides token management, caching, and authentication headers for accessing Outlook services.
+It provides MSAL token acquisition and cache persistence; the in-memory token used on the
+request path is managed by services.auth.token_manager.
 
 Key Features:
 - Device Code Flow authentication for secure user consent
-- Token caching to avoid repeated authentication
+- MSAL token cache persistence (access + refresh tokens) to avoid repeated authentication
+- Silent token renewal via the cached refresh token
+- One token cache per mailbox account (see services.auth.account_pool)
+- Cross-process safe token files (atomic writes, file locks, change detection)
 - Automatic token validation on startup
-- Graph API headers generation for authenticated requests
 
 Dependencies:
 - msal: Microsoft Authentication Library for Python
@@ -16,80 +19,254 @@ Dependencies:
 """
 
 import os
+import re
 import sys
 import json
+import threading
 import msal
 from config import settings
+from services.auth.token_store import TokenFileStore
 
-# Path to store the cached access token
-TOKEN_CACHE_FILE = "./services/auth/.token.json"
+# Token files live next to this module (or in TOKEN_STORE_DIR), never relative to the CWD,
+# so every worker process and the logout tool agree on the same absolute paths
+TOKEN_STORE_DIR = os.path.abspath(settings.TOKEN_STORE_DIR or os.path.dirname(__file__))
 
-# Initialize Microsoft Authentication Library (MSAL) Public Client Application
-# This handles the OAuth 2.0 Device Code Flow for user authentication
-app = msal.PublicClientApplication(
-    client_id=settings.OUTLOOK_CLIENT_ID,  # Azure AD Application (client) ID
-    authority=f"https://login.microsoftonline.com/{settings.OUTLOOK_TENANT_ID}"  # Azure AD tenant authority
-)
+# Path to store the serialized MSAL token cache (access + refresh tokens) of the default account
+TOKEN_CACHE_FILE = os.path.join(TOKEN_STORE_DIR, ".token.json")
 
+# Directory holding the token caches of additional accounts (one file per account)
+TOKEN_CACHE_DIR = os.path.join(TOKEN_STORE_DIR, ".tokens")
 
-def load_cached_token() -> str | None:
+
+def token_cache_path(account: str) -> str:
     """
-    Load a previously cached access token from the local file system.
-    
-    This function checks if a token cache file exists and attempts to load
-    the access token from it. This avoids requiring users to re-authenticate
-    on every application startup.
-    
+    Return the token cache file used for an account.
+
+    The default account keeps using TOKEN_CACHE_FILE; every other account gets
+    its own file under TOKEN_CACHE_DIR named after a filesystem-safe version of
+    the account key.
+
+    Args:
+        account (str): Account key (usually the mailbox address).
+
     Returns:
-        str | None: The cached access token if available and valid, None otherwise.
-        
-    Note:
-        The function only checks for the existence of the token, not its validity.
-        Token validation happens during API calls.
+        str: Path of the account's token cache file.
+    """
+    if account == settings.DEFAULT_ACCOUNT:
+        return TOKEN_CACHE_FILE
+    safe_name = re.sub(r"[^A-Za-z0-9@._-]", "_", account)
+    return os.path.join(TOKEN_CACHE_DIR, f"{safe_name}.json")
+
+
+class MsalAccount:
     """
-    if os.path.exists(TOKEN_CACHE_FILE):
+    MSAL client application and token cache for one mailbox account.
+
+    Each account has its own SerializableTokenCache backed by its own file, so
+    tokens of different mailboxes never mix. The file is shared by all worker
+    processes through TokenFileStore: writes are atomic and refreshes happen
+    under an inter-process lock, after picking up any newer cache another
+    worker has written. The MSAL application is created
+    lazily because its construction performs authority discovery over the
+    network; all methods are blocking and should run in a worker thread when
+    called from async code.
+    """
+
+    def __init__(self, account: str = settings.DEFAULT_ACCOUNT):
+        self.account = account
+        self.cache_file = token_cache_path(account)
+        self.store = TokenFileStore(self.cache_file)
+        # MSAL token cache - holds refresh tokens so access tokens can be renewed silently
+        self.token_cache = msal.SerializableTokenCache()
+        self._app: msal.PublicClientApplication | None = None
+        self._app_lock = threading.Lock()
+
+    @property
+    def app(self) -> msal.PublicClientApplication:
+        """The account's MSAL Public Client Application (created and cache-loaded on first use)."""
+        with self._app_lock:
+            if self._app is None:
+                self.load_token_cache()
+                # Initialize Microsoft Authentication Library (MSAL) Public Client Application
+                # This handles the OAuth 2.0 Device Code Flow for user authentication
+                self._app = msal.PublicClientApplication(
+                    client_id=settings.OUTLOOK_CLIENT_ID,  # Azure AD Application (client) ID
+                    authority=f"https://login.microsoftonline.com/{settings.OUTLOOK_TENANT_ID}",  # Azure AD tenant authority
+                    token_cache=self.token_cache
+                )
+            return self._app
+
+    def load_token_cache(self) -> None:
+        """
+        Load the serialized MSAL token cache from the local file system.
+        
+        This restores previously acquired access and refresh tokens so that
+        users don't need to re-authenticate on every application startup. A
+        missing file clears the in-memory cache (e.g. after a logout in
+        another worker).
+        
+        Note:
+            Cache files written by older versions only contain a bare access token
+            without expiry information. Those are ignored, which triggers one
+            fresh login.
+        """
         try:
-            with open(TOKEN_CACHE_FILE, "r") as f:
-                data = json.load(f)
-                if "access_token" in data:
-                    return data["access_token"]
+            data = self.store.read()
+            if data and "access_token" in json.loads(data):
+                print("Warning: Ignoring legacy token file without refresh information")
+                return
+            self.token_cache.deserialize(data)
+            self.token_cache.has_state_changed = False
         except (json.JSONDecodeError, IOError) as e:
-            print(f"Warning: Failed to load cached token: {e}")
-    return None
+            print(f"Warning: Failed to load cached token for '{self.account}': {e}")
 
+    def reload_if_changed(self) -> bool:
+        """
+        Reload the cache if another process changed the file since we last read or wrote it.
+        
+        Returns:
+            bool: True if the cache was reloaded.
+        """
+        if not self.store.has_changed():
+            return False
+        self.load_token_cache()
+        return True
 
-def save_token(token_result: dict) -> None:
-    """
-    Save the access token to a local cache file for future use.
-    
-    This function stores the access token in a JSON file to enable
-    token reuse across application sessions, reducing the need for
-    repeated user authentication.
-    
-    Args:
-        token_result (dict): The token response from MSAL containing the access token.
-                           Expected to have an 'access_token' key.
-                           
-    Raises:
-        IOError: If unable to create the directory or write the token file.
+    def save_token(self, token_result: dict | None = None) -> None:
+        """
+        Save the MSAL token cache to the account's cache file.
         
-    Security Note:
-        The token file should be protected with appropriate file permissions
-        in production environments.
-    """
-    try:
-        # Ensure the directory exists before writing the token file
-        os.makedirs(os.path.dirname(TOKEN_CACHE_FILE), exist_ok=True)
+        MSAL records every token response in its cache, so this persists the
+        whole cache (including the refresh token) rather than a single access
+        token. This is what allows the token manager to renew access tokens
+        silently before they expire. The file is replaced atomically.
+        
+        Args:
+            token_result (dict | None): The token response that triggered the save.
+                                        Kept for backwards compatibility; the cache
+                                        already contains it.
+                               
+        Raises:
+            IOError: If unable to create the directory or write the token file.
+            
+        Security Note:
+            The token file contains a refresh token; on POSIX systems it is
+            created with 0600 permissions.
+        """
+        if not self.token_cache.has_state_changed:
+            return
+        try:
+            self.store.write(self.token_cache.serialize())
+            self.token_cache.has_state_changed = False
+        except IOError as e:
+            print(f"Error: Failed to save token: {e}")
+            raise
+
+    def clear_token_cache(self) -> bool:
+        """
+        Remove all signed-in identities from the account's MSAL cache and delete its file.
         
-        with open(TOKEN_CACHE_FILE, "w") as f:
-            # Only store the access token, not refresh tokens or other sensitive data
-            json.dump({"access_token": token_result["access_token"]}, f)
-    except (IOError, KeyError) as e:
-        print(f"Error: Failed to save token: {e}")
-        raise
+        Returns:
+            bool: True if there was anything to clear, False otherwise.
+        """
+        with self.store.lock():
+            identities = self.app.get_accounts()
+            for identity in identities:
+                self.app.remove_account(identity)
 
+            removed_file = self.store.remove()
+            self.token_cache.has_state_changed = False
+        return bool(identities) or removed_file
 
-def authenticate_and_get_token() -> str:
+    def acquire_token_silently(self, force_refresh: bool = False) -> dict | None:
+        """
+        Acquire an access token from the MSAL cache without user interaction.
+        
+        MSAL returns the cached access token while it is valid and otherwise
+        redeems the cached refresh token for a new one. Any change to the cache
+        is persisted.
+        
+        Args:
+            force_refresh (bool): If True, skip the cached access token and always
+                                  redeem the refresh token (used for proactive refresh).
+        
+        Returns:
+            dict | None: The MSAL token result (with 'access_token' and 'expires_in')
+                         or None if no signed-in identity is available.
+            
+        Note:
+            This is a blocking call (it may perform network I/O) and should be run
+            in a worker thread from async code. It holds the account's file lock,
+            so only one worker process redeems the refresh token at a time; the
+            others pick up its result from the file instead of refreshing again.
+        """
+        app = self.app
+        with self.store.lock():
+            if self.reload_if_changed():
+                # Another worker refreshed in the meantime - its token is good enough
+                force_refresh = False
+
+            identities = app.get_accounts()
+            if not identities:
+                return None
+
+            result = app.acquire_token_silent(
+                settings.OUTLOOK_SCOPES,
+                account=identities[0],
+                force_refresh=force_refresh
+            )
+            self.save_token(result)
+            return result
+
+    def initiate_device_flow(self) -> dict:
+        """
+        Start an OAuth 2.0 Device Code Flow and return the flow descriptor.
+        
+        Returns:
+            dict: The MSAL flow containing 'user_code', 'verification_uri',
+                  'message' and 'expires_at'.
+            
+        Raises:
+            ValueError: If the device flow cannot be initiated.
+        """
+        # Initiate the device code flow with the required Microsoft Graph scopes
+        flow = self.app.initiate_device_flow(scopes=settings.OUTLOOK_SCOPES)
+        
+        if "user_code" not in flow:
+            raise ValueError("Failed to start device flow - check client configuration")
+        return flow
+
+    def complete_device_flow(self, flow: dict) -> dict:
+        """
+        Poll until the user completes (or abandons) a device code login.
+        
+        This is a blocking call that can take up to the flow's lifetime
+        (typically 15 minutes); async callers must run it in a worker thread.
+        Setting flow["expires_at"] to 0 from another thread aborts the polling.
+        
+        Args:
+            flow (dict): The flow returned by initiate_device_flow().
+            
+        Returns:
+            dict: The MSAL token result containing 'access_token' and 'expires_in'.
+            
+        Raises:
+            RuntimeError: If authentication fails or times out.
+        """
+        result = self.app.acquire_token_by_device_flow(flow)
+
+        if "access_token" in result:
+            # Authentication successful - persist the MSAL cache for future use
+            with self.store.lock():
+                self.save_token(result)
+            return result
+        else:
+            # Authentication failed - provide detailed error information
+            error_desc = result.get('error_description', 'Unknown authentication error')
+            raise RuntimeError(f"Authentication failed: {error_desc}")
+
+
+def authenticate_and_get_token(msal_account: MsalAccount) -> str:
     """
     Perform OAuth 2.0 Device Code Flow authentication with Microsoft Graph.
     
@@ -104,6 +281,9 @@ def authenticate_and_get_token() -> str:
     3. Poll for authentication completion
     4. Save and return the access token
     
+    Args:
+        msal_account (MsalAccount): The account to sign in.
+    
     Returns:
         str: A valid access token for Microsoft Graph API calls.
         
@@ -116,30 +296,18 @@ def authenticate_and_get_token() -> str:
         "To sign in, use a web browser to open the page https://microsoft.com/devicelogin
          and enter the code ABC123DEF to authenticate."
     """
-    # Initiate the device code flow with the required Microsoft Graph scopes
-    flow = app.initiate_device_flow(scopes=settings.OUTLOOK_SCOPES)
-    
-    if "user_code" not in flow:
-        raise ValueError("Failed to start device flow - check client configuration")
+    flow = msal_account.initiate_device_flow()
 
     # Display authentication instructions to the user
     print(flow["message"])
     
     # Poll Microsoft's servers until the user completes authentication
     # This is a blocking call that waits for user action
-    result = app.acquire_token_by_device_flow(flow)
+    result = msal_account.complete_device_flow(flow)
+    return result["access_token"]
 
-    if "access_token" in result:
-        # Authentication successful - save token for future use
-        save_token(result)
-        return result["access_token"]
-    else:
-        # Authentication failed - provide detailed error information
-        error_desc = result.get('error_description', 'Unknown authentication error')
-        raise RuntimeError(f"Authentication failed: {error_desc}")
 
-
-def get_token() -> str:
+def get_token(account: str = settings.DEFAULT_ACCOUNT) -> str:
     """
     Get a valid access token, using cached token if available or authenticating if needed.
     
@@ -147,6 +315,9 @@ def get_token() -> str:
     caching strategy that first attempts to use a cached token, falling back
     to full authentication only when necessary.
     
+    Args:
+        account (str): Account key whose token cache should be used.
+    
     Returns:
         str: A valid access token for Microsoft Graph API calls.
         
@@ -155,46 +326,18 @@ def get_token() -> str:
         ValueError: If device flow cannot be initiated.
         
     Note:
-        This function does not validate token expiry. If the cached token
-        has expired, the first API call will fail with a 401 error, and
-        the calling code should handle re-authentication.
+        This is a blocking call intended for startup. Request handling should
+        use the async token manager (services.auth.token_manager) instead,
+        which keeps the token in memory and refreshes it before expiry.
     """
-    # First, try to use a cached token to avoid unnecessary authentication
-    cached = load_cached_token()
-    if cached:
-        return cached
+    # First, try the MSAL cache (refreshing silently if the token has expired)
+    msal_account = MsalAccount(account)
+    cached = msal_account.acquire_token_silently()
+    if cached and "access_token" in cached:
+        return cached["access_token"]
     
     # No cached token available - perform full authentication
-    return authenticate_and_get_token()
-
-
-def get_graph_auth_headers() -> dict:
-    """
-    Generate HTTP headers required for authenticated Microsoft Graph API requests.
-    
-    This function provides the standard headers needed for all Graph API calls,
-    including the Bearer token for authentication and appropriate content type.
-    
-    Returns:
-        dict: A dictionary containing the required HTTP headers:
-              - Authorization: Bearer token for API authentication
-              - Content-Type: JSON content type for request body
-              
-    Raises:
-        RuntimeError: If unable to acquire a valid access token.
-        
-    Example:
-        headers = get_graph_auth_headers()
-        response = requests.get("https://graph.microsoft.com/v1.0/me", headers=headers)
-    """
-    token = get_token()
-    if not token:
-        raise RuntimeError("Unable to acquire access token for Graph API requests")
-
-    return {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
+    return authenticate_and_get_token(msal_account)
 
 
 def validate_graph_auth_on_startup() -> None:
@@ -0,0 +1,177 @@
+"""
+In-Memory Token Manager for Outlook MCP Server
+
+This module keeps a mailbox account's Microsoft Graph access token in memory
+together with its expiry time, so the request path never touches the token
+file. Tokens are renewed silently through MSAL (services.auth.graph_auth)
+shortly before they expire, by a background task. One TokenManager lives in
+each account context of the account pool (services.auth.account_pool).
+
+Key Features:
+- No file I/O on the hot path - the token is served from memory
+- Expiry-aware: tokens are refreshed TOKEN_REFRESH_MARGIN seconds before expiry
+- Single-flight refresh: concurrent callers share one refresh
+- Proactive background refresh task
+- Picks up tokens refreshed, issued or removed by other worker processes
+
+Dependencies:
+- services.auth.graph_auth: MSAL silent token acquisition
+- config.settings: Refresh margin and retry interval
+"""
+
+import asyncio
+import time
+from config import settings
+from services.auth.graph_auth import MsalAccount
+
+# Process-wide counters (summed over all accounts), exposed via /metrics
+token_metrics = {"refreshes": 0}
+
+
+class TokenManager:
+    """
+    Holds the current access token and its expiry, refreshing it on demand
+    or proactively in the background.
+    """
+
+    def __init__(self, msal_account: MsalAccount, refresh_margin: int = settings.TOKEN_REFRESH_MARGIN):
+        self.msal_account = msal_account
+        self.refresh_margin = refresh_margin
+        self._access_token: str | None = None
+        self._expires_on: float = 0.0
+        self._lock = asyncio.Lock()
+        self._background_task: asyncio.Task | None = None
+
+    @property
+    def expires_on(self) -> float:
+        """Unix timestamp at which the current access token expires (0 if none)."""
+        return self._expires_on
+
+    def _is_fresh(self) -> bool:
+        return self._access_token is not None and time.time() < self._expires_on - self.refresh_margin
+
+    def set_token_result(self, result: dict) -> str:
+        """
+        Store an MSAL token result in memory.
+
+        Args:
+            result (dict): MSAL token response containing 'access_token' and 'expires_in'.
+
+        Returns:
+            str: The stored access token.
+        """
+        self._access_token = result["access_token"]
+        self._expires_on = time.time() + int(result.get("expires_in", 0))
+        return self._access_token
+
+    def invalidate(self) -> None:
+        """Forget the in-memory token (e.g. after logout or a new login)."""
+        self._access_token = None
+        self._expires_on = 0.0
+
+    async def get_token(self) -> str:
+        """
+        Return a valid access token, refreshing it first if it is missing or about to expire.
+
+        Returns:
+            str: A valid access token.
+
+        Raises:
+            RuntimeError: If no token can be acquired silently (login required).
+        """
+        if self._is_fresh():
+            return self._access_token
+        return await self.refresh()
+
+    async def refresh(self, force: bool = False, stale_token: str | None = None) -> str:
+        """
+        Refresh the access token through MSAL.
+
+        Only one refresh runs at a time; callers that arrive while a refresh is in
+        progress wait for it and reuse its result instead of starting another.
+
+        Args:
+            force (bool): If True, bypass MSAL's cached access token and redeem the refresh token.
+            stale_token (str | None): The token the caller saw rejected. If the current
+                                      token is already different, it is returned as-is.
+
+        Returns:
+            str: The refreshed access token.
+
+        Raises:
+            RuntimeError: If no token can be acquired silently (login required).
+        """
+        previous = self._access_token if stale_token is None else stale_token
+        async with self._lock:
+            # Another caller refreshed while we were waiting for the lock
+            if self._access_token != previous and self._is_fresh():
+                return self._access_token
+            if not force and self._is_fresh():
+                return self._access_token
+
+            token_metrics["refreshes"] += 1
+            result = await asyncio.to_thread(self.msal_account.acquire_token_silently, force)
+            if not result or "access_token" not in result:
+                self.invalidate()
+                error_desc = (result or {}).get("error_description", "no signed-in account")
+                raise RuntimeError(
+                    f"Unable to acquire access token for '{self.msal_account.account}' ({error_desc}). "
+                    "Use login_tool to sign in."
+                )
+            return self.set_token_result(result)
+
+    async def _sync_from_store(self) -> None:
+        """Adopt a token written (or removed) by another worker process."""
+        result = await asyncio.to_thread(self.msal_account.acquire_token_silently, False)
+        if result and "access_token" in result:
+            self.set_token_result(result)
+        else:
+            self.invalidate()
+
+    async def _refresh_loop(self) -> None:
+        """
+        Refresh the token shortly before it expires, for as long as the account is live.
+
+        Every TOKEN_STORE_POLL_INTERVAL seconds the loop also checks (with a single
+        stat call) whether another worker changed the token file, so logins,
+        refreshes and logouts propagate without re-reading the file per request.
+        """
+        poll_interval = settings.TOKEN_STORE_POLL_INTERVAL
+        while True:
+            if self._access_token is None:
+                delay = poll_interval
+            else:
+                delay = min(max(self._expires_on - self.refresh_margin - time.time(), 0), poll_interval)
+            await asyncio.sleep(delay)
+
+            try:
+                if self.msal_account.store.has_changed():
+                    await self._sync_from_store()
+                if self._access_token is not None and not self._is_fresh():
+                    await self.refresh(force=True)
+            except Exception as e:
+                print(f"Warning: Background token refresh failed for '{self.msal_account.account}': {e}")
+                await asyncio.sleep(settings.TOKEN_REFRESH_RETRY_INTERVAL)
+
+    def start_background_refresh(self) -> None:
+        """Start the background refresh task (requires a running event loop)."""
+        if self._background_task is None or self._background_task.done():
+            self._background_task = asyncio.create_task(self._refresh_loop())
+
+    async def start(self) -> None:
+        """Load the initial token (best effort) and start the background refresh task."""
+        try:
+            await self.refresh()
+        except Exception as e:
+            print(f"Warning: No access token available yet for '{self.msal_account.account}': {e}")
+        self.start_background_refresh()
+
+    async def stop(self) -> None:
+        """Stop the background refresh task."""
+        if self._background_task is not None:
+            self._background_task.cancel()
+            try:
+                await self._background_task
+            except asyncio.CancelledError:
+                pass
+            self._background_task = None
@@ -0,0 +1,170 @@
+"""
+Cross-Process Token File Store for Outlook MCP Server
+
+When the server runs with several uvicorn workers, every worker reads and writes
+the same MSAL token cache files. This module makes that safe:
+
+- Atomic writes: data goes to a temporary file in the same directory and is
+  moved into place with os.replace(), so readers never see a partial file
+- File locking: a sidecar "<file>.lock" is locked exclusively (fcntl on POSIX,
+  msvcrt on Windows) around read-modify-write sequences such as a token refresh
+- Change detection: the file's (mtime, size) signature is remembered on every
+  read/write, so a worker can tell with a single stat() whether another worker
+  has refreshed or removed the token since it last looked
+- try_lock_file(): a non-blocking lock held for as long as the returned file
+  stays open, for work only one worker may do (e.g. the background sync)
+
+Dependencies:
+- Standard library only (fcntl / msvcrt are picked per platform)
+"""
+
+import os
+import time
+import tempfile
+from contextlib import contextmanager
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+class TokenFileStore:
+    """Atomic, lock-protected access to one token cache file."""
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self.lock_path = f"{self.path}.lock"
+        self._signature: tuple | None = None
+
+    def _current_signature(self) -> tuple | None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def has_changed(self) -> bool:
+        """
+        Check (with one stat call) whether the file changed since this store last read or wrote it.
+
+        Returns:
+            bool: True if another process wrote or removed the file in the meantime.
+        """
+        return self._current_signature() != self._signature
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    @contextmanager
+    def lock(self):
+        """
+        Hold an exclusive inter-process lock on the file for the duration of the block.
+
+        The lock is taken on a sidecar file so the data file itself can be
+        replaced atomically while the lock is held.
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.lock_path, "a+") as lock_file:
+            if os.name == "nt":
+                lock_file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(0.05)
+                try:
+                    yield
+                finally:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def read(self) -> str | None:
+        """
+        Read the file contents and remember its signature.
+
+        Returns:
+            str | None: The file contents, or None if the file does not exist.
+        """
+        signature = self._current_signature()
+        try:
+            with open(self.path, "r") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self._signature = None
+            return None
+        self._signature = signature
+        return data
+
+    def write(self, data: str) -> None:
+        """
+        Atomically replace the file contents.
+
+        Raises:
+            IOError: If the temporary file cannot be written or moved into place.
+        """
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            if os.name != "nt":
+                os.chmod(tmp_path, 0o600)  # The cache contains a refresh token
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._signature = self._current_signature()
+
+    def remove(self) -> bool:
+        """
+        Delete the file.
+
+        Returns:
+            bool: True if a file was removed.
+        """
+        try:
+            os.remove(self.path)
+            removed = True
+        except FileNotFoundError:
+            removed = False
+        self._signature = None
+        return removed
+
+
+def try_lock_file(path: str):
+    """
+    Take an exclusive inter-process lock on a file without waiting.
+
+    The lock is held until the returned file object is closed (or the process exits).
+
+    Args:
+        path (str): Lock file path (created if missing).
+
+    Returns:
+        The open, locked file, or None if another process holds the lock.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    lock_file = open(path, "a+")
+    try:
+        if os.name == "nt":
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
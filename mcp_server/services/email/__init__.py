@@ -6,12 +6,14 @@ This package provides tools for sending and fetching emails using the Outlook AP
 - fetch_outlook_emails: Fetches emails (read, unread, by sender).
 - reply_to_outlook_email: Replies emails (by id).
 - delete_outlook_email: Deletes emails (by id).
+- get_send_job_status: Progress of a paced send running in the background.
 """
 
 from .send_email import send_outlook_email
 from .fetch_emails import fetch_outlook_emails
 from .reply_email import reply_to_outlook_email
 from .delete_email import delete_outlook_email
+from .send_jobs import get_send_job_status
 
-__all__ = ["send_outlook_email", "fetch_outlook_emails", "reply_to_outlook_email", "delete_outlook_email"]
+__all__ = ["send_outlook_email", "fetch_outlook_emails", "reply_to_outlook_email", "delete_outlook_email", "get_send_job_status"]
 
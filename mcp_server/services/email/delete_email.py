@@ -1,30 +1,44 @@
+import asyncio
 import httpx
-from config.settings import GRAPH_API_URL
-from services.auth.graph_auth import get_graph_auth_headers
+from services.graph.graph_client import graph_request
+from services.auth.account_pool import account_pool
+from services.email import fetch_cache, message_cache
+from services.sync.mail_store import get_mail_store
+from services.sync.id_migration import ensure_store_ids
 
 async def delete_outlook_email(
-    email_id: str
+    email_id: str,
+    account: str | None = None
 ) -> dict:
     """
     Delete an email using Microsoft Graph API.
     
     Args:
         email_id: The ID of the email to delete
+        account: Mailbox account that owns the email (default account if None)
                 
     Returns:
         A dictionary with status and message
     """
 
-    headers = get_graph_auth_headers()
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.delete(
-                f"{GRAPH_API_URL}/me/messages/{email_id}",                
-                headers=headers
-            )
-            response.raise_for_status()
-            return {"status": "success", "message": "Deleting email was successfull."}
+        response = await graph_request(
+            "DELETE",
+            f"/me/messages/{email_id}",
+            account=account
+        )
+        response.raise_for_status()
+        # The message moved to Deleted Items - cached listings showing it are stale
+        fetch_cache.invalidate(account, folders=["deleteditems"], email_ids=[email_id])
+        message_cache.discard(account, email_id)
+        try:
+            # Otherwise local search keeps finding it until a delta sync of its folder runs
+            await ensure_store_ids(account)
+            await asyncio.to_thread(get_mail_store().remove_message, account_pool.resolve(account), email_id)
+        except Exception as e:
+            print(f"Warning: Could not remove deleted email from the local store: {e}")
+        return {"status": "success", "message": "Deleting email was successfull."}
     except httpx.HTTPStatusError as http_err:
         return {
             "status": "error",
@@ -0,0 +1,157 @@
+"""
+Read-Through Cache for Email Fetches in Outlook MCP Server
+
+LLM agents repeat the same fetch_email_tool call seconds apart. This module
+keeps successful fetch results for a short time (FETCH_CACHE_TTL) in an LRU
+cache keyed on the normalized fetch arguments, and drops them as soon as a
+write could have changed them. The cache is bounded by entry count and by the
+encoded size of the results (FETCH_CACHE_MAX_BYTES): one include_body listing
+of a large page can weigh tens of MB, far more than hundreds of summaries.
+
+Invalidation rules (per account):
+- A message changed (delete, reply, forward): entries for that email_id and
+  every listing that contained it
+- A folder changed (sent items after a send/reply/forward, deleted items after
+  a delete, any folder with delta sync changes): every listing of that folder
+
+Concurrent identical misses are coalesced (single flight): the first caller
+fetches, the others await its result. In-flight fetches are keyed on the
+account's generation too, so a caller arriving after a write never joins a
+fetch that started before it.
+
+A fetch that overlaps an invalidation of its account is not cached (each
+invalidation bumps a per-account generation), so a listing read just before a
+write can never outlive that write.
+
+Folders are matched by the name or id used in the fetch (case-insensitive), so
+a listing requested by folder id is only refreshed by its TTL when a write
+names the folder by its well-known name.
+
+Dependencies:
+- utils.ttl_cache: TTL + LRU storage
+- utils.json_utils: Compact JSON encoding to size results
+- utils.single_flight: In-flight request coalescing
+- services.auth.account_pool: Account key normalization
+- config.settings: FETCH_CACHE_TTL, FETCH_CACHE_MAX_ENTRIES and FETCH_CACHE_MAX_BYTES
+"""
+
+from typing import Awaitable, Callable, Dict, Iterable
+from config import settings
+from services.auth.account_pool import account_pool
+from utils.single_flight import SingleFlight
+from utils.json_utils import dumps_bytes
+from utils.ttl_cache import TTLCache
+
+_cache = TTLCache(settings.FETCH_CACHE_MAX_ENTRIES, settings.FETCH_CACHE_TTL, settings.FETCH_CACHE_MAX_BYTES)
+_invalidations = {"count": 0}
+_generations: Dict[str, int] = {}
+_inflight = SingleFlight()
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return " ".join(value.split()).lower() or None
+    return value
+
+
+def cache_key(account: str | None, **arguments) -> tuple:
+    """
+    Build a cache key from fetch arguments (whitespace/case-insensitive strings, sorted names).
+
+    Cursors and email ids are opaque and kept verbatim.
+    """
+    normalized = []
+    for name, value in sorted(arguments.items()):
+        normalized.append((name, value if name in ("cursor", "email_id") else _normalize(value)))
+    return (account_pool.resolve(account), *normalized)
+
+
+def generation(account: str | None) -> int:
+    """Current invalidation generation of an account (read it before fetching)."""
+    return _generations.get(account_pool.resolve(account), 0)
+
+
+def get(key: tuple) -> dict | None:
+    """Return a cached fetch result, or None on a miss."""
+    entry = _cache.get(key)
+    return entry["result"] if entry else None
+
+
+async def coalesce(key: tuple, started: int, load: Callable[[], Awaitable[dict]]) -> dict:
+    """
+    Run load() for a cache miss, sharing it with identical concurrent misses.
+
+    Args:
+        key (tuple): Key from cache_key().
+        started (int): generation() of the account read before the miss.
+        load (Callable[[], Awaitable[dict]]): Fetches (and caches) the result.
+
+    Returns:
+        dict: The fetch result, shared by every coalesced caller.
+    """
+    return await _inflight.do((key, started), load)
+
+
+def put(key: tuple, result: dict, folder: str | None, email_ids: Iterable[str], started: int) -> None:
+    """
+    Cache a successful fetch result.
+
+    Args:
+        key (tuple): Key from cache_key().
+        result (dict): The fetch result.
+        folder (str | None): Folder the result lists (None for single-message fetches).
+        email_ids (Iterable[str]): Ids of the messages contained in the result.
+        started (int): generation() of the account when the fetch started; the
+                       result is dropped if the account was invalidated since.
+    """
+    if _generations.get(key[0], 0) != started or _cache.max_entries <= 0 or _cache.ttl <= 0:
+        return
+    _cache.set(key, {
+        "result": result,
+        "folder": folder.lower() if folder else None,
+        "email_ids": frozenset(email_ids),
+    }, len(dumps_bytes(result)))
+
+
+def invalidate(account: str | None, folders: Iterable[str] = (), email_ids: Iterable[str] = ()) -> int:
+    """
+    Drop cached results affected by a change.
+
+    Args:
+        account (str | None): Account whose mailbox changed (default account if None).
+        folders (Iterable[str]): Folders whose listings changed.
+        email_ids (Iterable[str]): Messages that changed.
+
+    Returns:
+        int: Number of entries removed.
+    """
+    account = account_pool.resolve(account)
+    _generations[account] = _generations.get(account, 0) + 1
+    folders = {folder.lower() for folder in folders}
+    email_ids = set(email_ids)
+    removed = 0
+    for key, entry in _cache.items():
+        if key[0] != account:
+            continue
+        if entry["folder"] in folders or entry["email_ids"] & email_ids:
+            _cache.pop(key)
+            removed += 1
+    _invalidations["count"] += removed
+    return removed
+
+
+def metrics() -> dict:
+    """Cache counters for the /metrics endpoint."""
+    return {
+        "hits": _cache.hits,
+        "misses": _cache.misses,
+        "entries": len(_cache),
+        "max_entries": _cache.max_entries,
+        "bytes": _cache.bytes,
+        "max_bytes": _cache.max_bytes,
+        "evictions": _cache.evictions,
+        "invalidations": _invalidations["count"],
+        "upstream_fetches": _inflight.leaders,
+        "coalesced": _inflight.followers,
+        "in_flight": len(_inflight),
+    }
@@ -1,6 +1,26 @@
+import asyncio
 import httpx
-from config.settings import GRAPH_API_URL
-from services.auth.graph_auth import get_graph_auth_headers
+from config import settings
+from services.graph.paging import iterate_pages, encode_cursor, decode_cursor
+from services.auth.account_pool import account_pool
+from services.email.query_planner import plan_message_query
+from services.email.folder_cache import resolve_folder
+from services.sync.mail_store import get_mail_store
+from services.sync.id_migration import ensure_store_ids
+from services.email import fetch_cache, message_cache
+
+
+def summarize_email(email: dict) -> dict:
+    """Reduce a Graph message to the summary fields returned by listings."""
+    return {
+        "id": email.get("id", ""),
+        "subject": email.get("subject", ""),
+        "from": (email.get("from") or {}).get("emailAddress", {}).get("address", ""),
+        "received": email.get("receivedDateTime", ""),
+        "is_read": email.get("isRead", False),
+        "preview": email.get("bodyPreview", "")
+    }
+
 
 async def fetch_outlook_emails(
     folder: str = "inbox", 
@@ -8,25 +28,125 @@ async def fetch_outlook_emails(
     sender: str = None, 
     email_id: str = None,
     subject: str = None,
-    top: int = 10
+    top: int = 10,
+    account: str | None = None,
+    received_after: str | None = None,
+    received_before: str | None = None,
+    include_body: bool = False,
+    cursor: str | None = None,
+    page_size: int | None = None,
+    bypass_cache: bool = False
+) -> dict:
+    """
+    Fetch one email by ID, or list emails in a folder matching the given criteria.
+
+    Successful results are kept for FETCH_CACHE_TTL seconds in a read-through
+    cache keyed on the normalized arguments; sends, replies, forwards and
+    deletes invalidate the entries they affect (see services.email.fetch_cache).
+    Identical calls that miss the cache while one is already in flight share
+    that Graph request and its parsed result instead of issuing their own.
+
+    Criteria are translated into a server-side Graph query by the query planner
+    ($filter, or $search when a subject is given). Listings only transfer the
+    summary fields ($select) unless include_body is set. Predicates Graph cannot
+    evaluate exactly are applied while paging, and paging stops as soon as
+    `top` matches are found (or after FETCH_MAX_PAGES pages).
+
+    Single messages are revalidated against a byte-bounded ETag cache, so an
+    unchanged message is not downloaded again (see services.email.message_cache).
+
+    Listed messages are also merged into the local mail store, so
+    search_local_email_tool can find them without another Graph call.
+
+    Pages are read lazily through @odata.nextLink. When more results may exist,
+    the response carries an opaque `next_cursor`; passing it back continues the
+    listing exactly where it stopped (the cursor remembers the criteria, so the
+    filter arguments are ignored when a cursor is given).
+
+    Args:
+        folder (str): Folder to list: well-known name, id, path ("Inbox/Projects") or display name (default: inbox).
+        is_read (bool): Filter by read state.
+        sender (str): Filter by sender address.
+        email_id (str): Fetch a specific email instead of listing.
+        subject (str): Terms that must all appear in the subject, each at the start of a word.
+        top (int): Maximum number of emails to return.
+        account (str | None): Mailbox account to read (default account if None).
+        received_after (str | None): ISO 8601 date/datetime, inclusive lower bound.
+        received_before (str | None): ISO 8601 date/datetime, exclusive upper bound.
+        include_body (bool): Also return the full messages (bodies, recipients, ...) as "emails".
+        cursor (str | None): `next_cursor` from a previous call to fetch the following results.
+        page_size (int | None): Messages per Graph page (up to 1000); chosen from `top` if None.
+        bypass_cache (bool): Always ask Graph (the fresh result still refreshes the cache).
+
+    Returns:
+        dict: {"status": "success", "email_summaries": [...], "next_cursor": str | None}
+              plus "emails" when include_body is set, or {"status": "error", "message": ...}
+    """
+    arguments = dict(
+        folder=folder,
+        is_read=is_read,
+        sender=sender,
+        email_id=email_id,
+        subject=subject,
+        top=top,
+        received_after=received_after,
+        received_before=received_before,
+        include_body=include_body,
+        cursor=cursor,
+        page_size=page_size
+    )
+    key = fetch_cache.cache_key(account, **arguments)
+    if not bypass_cache:
+        cached = fetch_cache.get(key)
+        if cached is not None:
+            return cached
+
+    started = fetch_cache.generation(account)
+
+    async def load() -> dict:
+        result = await _fetch_outlook_emails(account=account, **arguments)
+        if result.get("status") == "success":
+            if email_id:
+                fetch_cache.put(key, result, None, [email_id], started)
+            else:
+                listed_folder = folder
+                if cursor:
+                    try:
+                        listed_folder = decode_cursor(cursor)["criteria"]["folder"]
+                    except (ValueError, KeyError):
+                        pass
+                fetch_cache.put(key, result, listed_folder, [summary["id"] for summary in result["email_summaries"]], started)
+        return result
+
+    return await fetch_cache.coalesce(key, started, load)
+
+
+async def _fetch_outlook_emails(
+    folder: str,
+    is_read: bool | None,
+    sender: str | None,
+    email_id: str | None,
+    subject: str | None,
+    top: int,
+    account: str | None,
+    received_after: str | None,
+    received_before: str | None,
+    include_body: bool,
+    cursor: str | None,
+    page_size: int | None
 ) -> dict:
-   
-    headers = get_graph_auth_headers()
 
     if email_id:
-        url = f"{GRAPH_API_URL}/me/messages/{email_id}"
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, headers=headers)
-                response.raise_for_status()
-                email_data = response.json()
-                return {
-                    "status": "success", 
-                    "email": email_data,
-                    "email_id": email_data.get("id", ""),
-                    "subject": email_data.get("subject", ""),
-                    "from": email_data.get("from", {}).get("emailAddress", {}).get("address", "")
-                }
+            # Revalidated with If-None-Match when a copy is cached
+            email_data = await message_cache.get_message(email_id, account=account)
+            return {
+                "status": "success", 
+                "email": email_data,
+                "email_id": email_data.get("id", ""),
+                "subject": email_data.get("subject", ""),
+                "from": email_data.get("from", {}).get("emailAddress", {}).get("address", "")
+            }
         except httpx.HTTPStatusError as http_err:
             return {
                 "status": "error",
@@ -35,60 +155,90 @@ async def fetch_outlook_emails(
         except Exception as e:
             return {"status": "error", "message": f"Error fetching email: {str(e)}"}
 
-    url = f"{GRAPH_API_URL}/me/mailFolders/{folder}/messages"
-    query_params = {"$top": top}
-    filters = []
+    account_key = account_pool.resolve(account)
+    criteria = {
+        "folder": folder,
+        "is_read": is_read,
+        "sender": sender,
+        "subject": subject,
+        "received_after": received_after,
+        "received_before": received_before,
+        "include_body": include_body,
+    }
+    try:
+        if cursor:
+            position = decode_cursor(cursor)
+            if position.get("account") != account_key:
+                raise ValueError("Cursor belongs to a different account")
+            criteria = position["criteria"]
+        plan = plan_message_query(
+            criteria["is_read"],
+            criteria["sender"],
+            criteria["subject"],
+            criteria["received_after"],
+            criteria["received_before"],
+            top,
+            criteria["include_body"],
+            page_size
+        )
+    except (ValueError, KeyError) as e:
+        return {"status": "error", "message": f"Invalid query: {str(e)}"}
 
-    if is_read is not None:
-        filters.append(f"isRead eq {str(is_read).lower()}")
-    if sender:
-        filters.append(f"from/emailAddress/address eq '{sender}'")
-    if subject:
-        # For subject searches, we'll use a more flexible approach
-        # The Microsoft Graph API's contains() is case-sensitive and literal
-        # We'll fetch more emails and filter them in code for better results
-        top = 50  # Increase the number of emails to fetch when searching by subject
+    include_body = criteria["include_body"]
 
-    if filters:
-        query_params["$filter"] = " and ".join(filters)
+    def make_cursor(page_url: str, index: int = 0) -> str:
+        return encode_cursor(page_url, index, account=account_key, criteria=criteria)
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers, params=query_params)
-            response.raise_for_status()
-            emails = response.json().get("value", [])
-            
-            # Filter emails by subject if needed (client-side for better matching)
-            if subject and not any(f.startswith("contains(subject,") for f in filters):
-                # Convert search terms to lowercase for case-insensitive matching
-                subject_terms = subject.lower().split()
-                filtered_emails = []
-                
-                for email in emails:
-                    email_subject = email.get("subject", "").lower()
-                    # Check if all terms in the search query appear in the subject
-                    if all(term in email_subject for term in subject_terms):
-                        filtered_emails.append(email)
-                
-                emails = filtered_emails
-            
-            # Add email_id to each email summary for easier reference
-            email_summaries = []
-            for email in emails:
-                email_summaries.append({
-                    "id": email.get("id", ""),
-                    "subject": email.get("subject", ""),
-                    "from": email.get("from", {}).get("emailAddress", {}).get("address", ""),
-                    "received": email.get("receivedDateTime", ""),
-                    "is_read": email.get("isRead", False),
-                    "preview": email.get("bodyPreview", "")
-                })
-                
-            return {
-                "status": "success", 
-                "emails": emails,
-                "email_summaries": email_summaries
-            }
+        if cursor:
+            url, params, skip = position["url"], None, position["index"]
+            # Cursors made before the resolved folder was recorded only carry the folder argument
+            folder_key = criteria.get("folder_key") or await resolve_folder(criteria["folder"], account)
+        else:
+            # Custom folder names and paths are resolved from the cached folder tree
+            folder_key = await resolve_folder(folder, account)
+            url, params, skip = f"/me/mailFolders/{folder_key}/messages", plan.params, 0
+            criteria["folder_key"] = folder_key
+
+        emails = []
+        next_cursor = None
+        pages = 0
+        async for page_url, page in iterate_pages(url, params, account=account):
+            pages += 1
+            items = page.get("value", [])
+            for index in range(skip, len(items)):
+                if len(emails) == top:
+                    # Stopped inside this page - resume at the first item not yet examined
+                    next_cursor = make_cursor(page_url, index)
+                    break
+                if plan.matches(items[index]):
+                    emails.append(items[index])
+            skip = 0
+            if next_cursor:
+                break
+            next_link = page.get("@odata.nextLink")
+            if len(emails) == top or pages >= settings.FETCH_MAX_PAGES:
+                next_cursor = make_cursor(next_link) if next_link else None
+                break
+
+        try:
+            # Ids stored in an older format must be translated first, or the folder would mix both
+            await ensure_store_ids(account_key)
+            # Stored under the resolved folder, the same rows the delta sync writes
+            await asyncio.to_thread(get_mail_store().record_messages, account_key, folder_key, emails)
+        except Exception as e:
+            # The local mirror is a cache - a failure here must not fail the fetch
+            print(f"Warning: Could not store fetched emails locally: {e}")
+
+        # Add email_id to each email summary for easier reference
+        result = {
+            "status": "success", 
+            "email_summaries": [summarize_email(email) for email in emails],
+            "next_cursor": next_cursor
+        }
+        if include_body:
+            result["emails"] = emails
+        return result
     except httpx.HTTPStatusError as http_err:
         return {
             "status": "error",
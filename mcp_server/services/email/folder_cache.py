@@ -0,0 +1,209 @@
+"""
+Mail Folder Tree Cache for Outlook MCP Server
+
+Graph addresses mail folders by id, or by a handful of well-known names
+(inbox, sentitems, ...). This module keeps each mailbox's folder tree in
+memory so tools can also take a custom folder's display name or path
+("Projects/Q3", "Inbox/Receipts") and resolve it to its id with dictionary
+lookups instead of extra round trips.
+
+Key Features:
+- Well-known folder names pass straight through (no lookup at all)
+- Initial load walks the tree level by level, listing the childFolders of a
+  level concurrently (GRAPH_FANOUT_CONCURRENCY)
+- Refreshed incrementally with the mailFolders delta query once the cached
+  tree is older than FOLDER_CACHE_TTL, or when a name is not found
+- O(1) resolution by id, full path or unique display name (case-insensitive);
+  ambiguous display names are rejected with the matching paths
+
+Dependencies:
+- httpx: HTTP status errors
+- services.graph.paging: Lazy nextLink/deltaLink paging
+- services.auth.account_pool: Per-account state
+- utils.concurrency: Bounded concurrent fan-out
+- config.settings: FOLDER_CACHE_TTL and GRAPH_FANOUT_CONCURRENCY
+"""
+
+import asyncio
+import time
+from typing import Dict, List
+import httpx
+from config import settings
+from services.auth.account_pool import account_pool
+from services.graph.paging import iterate_pages
+from utils.concurrency import run_bounded
+
+# Folder names Graph resolves itself in /me/mailFolders/{name}
+WELL_KNOWN_FOLDERS = {
+    "archive", "clutter", "conflicts", "conversationhistory", "deleteditems", "drafts",
+    "inbox", "junkemail", "localfailures", "msgfolderroot", "outbox", "recoverableitemsdeletions",
+    "scheduled", "searchfolders", "sentitems", "serverfailures", "syncissues",
+}
+
+FOLDER_FIELDS = "id,displayName,parentFolderId,childFolderCount"
+
+
+class FolderTree:
+    """One mailbox's folder tree with path and name indexes."""
+
+    def __init__(self):
+        self.folders: Dict[str, dict] = {}
+        self.delta_link: str | None = None
+        self.loaded_at: float | None = None
+        self._by_path: Dict[str, str] = {}
+        self._by_name: Dict[str, List[str]] = {}
+        self._lock = asyncio.Lock()
+
+    def _path(self, folder_id: str) -> str:
+        names = []
+        while folder_id in self.folders and len(names) <= len(self.folders):
+            folder = self.folders[folder_id]
+            names.append(folder["displayName"])
+            folder_id = folder.get("parentFolderId")
+        return "/".join(reversed(names))
+
+    def _reindex(self) -> None:
+        self._by_path, self._by_name = {}, {}
+        for folder_id, folder in self.folders.items():
+            self._by_path[self._path(folder_id).lower()] = folder_id
+            self._by_name.setdefault(folder["displayName"].lower(), []).append(folder_id)
+
+    def lookup(self, folder: str) -> str | None:
+        """
+        Resolve a folder id, path or display name to an id.
+
+        Raises:
+            ValueError: If a display name matches several folders.
+        """
+        if folder in self.folders:
+            return folder
+        key = folder.strip("/").lower()
+        if key in self._by_path:
+            return self._by_path[key]
+        matches = self._by_name.get(key, [])
+        if len(matches) > 1:
+            paths = ", ".join(sorted(self._path(folder_id) for folder_id in matches))
+            raise ValueError(f"Folder name '{folder}' is ambiguous, use a path: {paths}")
+        return matches[0] if matches else None
+
+    async def resolve(self, folder: str, account: str) -> str | None:
+        """
+        Look a folder up, loading the tree on first use and refreshing it when stale or on a miss.
+
+        Returns:
+            str | None: The folder id, or None if no such folder exists.
+        """
+        async with self._lock:
+            refreshed = False
+            if self.loaded_at is None:
+                await self.load(account)
+                refreshed = True
+            elif time.monotonic() - self.loaded_at > settings.FOLDER_CACHE_TTL:
+                await self._refresh_or_reload(account)
+                refreshed = True
+            folder_id = self.lookup(folder)
+            if folder_id is None and not refreshed:
+                # Maybe created since the last refresh
+                await self._refresh_or_reload(account)
+                folder_id = self.lookup(folder)
+        return folder_id
+
+    async def _refresh_or_reload(self, account: str) -> None:
+        try:
+            await self.refresh(account)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 410:
+                raise
+            # Delta state expired on the server - read the tree again
+            await self.load(account)
+
+    async def load(self, account: str) -> None:
+        """Read the whole tree, listing the child folders of each level concurrently."""
+        folders = {}
+        level = []
+        async for _, page in iterate_pages("/me/mailFolders", {"$select": FOLDER_FIELDS, "$top": 250}, account=account):
+            level.extend(page.get("value", []))
+
+        async def children(parent: dict) -> list:
+            items = []
+            async for _, page in iterate_pages(
+                f"/me/mailFolders/{parent['id']}/childFolders", {"$select": FOLDER_FIELDS, "$top": 250}, account=account
+            ):
+                items.extend(page.get("value", []))
+            return items
+
+        while level:
+            folders.update((folder["id"], folder) for folder in level)
+            parents = [folder for folder in level if folder.get("childFolderCount")]
+            results = await run_bounded(parents, children, settings.GRAPH_FANOUT_CONCURRENCY)
+            level = []
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+                level.extend(result)
+
+        self.folders = folders
+        self.delta_link = None
+        self.loaded_at = time.monotonic()
+        self._reindex()
+
+    async def refresh(self, account: str) -> None:
+        """
+        Apply folder changes since the last refresh with the mailFolders delta query.
+
+        The first refresh after a load replays the full delta once to obtain a
+        deltaLink; later refreshes only transfer what changed.
+        """
+        if self.delta_link:
+            url, params, folders = self.delta_link, None, dict(self.folders)
+        else:
+            url, params, folders = "/me/mailFolders/delta", {"$select": "displayName,parentFolderId"}, {}
+        async for _, page in iterate_pages(url, params, account=account):
+            for item in page.get("value", []):
+                if "@removed" in item:
+                    folders.pop(item["id"], None)
+                else:
+                    folders[item["id"]] = {**folders.get(item["id"], {}), **item}
+            if page.get("@odata.deltaLink"):
+                self.delta_link = page["@odata.deltaLink"]
+        self.folders = folders
+        self.loaded_at = time.monotonic()
+        self._reindex()
+
+
+def get_folder_tree(account: str | None = None) -> FolderTree:
+    """Return the folder tree of an account (created empty on first use)."""
+    state = account_pool.get(account).state
+    if "folder_tree" not in state:
+        state["folder_tree"] = FolderTree()
+    return state["folder_tree"]
+
+
+def _looks_like_id(folder: str) -> bool:
+    return len(folder) >= 60 and " " not in folder and "/" not in folder
+
+
+async def resolve_folder(folder: str, account: str | None = None) -> str:
+    """
+    Translate a folder argument into the segment used in /me/mailFolders/{segment}.
+
+    Args:
+        folder (str): Well-known name, folder id, path ("Inbox/Projects/Q3") or display name.
+        account (str | None): Mailbox account (default account if None).
+
+    Returns:
+        str: The well-known name or the folder id.
+
+    Raises:
+        ValueError: If the folder does not exist or its name is ambiguous.
+        httpx.HTTPStatusError: If loading the folder tree fails.
+    """
+    folder = folder.strip()
+    if folder.lower() in WELL_KNOWN_FOLDERS:
+        return folder.lower()
+    folder_id = await get_folder_tree(account).resolve(folder, account)
+    if folder_id is None:
+        if _looks_like_id(folder):
+            return folder  # e.g. a hidden folder; let Graph decide
+        raise ValueError(f"Folder not found: {folder}")
+    return folder_id
@@ -10,18 +10,26 @@ Key Features:
 - HTML and plain text content support
 - Comprehensive email validation
 - Detailed error handling and status reporting
+- Proactive pacing under the mailbox's sending quotas
 
 Dependencies:
 - httpx: Async HTTP client for Graph API requests
-- services.auth.graph_auth: Authentication headers for Graph API
+- services.graph.graph_client: Authenticated requests over the shared Graph HTTP client
+- services.graph.batch: Graph JSON batching for individual forwards
+- services.email.send_pacer: Per-mailbox sending quota pacing
+- services.email.send_jobs: Background jobs for long paced forwards
 - utils.email.email_utils: Forward payload construction utilities
 - utils.validators: Email format validation utilities
 """
 
 import httpx
 from typing import List, Dict, Any
-from config.settings import GRAPH_API_URL
-from services.auth.graph_auth import get_graph_auth_headers
+from config import settings
+from services.graph.graph_client import graph_request
+from services.graph.batch import build_batch_request, is_batch_success, describe_batch_error, summarize_results
+from services.email.send_pacer import get_send_pacer, execute_paced_batch
+from services.email.send_jobs import SendJob, start_send_job
+from services.email import fetch_cache
 from utils.email.email_utils import build_forward_payload
 from utils.validators import validate_email_format
 
@@ -33,7 +41,8 @@ async def forward_outlook_email(
     bcc_recipients: List[str] = [],
     additional_message: str = "",
     content_type: str = "Text",
-    send_individual: bool = False
+    send_individual: bool = False,
+    account: str | None = None
 ) -> Dict[str, Any]:
     """
     Forward an email using Microsoft Graph API with advanced recipient management.
@@ -50,6 +59,7 @@ async def forward_outlook_email(
         additional_message (str): Optional message to add before forwarded content
         content_type (str): Content type (Text or HTML), defaults to "Text"
         send_individual (bool): If True, send separate forwards to each recipient (default: False)
+        account (str | None): Mailbox account to forward from (default account if None)
 
     Returns:
         Dict[str, Any]: Status information with forwarding results:
@@ -58,7 +68,12 @@ async def forward_outlook_email(
               - Group mode: {"recipients": [...], "status": "forwarded"}
               - Individual mode: {"recipient": "email", "status": "forwarded"}
               - Errors: {"status": "error", "message": "error details"}
-        
+            - summary: Individual mode only - {"total": n, "succeeded": n, "failed": n}
+            - pacing: Quota plan with estimated_seconds / estimated_completion (when SEND_PACING is on)
+        Paced forwards estimated to take longer than SEND_BLOCKING_MAX_WAIT return
+        {"status": "accepted", "job_id", "state", "processed", "total", "pacing"} at once
+        instead; the forwards go out in the background (see services.email.send_jobs).
+
     Examples:
         # Single recipient forward
         result = await forward_outlook_email(
@@ -93,17 +108,14 @@ async def forward_outlook_email(
 
     Forwarding Modes:
         - Group Mode (send_individual=False): One forward to all recipients
-        - Individual Mode (send_individual=True): Separate forwards per recipient
+        - Individual Mode (send_individual=True): Separate forwards per recipient,
+          sent through Graph $batch (up to 20 forwards per round trip)
 
     Error Handling:
         - Email validation errors are returned immediately
         - Network/authentication errors are captured per forward
         - Individual failures don't stop batch processing
     """
-    
-    headers = get_graph_auth_headers()
-    results = []
-
     # Validate all email addresses before forwarding
     all_addresses = to_recipients + cc_recipients + bcc_recipients
     invalid = [email for email in all_addresses if not validate_email_format(email)]
@@ -120,37 +132,49 @@ async def forward_outlook_email(
             "message": "At least one TO recipient is required"
         }
 
-    async with httpx.AsyncClient() as client:
+    # Check the mailbox's sending quotas before the first forward goes out
+    pacer = get_send_pacer(account)
+    messages = len(to_recipients) if send_individual else 1
+    recipients_per_message = (1 if send_individual else len(to_recipients)) + len(cc_recipients) + len(bcc_recipients)
+    plan = None
+    if pacer is not None:
+        try:
+            plan = pacer.plan(messages, recipients_per_message)
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}
+
+    async def deliver(job: SendJob | None = None) -> Dict[str, Any]:
+        results = []
         if send_individual:
-            # Send separate forwards to each TO recipient (like send_email behavior)
-            for recipient in to_recipients:
-                # Use build_forward_payload for consistent behavior
-                forward_data = build_forward_payload(
-                    to=[recipient],
-                    cc=cc_recipients,
-                    bcc=bcc_recipients,
-                    additional_message=additional_message
+            # Send separate forwards to each TO recipient, packed into Graph $batch calls
+            batch_requests = [
+                build_batch_request(
+                    str(index),
+                    "POST",
+                    f"/me/messages/{email_id}/forward",
+                    # Use build_forward_payload for consistent behavior
+                    build_forward_payload(
+                        to=[recipient],
+                        cc=cc_recipients,
+                        bcc=bcc_recipients,
+                        additional_message=additional_message
+                    )
                 )
+                for index, recipient in enumerate(to_recipients)
+            ]
+            batch_results = await execute_paced_batch(
+                batch_requests, pacer, account=account, on_wave=job.record_wave if job else None
+            )
 
-                try:
-                    response = await client.post(
-                        f"{GRAPH_API_URL}/me/messages/{email_id}/forward",
-                        json=forward_data,
-                        headers=headers
-                    )
-                    response.raise_for_status()
+            for index, recipient in enumerate(to_recipients):
+                result = batch_results[str(index)]
+                if is_batch_success(result):
                     results.append({"recipient": recipient, "status": "forwarded"})
-                except httpx.HTTPStatusError as http_err:
+                else:
                     results.append({
                         "recipient": recipient, 
                         "status": "error", 
-                        "message": f"HTTP Error {http_err.response.status_code}: {http_err.response.text}"
-                    })
-                except Exception as e:
-                    results.append({
-                        "recipient": recipient, 
-                        "status": "error", 
-                        "message": f"Error forwarding email: {str(e)}"
+                        "message": describe_batch_error(result)
                     })
         else:
             # Send one forward to all recipients (like send_email behavior)
@@ -163,10 +187,13 @@ async def forward_outlook_email(
             )
 
             try:
-                response = await client.post(
-                    f"{GRAPH_API_URL}/me/messages/{email_id}/forward",
+                if pacer is not None:
+                    await pacer.acquire(1)
+                response = await graph_request(
+                    "POST",
+                    f"/me/messages/{email_id}/forward",
                     json=forward_data,
-                    headers=headers
+                    account=account
                 )
                 response.raise_for_status()
                 results.append({"recipients": to_recipients, "status": "forwarded"})
@@ -181,4 +208,18 @@ async def forward_outlook_email(
                     "message": f"Error forwarding email: {str(e)}"
                 })
 
-    return {"status": "complete", "results": results}
+        # Even a partially failed forward may have added messages to Sent Items
+        fetch_cache.invalidate(account, folders=["sentitems"], email_ids=[email_id])
+
+        response = {"status": "complete", "results": results}
+        if send_individual:
+            # Partial-failure report: how many of the individual operations went through
+            response["summary"] = summarize_results(results)
+        if plan is not None:
+            response["pacing"] = plan
+        return response
+
+    if plan is not None and plan["estimated_seconds"] > settings.SEND_BLOCKING_MAX_WAIT:
+        # Longer than a client waits for a tool call: forward in the background and return a job to poll
+        return start_send_job(account, "forward", messages, plan, deliver)
+    return await deliver()
@@ -0,0 +1,85 @@
+"""
+Conditional GET Cache for Single Messages in Outlook MCP Server
+
+Fetching a message by id downloads the whole message, body included, although
+messages rarely change after delivery (mostly flags and categories). This
+module keeps fetched messages with their ETag and revalidates them with
+`If-None-Match`: an unchanged message costs a 304 with no body, a changed one
+is downloaded and replaces the cached copy.
+
+Key Features:
+- get_message(): conditional GET of /me/messages/{id}, serving the cached
+  copy on 304 Not Modified
+- Bounded by total bytes (MESSAGE_CACHE_MAX_BYTES) with LRU eviction, since
+  HTML bodies range from a few hundred bytes to megabytes
+- Entries are per account and dropped when the message is deleted
+
+Dependencies:
+- utils.sized_cache: Byte-bounded LRU storage
+- services.graph.graph_client: Authenticated requests over the shared client
+- services.auth.account_pool: Account key normalization
+- config.settings: MESSAGE_CACHE_MAX_BYTES
+"""
+
+from config import settings
+from services.auth.account_pool import account_pool
+from services.graph.graph_client import graph_request
+from utils.sized_cache import SizedLRUCache
+
+_cache = SizedLRUCache(settings.MESSAGE_CACHE_MAX_BYTES)
+_revalidations = {"not_modified": 0, "modified": 0}
+
+
+async def get_message(email_id: str, account: str | None = None) -> dict:
+    """
+    Fetch a message by id, revalidating a cached copy with If-None-Match.
+
+    Args:
+        email_id (str): Message id.
+        account (str | None): Mailbox account (default account if None).
+
+    Returns:
+        dict: The Graph message.
+
+    Raises:
+        httpx.HTTPStatusError: If Graph answers with an error status.
+        RuntimeError: If no access token is available.
+    """
+    key = (account_pool.resolve(account), email_id)
+    cached = _cache.get(key)
+    headers = {"If-None-Match": cached["etag"]} if cached else None
+
+    response = await graph_request("GET", f"/me/messages/{email_id}", headers=headers, account=account)
+    if cached and response.status_code == 304:
+        _revalidations["not_modified"] += 1
+        return cached["message"]
+    response.raise_for_status()
+    message = response.json()
+    if cached:
+        _revalidations["modified"] += 1
+
+    etag = response.headers.get("ETag") or message.get("@odata.etag")
+    if etag and settings.MESSAGE_CACHE_MAX_BYTES > 0:
+        _cache.set(key, {"etag": etag, "message": message}, len(response.content))
+    else:
+        _cache.pop(key)
+    return message
+
+
+def discard(account: str | None, email_id: str) -> None:
+    """Drop a cached message (e.g. after it was deleted)."""
+    _cache.pop((account_pool.resolve(account), email_id))
+
+
+def metrics() -> dict:
+    """Cache counters for the /metrics endpoint."""
+    return {
+        "entries": len(_cache),
+        "bytes": _cache.bytes,
+        "max_bytes": _cache.max_bytes,
+        "cached_lookups": _cache.hits,
+        "uncached_lookups": _cache.misses,
+        "not_modified": _revalidations["not_modified"],
+        "modified": _revalidations["modified"],
+        "evictions": _cache.evictions,
+    }
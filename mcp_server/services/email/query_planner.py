@@ -0,0 +1,176 @@
+"""
+Message Query Planner for Outlook MCP Server
+
+Translates fetch criteria (sender, read state, subject terms, received date
+range) into a Microsoft Graph query so the filtering happens on the server
+instead of after downloading a page of messages.
+
+Planning rules:
+- Without a subject, every criterion becomes an OData `$filter` clause
+  (string literals are escaped by doubling single quotes)
+- With a subject, the query uses KQL `$search` (Graph does not allow `$filter`
+  together with `$search` on messages): subject terms, sender and date range
+  are pushed into the search expression. KQL matches words, so each term is
+  sent as a prefix (`subject:invoic*`); a fragment from the middle of a word
+  ("voice" for "invoice") is no longer found, unlike the old client-side
+  substring filter
+- Summary listings project only the summary fields with `$select`; full
+  messages (including bodies) are only requested when asked for
+- Whatever the server cannot evaluate exactly stays behind as a residual
+  predicate that is applied while paging: read state under `$search`, and the
+  exact "all terms appear in the subject" / sender address / timestamp checks,
+  since KQL matches words and whole days (in the mailbox's time zone, so the
+  KQL date range is one day wider on each side than the UTC one asked for)
+
+Dependencies:
+- Standard library only
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Any
+
+# Largest page Graph returns for message listings
+MAX_PAGE_SIZE = 1000
+
+# Fields needed for an email summary (and by the residual predicates)
+SUMMARY_FIELDS = ["id", "subject", "from", "receivedDateTime", "isRead", "bodyPreview"]
+
+
+class QueryPlan:
+    """Server-side query parameters plus the residual predicates evaluated client-side."""
+
+    def __init__(self, params: Dict[str, Any], residual: List[Callable[[dict], bool]]):
+        self.params = params
+        self.residual = residual
+
+    def matches(self, message: dict) -> bool:
+        """Check a message returned by Graph against the residual predicates."""
+        return all(predicate(message) for predicate in self.residual)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "select": self.params.get("$select"),
+            "filter": self.params.get("$filter"),
+            "search": self.params.get("$search"),
+            "residual_predicates": len(self.residual),
+        }
+
+
+def odata_string(value: str) -> str:
+    """
+    Quote a value as an OData string literal.
+
+    Example:
+        odata_string("o'brien@contoso.com") -> "'o''brien@contoso.com'"
+    """
+    return "'" + value.replace("'", "''") + "'"
+
+
+def kql_term(value: str) -> str:
+    """Strip characters that would break out of the quoted $search expression."""
+    return "".join(ch for ch in value if ch not in '"\\')
+
+
+def parse_datetime(value: str) -> datetime:
+    """
+    Parse an ISO 8601 date or datetime (naive values are taken as UTC).
+
+    Raises:
+        ValueError: If the value is not a valid ISO 8601 date/datetime.
+    """
+    parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _odata_datetime(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _received_at(message: dict) -> datetime | None:
+    received = message.get("receivedDateTime")
+    return parse_datetime(received) if received else None
+
+
+def plan_message_query(
+    is_read: bool | None = None,
+    sender: str | None = None,
+    subject: str | None = None,
+    received_after: str | None = None,
+    received_before: str | None = None,
+    top: int = 10,
+    include_body: bool = False,
+    page_size: int | None = None
+) -> QueryPlan:
+    """
+    Build the Graph query for a message listing.
+
+    Args:
+        is_read (bool | None): Read state to match.
+        sender (str | None): Sender address to match (case-insensitive).
+        subject (str | None): Whitespace-separated terms that must all appear in the subject, each at the start of a word.
+        received_after (str | None): ISO 8601 lower bound (inclusive) for receivedDateTime.
+        received_before (str | None): ISO 8601 upper bound (exclusive) for receivedDateTime.
+        top (int): Number of matching messages wanted.
+        include_body (bool): Request full messages instead of the SUMMARY_FIELDS projection.
+        page_size (int | None): Server-side page size (capped at MAX_PAGE_SIZE); chosen from `top` if None.
+
+    Returns:
+        QueryPlan: Query parameters for the first page and the residual predicates.
+
+    Raises:
+        ValueError: If a date is not valid ISO 8601.
+    """
+    after = parse_datetime(received_after) if received_after else None
+    before = parse_datetime(received_before) if received_before else None
+    subject_terms = [term for term in (subject or "").lower().split() if kql_term(term)]
+    sender = (sender or "").strip()
+
+    residual: List[Callable[[dict], bool]] = []
+    params: Dict[str, Any] = {}
+    if not include_body:
+        params["$select"] = ",".join(SUMMARY_FIELDS)
+
+    if not subject_terms:
+        filters = []
+        if is_read is not None:
+            filters.append(f"isRead eq {str(is_read).lower()}")
+        if sender:
+            filters.append(f"from/emailAddress/address eq {odata_string(sender)}")
+        if after:
+            filters.append(f"receivedDateTime ge {_odata_datetime(after)}")
+        if before:
+            filters.append(f"receivedDateTime lt {_odata_datetime(before)}")
+        if filters:
+            params["$filter"] = " and ".join(filters)
+        params["$top"] = min(page_size or top, MAX_PAGE_SIZE)
+        return QueryPlan(params, residual)
+
+    # KQL search: each term matches the start of a subject word, everything ANDed
+    clauses = [f"subject:{kql_term(term)}*" for term in subject_terms]
+    if sender:
+        clauses.append(f'from:{kql_term(sender)}')
+    # Exchange compares dates in the mailbox's time zone, not UTC: widen by a day, the residual check is exact
+    if after:
+        clauses.append(f"received>={(after - timedelta(days=1)).date().isoformat()}")
+    if before:
+        clauses.append(f"received<={(before + timedelta(days=1)).date().isoformat()}")
+    params["$search"] = '"' + " AND ".join(clauses) + '"'
+
+    # Exact checks the search cannot express
+    residual.append(lambda m: all(term in (m.get("subject") or "").lower() for term in subject_terms))
+    if is_read is not None:
+        residual.append(lambda m: m.get("isRead", False) == is_read)
+    if sender:
+        residual.append(
+            lambda m: (m.get("from") or {}).get("emailAddress", {}).get("address", "").lower() == sender.lower()
+        )
+    if after:
+        residual.append(lambda m: (_received_at(m) or after) >= after)
+    if before:
+        residual.append(lambda m: (_received_at(m) or before) < before)
+
+    # Residual predicates drop some results, so read larger pages
+    params["$top"] = min(page_size or max(top * 2, 50), MAX_PAGE_SIZE)
+    return QueryPlan(params, residual)
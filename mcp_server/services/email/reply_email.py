@@ -1,11 +1,12 @@
 import httpx
-from config.settings import GRAPH_API_URL
-from services.auth.graph_auth import get_graph_auth_headers
+from services.graph.graph_client import graph_request
+from services.email import fetch_cache
 
 async def reply_to_outlook_email(
     email_id: str,
     reply_message: str,
-    content_type: str = "Text"
+    content_type: str = "Text",
+    account: str | None = None
 ) -> dict:
     """
     Reply to an email using Microsoft Graph API.
@@ -14,12 +15,12 @@ async def reply_to_outlook_email(
         email_id: The ID of the email to reply to
         reply_message: The content of the reply
         content_type: The content type (Text or HTML)
+        account: Mailbox account to reply from (default account if None)
         
     Returns:
         A dictionary with status and message
     """
 
-    headers = get_graph_auth_headers()
 
     reply_data = {
         "message": {
@@ -31,14 +32,16 @@ async def reply_to_outlook_email(
     }
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{GRAPH_API_URL}/me/messages/{email_id}/reply",
-                json=reply_data,
-                headers=headers
-            )
-            response.raise_for_status()
-            return {"status": "success", "message": "Reply sent successfully."}
+        response = await graph_request(
+            "POST",
+            f"/me/messages/{email_id}/reply",
+            json=reply_data,
+            account=account
+        )
+        response.raise_for_status()
+        # The reply lands in Sent Items and the original's reply state changed
+        fetch_cache.invalidate(account, folders=["sentitems"], email_ids=[email_id])
+        return {"status": "success", "message": "Reply sent successfully."}
     except httpx.HTTPStatusError as http_err:
         return {
             "status": "error",
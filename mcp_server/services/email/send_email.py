@@ -10,18 +10,25 @@ Key Features:
 - HTML and plain text content support
 - Comprehensive email validation
 - Detailed error handling and status reporting
+- Proactive pacing under the mailbox's sending quotas
 
 Dependencies:
-- httpx: Async HTTP client for Graph API requests
-- services.auth.graph_auth: Authentication headers for Graph API
+- services.graph.graph_client: Authenticated requests over the shared Graph HTTP client
+- services.graph.batch: Graph JSON batching for individual sends
+- services.email.send_pacer: Per-mailbox sending quota pacing
+- services.email.send_jobs: Background jobs for long paced sends
 - utils.email.email_utils: Email payload construction utilities
 - utils.validators: Email format validation utilities
 """
 
-import httpx
 from typing import List, Literal, Dict, Any
-from config.settings import GRAPH_API_URL
-from services.auth.graph_auth import get_graph_auth_headers
+from config import settings
+from services.graph.graph_client import graph_request
+from services.graph.batch import build_batch_request, is_batch_success, describe_batch_error, summarize_results
+from services.email.send_pacer import get_send_pacer, execute_paced_batch
+from services.email.send_jobs import SendJob, start_send_job
+from services.email import fetch_cache
+from services.auth.account_pool import account_pool
 from utils.email.email_utils import build_email_payload
 from utils.validators import validate_email_format
 
@@ -34,6 +41,7 @@ async def send_outlook_email(
     send_individual: bool = False,
     cc: List[str] = [],
     bcc: List[str] = [],
+    account: str | None = None,
 ) -> Dict[str, Any]:
     """
     Send one or more emails via Microsoft Graph API with advanced recipient management.
@@ -46,6 +54,7 @@ async def send_outlook_email(
         send_individual (bool): If True, send separate emails to each recipient (default: False).
         cc (List[str]): Optional CC recipients.
         bcc (List[str]): Optional BCC recipients.
+        account (str | None): Mailbox account to send from (default account if None).
 
     Returns:
         Dict[str, Any]: Status information with delivery results:
@@ -54,6 +63,11 @@ async def send_outlook_email(
               - Group mode: {"recipients": [...], "status": "sent"}
               - Individual mode: {"recipient": "email", "status": "sent"}
               - Errors: {"status": "error", "message": "error details"}
+            - summary: Individual mode only - {"total": n, "succeeded": n, "failed": n}
+            - pacing: Quota plan with estimated_seconds / estimated_completion (when SEND_PACING is on)
+        Paced sends estimated to take longer than SEND_BLOCKING_MAX_WAIT return
+        {"status": "accepted", "job_id", "state", "processed", "total", "pacing"} at once
+        instead; the messages go out in the background (see services.email.send_jobs).
 
     Features:
         ✅ Multiple recipients support
@@ -91,17 +105,17 @@ async def send_outlook_email(
 
     Delivery Modes:
         - Group Mode (send_individual=False): One email to all recipients
-        - Individual Mode (send_individual=True): Separate emails per recipient
+        - Individual Mode (send_individual=True): Separate emails per recipient,
+          sent through Graph $batch (up to 20 emails per round trip)
 
     Error Handling:
         - Email validation errors are returned immediately
         - Network/authentication errors are captured per email
         - Individual failures don't stop batch processing
+        - Throttled (429) sends inside a batch are retried after their Retry-After delay
+        - Sends that would exceed the daily recipient quota (or take longer than
+          SEND_PACING_MAX_WAIT to pace) are rejected before anything is sent
     """
-    # Get authentication headers for Microsoft Graph API
-    headers = get_graph_auth_headers()
-    results = []
-
     # Validate all email addresses before sending
     all_addresses = recipients + cc + bcc
     invalid = [email for email in all_addresses if not validate_email_format(email)]
@@ -111,28 +125,47 @@ async def send_outlook_email(
             "message": f"Invalid email address(es): {', '.join(invalid)}"
         }
 
-    async with httpx.AsyncClient() as client:
+    # Check the mailbox's sending quotas before the first message goes out
+    pacer = get_send_pacer(account)
+    messages = len(recipients) if send_individual else 1
+    recipients_per_message = (1 if send_individual else len(recipients)) + len(cc) + len(bcc)
+    plan = None
+    if pacer is not None:
+        try:
+            plan = pacer.plan(messages, recipients_per_message)
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}
+
+    async def deliver(job: SendJob | None = None) -> Dict[str, Any]:
+        results = []
         if send_individual:
-            # Send separate emails to each recipient
-            for recipient in recipients:
-                payload = build_email_payload(
-                    to=[recipient],
-                    subject=subject,
-                    body=body,
-                    content_type=content_type,
-                    cc=cc,
-                    bcc=bcc
-                )
-                try:
-                    response = await client.post(
-                        f"{GRAPH_API_URL}/me/sendMail",
-                        json=payload,
-                        headers=headers
+            # Send separate emails to each recipient, packed into Graph $batch calls
+            batch_requests = [
+                build_batch_request(
+                    str(index),
+                    "POST",
+                    "/me/sendMail",
+                    build_email_payload(
+                        to=[recipient],
+                        subject=subject,
+                        body=body,
+                        content_type=content_type,
+                        cc=cc,
+                        bcc=bcc
                     )
-                    response.raise_for_status()
+                )
+                for index, recipient in enumerate(recipients)
+            ]
+            batch_results = await execute_paced_batch(
+                batch_requests, pacer, account=account, on_wave=job.record_wave if job else None
+            )
+
+            for index, recipient in enumerate(recipients):
+                result = batch_results[str(index)]
+                if is_batch_success(result):
                     results.append({"recipient": recipient, "status": "sent"})
-                except Exception as e:
-                    results.append({"recipient": recipient, "status": "error", "message": str(e)})
+                else:
+                    results.append({"recipient": recipient, "status": "error", "message": describe_batch_error(result)})
         else:
             # Send one email to all recipients
             payload = build_email_payload(
@@ -144,14 +177,35 @@ async def send_outlook_email(
                 bcc=bcc
             )
             try:
-                response = await client.post(
-                    f"{GRAPH_API_URL}/me/sendMail",
+                if pacer is not None:
+                    await pacer.acquire(1)
+                response = await graph_request(
+                    "POST",
+                    "/me/sendMail",
                     json=payload,
-                    headers=headers
+                    account=account
                 )
                 response.raise_for_status()
                 results.append({"recipients": recipients, "status": "sent"})
             except Exception as e:
                 results.append({"status": "error", "message": str(e)})
 
-    return {"status": "complete", "results": results}
+        # Even a partially failed send may have added messages to Sent Items (and
+        # to the Inbox when the mailbox mailed itself)
+        changed_folders = ["sentitems"]
+        if account_pool.resolve(account) in {address.lower() for address in all_addresses}:
+            changed_folders.append("inbox")
+        fetch_cache.invalidate(account, folders=changed_folders)
+
+        response = {"status": "complete", "results": results}
+        if send_individual:
+            # Partial-failure report: how many of the individual operations went through
+            response["summary"] = summarize_results(results)
+        if plan is not None:
+            response["pacing"] = plan
+        return response
+
+    if plan is not None and plan["estimated_seconds"] > settings.SEND_BLOCKING_MAX_WAIT:
+        # Longer than a client waits for a tool call: send in the background and return a job to poll
+        return start_send_job(account, "send", messages, plan, deliver)
+    return await deliver()
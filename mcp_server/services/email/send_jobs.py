@@ -0,0 +1,206 @@
+"""
+Background Send Jobs for Outlook MCP Server
+
+A paced bulk send can take many minutes, far longer than an MCP client waits
+for a tool call (the stdio proxy gives up after 30 seconds). A client that
+times out sees a failure while the messages keep going out, and retrying
+would send them twice. Sends and forwards expected to take longer than
+SEND_BLOCKING_MAX_WAIT therefore run as background jobs: the tool call returns
+a job id at once, and send_job_status_tool reports progress and, when done,
+the same result the tool would have returned.
+
+States:
+- running: Messages are being released at the paced rate
+- complete: Finished; the result holds the per-recipient outcome
+- failed: Stopped by an unexpected error
+- cancelled: Stopped by server shutdown (the result is lost; see processed)
+
+With several uvicorn workers (WORKERS > 1) a job runs in the worker that
+accepted it, but its status is also written to a file in the token store
+directory after every wave, so send_job_status_tool answers on any worker.
+
+Dependencies:
+- services.auth.account_pool: Account key normalization
+- services.auth.token_store: Atomic writes of the shared job status files
+- config.settings: WORKERS
+"""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict
+from config import settings
+from services.auth.account_pool import account_pool
+from services.auth.graph_auth import TOKEN_STORE_DIR
+from services.auth.token_store import TokenFileStore
+from utils.json_utils import dumps_bytes
+
+# Finished jobs kept for status queries (oldest dropped first)
+MAX_FINISHED_JOBS = 100
+
+# Status files of jobs, read by workers that did not start them
+SEND_JOB_DIR = os.path.join(TOKEN_STORE_DIR, ".send_jobs")
+
+
+def _job_file(job_id: str) -> TokenFileStore:
+    return TokenFileStore(os.path.join(SEND_JOB_DIR, f"{job_id}.json"))
+
+
+class SendJob:
+    """One paced send or forward running in the background."""
+
+    def __init__(self, account: str, kind: str, total: int, plan: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.account = account
+        self.kind = kind
+        self.total = total
+        self.plan = plan
+        self.state = "running"
+        self.processed = 0
+        self.result: Dict[str, Any] | None = None
+        self.error: str | None = None
+        self.started_at = time.time()
+        self.finished_at: float | None = None
+        self._task: asyncio.Task | None = None
+
+    def record_wave(self, wave_results: Dict[str, Dict[str, Any]]) -> None:
+        """Count the messages of a completed wave (passed as execute_paced_batch's on_wave)."""
+        self.processed += len(wave_results)
+        self.publish()
+
+    def publish(self) -> None:
+        """Write the job's status for the other workers (only when there are several)."""
+        if settings.WORKERS <= 1:
+            return
+        try:
+            _job_file(self.id).write(dumps_bytes(self.status()).decode())
+        except OSError as e:
+            print(f"Warning: Could not share status of send job {self.id}: {e}")
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Return the job's progress.
+
+        Returns:
+            Dict[str, Any]: job_id, kind, account, state, processed, total, pacing,
+                            plus result when complete or error when failed.
+        """
+        status = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "account": self.account,
+            "state": self.state,
+            "processed": self.processed,
+            "total": self.total,
+            "pacing": self.plan,
+        }
+        if self.state == "complete":
+            status["result"] = self.result
+        if self.state == "failed":
+            status["error"] = self.error
+        if self.finished_at is not None:
+            status["finished_at"] = self.finished_at
+        return status
+
+    async def _run(self, deliver: Callable[["SendJob"], Awaitable[Dict[str, Any]]]) -> None:
+        try:
+            self.result = await deliver(self)
+            self.state = "complete"
+        except asyncio.CancelledError:
+            self.state = "cancelled"
+            raise
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+        finally:
+            self.finished_at = time.time()
+            self.publish()
+            _prune()
+
+
+_jobs: "OrderedDict[str, SendJob]" = OrderedDict()
+
+
+def _prune() -> None:
+    finished = [job_id for job_id, job in _jobs.items() if job.state != "running"]
+    for job_id in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+        del _jobs[job_id]
+        if settings.WORKERS > 1:
+            _job_file(job_id).remove()
+
+
+def start_send_job(
+    account: str | None,
+    kind: str,
+    total: int,
+    plan: Dict[str, Any],
+    deliver: Callable[[SendJob], Awaitable[Dict[str, Any]]]
+) -> Dict[str, Any]:
+    """
+    Run a paced send in the background.
+
+    Args:
+        account (str | None): Mailbox account (default account if None).
+        kind (str): "send" or "forward".
+        total (int): Messages the job sends.
+        plan (Dict[str, Any]): The pacing plan (already reserved with SendPacer.plan()).
+        deliver (Callable): Coroutine function doing the send; receives the job and returns the tool result.
+
+    Returns:
+        Dict[str, Any]: {"status": "accepted", "message", **job status}
+    """
+    job = SendJob(account_pool.resolve(account), kind, total, plan)
+    _jobs[job.id] = job
+    job.publish()
+    job._task = asyncio.create_task(job._run(deliver))
+    return {
+        "status": "accepted",
+        "message": (
+            f"Pacing {total} messages under the sending quota takes about {int(plan['estimated_seconds'])} seconds; "
+            f"they are being sent in the background. Check progress with send_job_status_tool(job_id)"
+        ),
+        **job.status(),
+    }
+
+
+def get_send_job_status(job_id: str, account: str | None = None) -> Dict[str, Any]:
+    """
+    Look up a background send job.
+
+    Args:
+        job_id (str): Id returned when the send was accepted.
+        account (str | None): Mailbox account the job belongs to (default account if None).
+
+    Returns:
+        Dict[str, Any]: {"status": "success", **job status} or {"status": "error", "message": ...}
+    """
+    job = _jobs.get(job_id)
+    if job is not None:
+        status = job.status()
+    else:
+        status = _read_shared_status(job_id)
+    if status is None or status.get("account") != account_pool.resolve(account):
+        return {"status": "error", "message": f"Unknown send job: {job_id}"}
+    return {"status": "success", **status}
+
+
+def _read_shared_status(job_id: str) -> Dict[str, Any] | None:
+    """Status of a job started by another worker, or None."""
+    if settings.WORKERS <= 1 or not job_id.isalnum():
+        return None
+    try:
+        data = _job_file(job_id).read()
+        return json.loads(data) if data else None
+    except (OSError, ValueError):
+        return None
+
+
+async def cancel_send_jobs() -> None:
+    """Stop running jobs (used on shutdown)."""
+    tasks = [job._task for job in _jobs.values() if job._task is not None and not job._task.done()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,239 @@
+"""
+Mailbox Sending Quota Pacer for Outlook MCP Server
+
+Exchange Online limits how fast a mailbox may send (messages per minute) and
+how many recipients it may reach per day. Instead of discovering those limits
+through 429s, sends and forwards are paced per mailbox so bulk operations stay
+just under the quota and complete at the maximum sustainable rate.
+
+Key Features:
+- Messages per minute: token bucket whose burst plus refill never exceeds
+  SEND_MESSAGES_PER_MINUTE in any 60 second window
+- Recipients per day: rolling 24 hour window of recipients sent to
+- Up-front planning: a send that would exceed today's recipient quota, or
+  that would take longer than SEND_PACING_MAX_WAIT, is rejected before
+  anything is sent. A planned send reserves its recipients and its place in
+  the queue at once, so concurrent sends cannot both pass the same check
+- Estimated completion time reported with every paced send, counting the
+  messages of sends already queued
+- Individual sends are released in waves of SEND_BURST messages (at most one
+  $batch each) once the bucket holds a full wave, instead of one message
+  at a time as tokens trickle in
+- One pacer per mailbox, kept outside the account pool's LRU so evicting an
+  idle account context never forgets recipients sent to today or a queue
+  still draining; pacers are dropped once nothing about them is left to
+  remember. With several uvicorn workers each worker paces with its share
+  (quota / WORKERS)
+
+Dependencies:
+- services.auth.account_pool: Account key normalization
+- services.graph.batch: Graph JSON batching for each wave (MAX_BATCH_SIZE)
+- config.settings: Quotas, burst size and pacing limits
+"""
+
+import asyncio
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Any
+from config import settings
+from services.auth.account_pool import account_pool
+from services.graph.batch import MAX_BATCH_SIZE, execute_batch
+
+DAY_SECONDS = 24 * 60 * 60
+
+
+class SendPacer:
+    """Paces one mailbox's sends under its per-minute and per-day quotas."""
+
+    def __init__(
+        self,
+        messages_per_minute: int = settings.SEND_MESSAGES_PER_MINUTE,
+        recipients_per_day: int = settings.SEND_RECIPIENTS_PER_DAY,
+        burst: int = settings.SEND_BURST
+    ):
+        workers = max(settings.WORKERS, 1)
+        self.messages_per_minute = max(messages_per_minute // workers, 1)
+        self.recipients_per_day = max(recipients_per_day // workers, 1)
+        # The burst is also the wave size, so a wave never needs more than one $batch
+        self.burst = max(min(burst, MAX_BATCH_SIZE, self.messages_per_minute - 1), 1)
+        # burst + rate * 60 stays within the per-minute quota
+        self.rate = max(self.messages_per_minute - self.burst, 1) / 60.0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._recipient_log: deque = deque()  # (timestamp, recipient count)
+        self._recipients_today = 0
+        self._queued = 0  # messages planned but not released yet
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _expire_recipients(self) -> None:
+        cutoff = time.time() - DAY_SECONDS
+        while self._recipient_log and self._recipient_log[0][0] <= cutoff:
+            self._recipients_today -= self._recipient_log.popleft()[1]
+
+    def remaining_recipients(self) -> int:
+        """Recipients still available in the rolling 24 hour window."""
+        self._expire_recipients()
+        return self.recipients_per_day - self._recipients_today
+
+    def estimate_seconds(self, messages: int) -> float:
+        """
+        Estimate how long sending `messages` more messages takes at the paced rate.
+
+        Messages of sends already planned are released first, so they count too.
+
+        Args:
+            messages (int): Number of messages to send.
+
+        Returns:
+            float: Seconds until the last message can be released.
+        """
+        self._refill()
+        return max(self._queued + messages - self._tokens, 0.0) / self.rate
+
+    def plan(self, messages: int, recipients_per_message: int) -> Dict[str, Any]:
+        """
+        Check a send against the quotas, reserve its share of them and estimate its completion time.
+
+        The recipients are counted against the daily quota right away (and stay
+        counted even if sending fails, as Exchange may have counted them too);
+        the messages join the mailbox's queue until acquire() releases them.
+
+        Args:
+            messages (int): Number of messages that will be sent.
+            recipients_per_message (int): Recipients (TO + CC + BCC) per message.
+
+        Returns:
+            Dict[str, Any]: The pacing plan:
+                - messages / recipients: What will be sent
+                - remaining_recipients_today: Daily quota left before this send
+                - estimated_seconds: Expected pacing time
+                - estimated_completion: ISO 8601 UTC timestamp
+
+        Raises:
+            ValueError: If the send exceeds today's recipient quota or SEND_PACING_MAX_WAIT.
+        """
+        recipients = messages * recipients_per_message
+        remaining = self.remaining_recipients()
+        if recipients > remaining:
+            raise ValueError(
+                f"Sending to {recipients} recipients would exceed the daily recipient quota "
+                f"({remaining} of {self.recipients_per_day} left in the last 24 hours)"
+            )
+        seconds = self.estimate_seconds(messages)
+        if seconds > settings.SEND_PACING_MAX_WAIT:
+            raise ValueError(
+                f"Sending {messages} messages at {self.messages_per_minute} per minute would take "
+                f"about {int(seconds)} seconds (limit: {settings.SEND_PACING_MAX_WAIT} seconds); split the send"
+            )
+        self._recipient_log.append((time.time(), recipients))
+        self._recipients_today += recipients
+        self._queued += messages
+        completion = datetime.now(timezone.utc) + timedelta(seconds=seconds)
+        return {
+            "messages": messages,
+            "recipients": recipients,
+            "remaining_recipients_today": remaining,
+            "estimated_seconds": round(seconds, 1),
+            "estimated_completion": completion.isoformat(timespec="seconds"),
+        }
+
+    async def acquire(self, max_messages: int) -> int:
+        """
+        Wait until a wave of messages may be sent, then release it.
+
+        A wave is `burst` messages (fewer for the last one), so individual sends
+        go out in $batch-sized groups. Callers are served in arrival order, so
+        concurrent sends for the same mailbox share the quota instead of racing for it.
+
+        Args:
+            max_messages (int): Messages still to send (planned with plan()).
+
+        Returns:
+            int: Number of messages (1..max_messages) the caller may send now.
+        """
+        async with self._lock:
+            count = max(min(max_messages, self.burst), 1)
+            self._refill()
+            if self._tokens < count:
+                await asyncio.sleep((count - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= count
+            self._queued = max(self._queued - count, 0)
+            return count
+
+    def unqueue(self, messages: int) -> None:
+        """Drop planned messages that will not be sent (the send stopped early)."""
+        self._queued = max(self._queued - messages, 0)
+
+    def is_idle(self) -> bool:
+        """True if a fresh pacer would behave the same (no queue, no recipients today, full bucket)."""
+        self._refill()
+        return self._queued == 0 and self.remaining_recipients() == self.recipients_per_day and self._tokens >= self.burst
+
+
+# Per mailbox (account key); not in the account context, which the account pool may evict
+_pacers: Dict[str, SendPacer] = {}
+
+
+def get_send_pacer(account: str | None = None) -> SendPacer | None:
+    """
+    Return the mailbox's pacer, creating it on first use.
+
+    Returns:
+        SendPacer | None: The pacer, or None if SEND_PACING is disabled.
+    """
+    if not settings.SEND_PACING:
+        return None
+    account = account_pool.resolve(account)
+    pacer = _pacers.get(account)
+    if pacer is None:
+        for idle in [key for key, other in _pacers.items() if other.is_idle()]:
+            del _pacers[idle]
+        pacer = _pacers[account] = SendPacer()
+    return pacer
+
+
+async def execute_paced_batch(
+    requests: List[dict],
+    pacer: SendPacer | None,
+    account: str | None = None,
+    on_wave: Callable[[Dict[str, Dict[str, Any]]], None] | None = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Execute send/forward sub-requests through $batch, released at the mailbox's paced rate.
+
+    Args:
+        requests (List[dict]): Independent sub-requests, one message each (planned with pacer.plan()).
+        pacer (SendPacer | None): The mailbox's pacer (no pacing if None).
+        account (str | None): Mailbox account (default account if None).
+        on_wave (Callable | None): Called with each wave's results as it completes (progress reporting).
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Result per sub-request id (see execute_batch).
+    """
+    if pacer is None:
+        results = await execute_batch(requests, account=account)
+        if on_wave is not None:
+            on_wave(results)
+        return results
+
+    results: Dict[str, Dict[str, Any]] = {}
+    remaining = list(requests)
+    try:
+        while remaining:
+            count = await pacer.acquire(len(remaining))
+            wave, remaining = remaining[:count], remaining[count:]
+            wave_results = await execute_batch(wave, account=account)
+            results.update(wave_results)
+            if on_wave is not None:
+                on_wave(wave_results)
+    finally:
+        # Cancelled or failed part-way: later sends should not wait behind messages that never go out
+        pacer.unqueue(len(remaining))
+    return results
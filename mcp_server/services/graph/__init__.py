@@ -0,0 +1,11 @@
+"""
+Graph Services Package
+This package provides the shared transport layer used to talk to Microsoft Graph.
+
+- get_graph_client: Returns the shared, pooled HTTP client.
+- start_graph_client / close_graph_client: Lifecycle hooks used by the app lifespan.
+"""
+
+from .graph_client import get_graph_client, start_graph_client, close_graph_client
+
+__all__ = ["get_graph_client", "start_graph_client", "close_graph_client"]
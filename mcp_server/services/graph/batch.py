@@ -0,0 +1,257 @@
+"""
+Microsoft Graph JSON Batching for Outlook MCP Server
+
+Fan-out operations (individual sends and forwards) used to issue one request per
+recipient. This module packs sub-requests into `POST /$batch` calls of up to 20
+requests each, so N operations cost roughly N/20 round trips.
+
+Key Features:
+- Automatic chunking into batches of at most MAX_BATCH_SIZE sub-requests
+- Batches are sent concurrently (GRAPH_FANOUT_CONCURRENCY in flight), so N
+  operations cost roughly N / (20 * concurrency) round-trip times
+- Sub-requests ask for immutable ids like every other Graph call
+- dependsOn support: dependent sub-requests are kept in the same batch
+- Per-item status codes: every sub-request gets its own result
+- Per-item retry of throttled sub-requests honouring their Retry-After header
+  (jittered backoff otherwise);
+  sub-requests that failed only because a throttled dependency failed (424) are
+  retried together with it
+
+Sub-request format (as defined by Graph):
+    {"id": "1", "method": "POST", "url": "/me/sendMail",
+     "body": {...}, "headers": {"Content-Type": "application/json"},
+     "dependsOn": ["0"]}
+
+Dependencies:
+- services.graph.graph_client: Authenticated requests over the shared client
+- services.graph.retry_policy: Retry-After parsing, jittered backoff and counters
+- utils.concurrency: Bounded concurrent fan-out
+- config.settings: Retry limits, delays and fan-out concurrency
+"""
+
+import asyncio
+import json
+from typing import List, Dict, Any
+from config import settings
+from services.graph.graph_client import graph_request, with_id_preference, IDEMPOTENT_METHODS
+from services.graph import retry_policy
+from utils.concurrency import run_bounded
+
+# Graph accepts at most 20 sub-requests per $batch call
+MAX_BATCH_SIZE = 20
+
+def build_batch_request(request_id: str, method: str, url: str, body: dict | None = None, depends_on: List[str] | None = None) -> dict:
+    """
+    Construct a single $batch sub-request.
+
+    Args:
+        request_id (str): Unique id of the sub-request within the batch.
+        method (str): HTTP method.
+        url (str): URL relative to the Graph version root (e.g. "/me/sendMail").
+        body (dict | None): Optional JSON body.
+        depends_on (List[str] | None): Ids of sub-requests that must succeed first.
+
+    Returns:
+        dict: The sub-request in Graph $batch format.
+    """
+    request = {"id": request_id, "method": method.upper(), "url": url}
+    headers = with_id_preference(None)
+    if body is not None:
+        request["body"] = body
+        headers["Content-Type"] = "application/json"
+    if headers:
+        request["headers"] = headers
+    if depends_on:
+        request["dependsOn"] = list(depends_on)
+    return request
+
+
+def describe_batch_error(result: dict) -> str:
+    """
+    Render a failed sub-request result in the services' usual error message format.
+
+    Args:
+        result (dict): A result returned by execute_batch().
+
+    Returns:
+        str: e.g. "HTTP Error 429: {...}" or the transport error message.
+    """
+    if result.get("error"):
+        return result["error"]
+    return f"HTTP Error {result.get('status')}: {json.dumps(result.get('body'))}"
+
+
+def is_batch_success(result: dict) -> bool:
+    status = result.get("status")
+    return status is not None and 200 <= status < 300
+
+
+def _chunk_requests(requests: List[dict]) -> List[List[dict]]:
+    """
+    Split sub-requests into batches of at most MAX_BATCH_SIZE.
+
+    Requests linked through dependsOn form one group and always share a batch;
+    groups are packed in their original order.
+    """
+    group_of: Dict[str, int] = {}
+    groups: List[List[dict]] = []
+    for request in requests:
+        dependencies = [group_of[d] for d in request.get("dependsOn", []) if d in group_of]
+        if dependencies:
+            target = dependencies[0]
+            # Merge every other group this request links to into the first one
+            for other in sorted(set(dependencies[1:]), reverse=True):
+                if other != target:
+                    for moved in groups[other]:
+                        group_of[moved["id"]] = target
+                    groups[target].extend(groups[other])
+                    groups[other] = []
+        else:
+            target = len(groups)
+            groups.append([])
+        groups[target].append(request)
+        group_of[request["id"]] = target
+
+    chunks: List[List[dict]] = []
+    current: List[dict] = []
+    for group in groups:
+        if not group:
+            continue
+        if len(group) > MAX_BATCH_SIZE:
+            raise ValueError(f"A dependsOn chain of {len(group)} requests exceeds the $batch limit of {MAX_BATCH_SIZE}")
+        if len(current) + len(group) > MAX_BATCH_SIZE:
+            chunks.append(current)
+            current = []
+        current.extend(group)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _should_retry(request: dict, result: dict) -> bool:
+    status = result.get("status")
+    return status is not None and retry_policy.is_retryable_status(status, request["method"] in IDEMPOTENT_METHODS)
+
+
+def _retry_delay(result: dict, attempt: int) -> float:
+    delay = retry_policy.retry_after_seconds(result.get("headers"))
+    if delay is None:
+        delay = retry_policy.backoff_delay(
+            attempt,
+            base=settings.GRAPH_BATCH_RETRY_BASE_DELAY,
+            cap=settings.GRAPH_BATCH_MAX_RETRY_DELAY
+        )
+    return min(delay, settings.GRAPH_BATCH_MAX_RETRY_DELAY)
+
+
+async def _execute_chunk(chunk: List[dict], account: str | None) -> Dict[str, dict]:
+    """Send one batch, retrying throttled sub-requests until they settle or retries run out."""
+    results: Dict[str, dict] = {}
+    pending = chunk
+    attempt = 0
+
+    while pending:
+        try:
+            response = await graph_request("POST", "/$batch", json={"requests": pending}, account=account)
+            response.raise_for_status()
+            responses = {item["id"]: item for item in response.json().get("responses", [])}
+        except Exception as e:
+            error = f"Error sending batch: {str(e)}"
+            for request in pending:
+                results[request["id"]] = {"id": request["id"], "status": None, "error": error}
+            return results
+
+        retry_ids = set()
+        delay = 0.0
+        for request in pending:
+            result = responses.get(request["id"], {"id": request["id"], "status": None, "error": "Missing response in batch"})
+            if attempt < settings.GRAPH_BATCH_MAX_RETRIES and _should_retry(request, result):
+                retry_policy.retry_metrics["throttled" if result.get("status") == 429 else "server_busy"] += 1
+                retry_ids.add(request["id"])
+                delay = max(delay, _retry_delay(result, attempt))
+
+        # Requests that failed because a dependency was throttled are retried alongside it
+        for request in pending:
+            result = responses.get(request["id"], {})
+            if result.get("status") == 424 and retry_ids.intersection(request.get("dependsOn", [])):
+                retry_ids.add(request["id"])
+
+        for request in pending:
+            if request["id"] not in retry_ids:
+                results[request["id"]] = responses.get(
+                    request["id"], {"id": request["id"], "status": None, "error": "Missing response in batch"}
+                )
+
+        if not retry_ids:
+            break
+
+        attempt += 1
+        retry_policy.retry_metrics["batch_item_retries"] += len(retry_ids)
+        await asyncio.sleep(delay)
+        pending = []
+        for request in chunk:
+            if request["id"] in retry_ids:
+                request = dict(request)
+                # Dependencies that already succeeded are no longer part of this batch
+                depends_on = [d for d in request.get("dependsOn", []) if d in retry_ids]
+                if depends_on:
+                    request["dependsOn"] = depends_on
+                else:
+                    request.pop("dependsOn", None)
+                pending.append(request)
+
+    return results
+
+
+async def execute_batch(
+    requests: List[dict],
+    account: str | None = None,
+    concurrency: int | None = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Execute any number of sub-requests through Graph JSON batching.
+
+    Sub-requests are split into batches of up to 20 which are sent concurrently,
+    with at most `concurrency` batches in flight for the mailbox.
+
+    Args:
+        requests (List[dict]): Sub-requests (see build_batch_request); ids must be unique.
+        account (str | None): Mailbox account whose token is used (default account if None).
+        concurrency (int | None): Maximum number of concurrent $batch calls (GRAPH_FANOUT_CONCURRENCY if None).
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Result per sub-request id:
+            - status: HTTP status of the sub-request (None on transport errors)
+            - body / headers: As returned by Graph
+            - error: Transport-level error message, if any
+
+    Raises:
+        ValueError: If a dependsOn chain does not fit into a single batch.
+    """
+    if concurrency is None:
+        concurrency = settings.GRAPH_FANOUT_CONCURRENCY
+    chunks = _chunk_requests(requests)
+    outcomes = await run_bounded(chunks, lambda chunk: _execute_chunk(chunk, account), concurrency)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for chunk, outcome in zip(chunks, outcomes):
+        if isinstance(outcome, Exception):
+            for request in chunk:
+                results[request["id"]] = {"id": request["id"], "status": None, "error": f"Error sending batch: {str(outcome)}"}
+        else:
+            results.update(outcome)
+    return results
+
+
+def summarize_results(results: List[dict]) -> Dict[str, int]:
+    """
+    Count successes and failures in a services-style results list.
+
+    Args:
+        results (List[dict]): Per-recipient results ({"status": "sent" | "forwarded" | "error", ...}).
+
+    Returns:
+        Dict[str, int]: {"total": n, "succeeded": n, "failed": n}
+    """
+    failed = sum(1 for result in results if result.get("status") == "error")
+    return {"total": len(results), "succeeded": len(results) - failed, "failed": failed}
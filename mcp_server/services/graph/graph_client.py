@@ -0,0 +1,281 @@
+"""
+Shared Microsoft Graph HTTP Client for Outlook MCP Server
+
+This module owns the single pooled `httpx.AsyncClient` used by every service that
+talks to Microsoft Graph. Reusing one client keeps TCP/TLS connections to
+graph.microsoft.com alive between tool calls instead of paying a fresh handshake
+on every request.
+
+Key Features:
+- One process-wide client with keep-alive and HTTP/2 multiplexing
+- Configurable connection pool limits and timeouts (see config.settings)
+- Optional TLS warm-up at startup so the first tool call doesn't pay the handshake
+- Lifecycle managed by the Starlette app lifespan (app/lifespan.py)
+- graph_request(): authenticated requests with transparent 401 recovery
+  (one coalesced token refresh for all waiters, automatic replay of idempotent calls)
+  and throttling-aware retries (see services.graph.retry_policy)
+- Immutable ids: every request carries `Prefer: IdType="ImmutableId"`
+  (GRAPH_IMMUTABLE_IDS), so message ids stay valid when messages are moved
+
+Dependencies:
+- httpx: Async HTTP client for Graph API requests (h2 is required for HTTP/2)
+- config.settings: Pool, timeout and HTTP/2 configuration
+- services.auth.account_pool: Per-account in-memory access tokens
+- services.graph.retry_policy: Retry-After / backoff / retry budget decisions
+"""
+
+import asyncio
+import httpx
+from config import settings
+from services.auth.account_pool import account_pool
+from services.auth.token_manager import token_metrics
+from services.graph import retry_policy
+
+try:
+    import h2  # noqa: F401  # HTTP/2 support is optional (installed via httpx[http2])
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# The shared client instance, created by start_graph_client() during app startup
+_client: httpx.AsyncClient | None = None
+
+# Methods that can be replayed safely after a token refresh
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# Prefer token asking Graph for ids that survive folder moves
+IMMUTABLE_ID_PREFERENCE = 'IdType="ImmutableId"'
+
+# Counters for the Graph request layer, exposed via /metrics
+graph_metrics = {
+    "requests": 0,
+    "unauthorized": 0,
+    "replayed": 0,
+}
+
+
+def with_id_preference(headers: dict | None) -> dict:
+    """
+    Add the immutable id preference to request headers (merged into an existing Prefer header).
+
+    Args:
+        headers (dict | None): Request headers.
+
+    Returns:
+        dict: A copy of the headers, with `IdType="ImmutableId"` preferred when GRAPH_IMMUTABLE_IDS is on.
+    """
+    headers = dict(headers or {})
+    if settings.GRAPH_IMMUTABLE_IDS:
+        prefer = headers.get("Prefer")
+        headers["Prefer"] = f"{prefer}, {IMMUTABLE_ID_PREFERENCE}" if prefer else IMMUTABLE_ID_PREFERENCE
+    return headers
+
+
+def build_graph_client() -> httpx.AsyncClient:
+    """
+    Create a new pooled HTTP client configured for Microsoft Graph.
+
+    Returns:
+        httpx.AsyncClient: A client with keep-alive pooling and, when the `h2`
+        package is installed and GRAPH_HTTP2 is enabled, HTTP/2 support.
+    """
+    limits = httpx.Limits(
+        max_connections=settings.GRAPH_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.GRAPH_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.GRAPH_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(settings.GRAPH_TIMEOUT, connect=settings.GRAPH_CONNECT_TIMEOUT)
+
+    http2 = settings.GRAPH_HTTP2 and HTTP2_AVAILABLE
+    if settings.GRAPH_HTTP2 and not HTTP2_AVAILABLE:
+        print("Warning: GRAPH_HTTP2 is enabled but 'h2' is not installed - falling back to HTTP/1.1")
+
+    return httpx.AsyncClient(http2=http2, limits=limits, timeout=timeout)
+
+
+async def warm_up_graph_client(client: httpx.AsyncClient) -> None:
+    """
+    Open a connection to the Graph endpoint ahead of the first real request.
+
+    The response itself is irrelevant (an unauthenticated request is rejected);
+    what matters is that DNS resolution, TCP connect and the TLS handshake are
+    done and the connection is parked in the pool.
+
+    Args:
+        client (httpx.AsyncClient): The client whose pool should be warmed.
+    """
+    try:
+        await client.head(settings.GRAPH_API_URL)
+    except httpx.HTTPError as e:
+        # Warm-up is best effort - the first real request will simply connect itself
+        print(f"Warning: Graph connection warm-up failed: {e}")
+
+
+async def start_graph_client() -> httpx.AsyncClient:
+    """
+    Create (and optionally warm up) the shared Graph client.
+
+    Called once from the application lifespan. Calling it again while the
+    client is open returns the existing instance.
+
+    Returns:
+        httpx.AsyncClient: The shared client.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_graph_client()
+        if settings.GRAPH_WARMUP:
+            await warm_up_graph_client(_client)
+    return _client
+
+
+async def close_graph_client() -> None:
+    """Close the shared Graph client and release all pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_graph_client() -> httpx.AsyncClient:
+    """
+    Return the shared Graph client used by all services.
+
+    If the client has not been started by the lifespan (for example when the
+    services are used from a script), it is created lazily without warm-up.
+
+    Returns:
+        httpx.AsyncClient: The shared client.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_graph_client()
+    return _client
+
+
+def get_graph_metrics() -> dict:
+    """
+    Return a snapshot of the Graph request layer counters.
+
+    Returns:
+        dict: Request, 401, replay, retry/throttle and token refresh counters plus account pool usage.
+    """
+    return {
+        **graph_metrics,
+        **retry_policy.retry_metrics,
+        "token_refreshes": token_metrics["refreshes"],
+        **account_pool.metrics(),
+    }
+
+
+async def graph_request(
+    method: str,
+    url: str,
+    *,
+    json: dict | None = None,
+    params: dict | None = None,
+    headers: dict | None = None,
+    idempotent: bool | None = None,
+    account: str | None = None,
+) -> httpx.Response:
+    """
+    Send an authenticated request to Microsoft Graph through the shared client.
+
+    Every account's requests use that account's token (the URL keeps "/me",
+    which Graph resolves to the signed-in mailbox). On a 401 response the
+    access token is refreshed once for all concurrent callers that were
+    rejected with the same token, and idempotent requests
+    are replayed automatically with the new token. Non-idempotent requests
+    return the 401 response (the refreshed token is used for the next call).
+
+    Throttled (429) requests are retried for every method; 503/504 responses
+    and timeouts only for idempotent requests. Retries wait for Retry-After (or
+    a jittered exponential backoff) and draw from the mailbox's retry budget.
+    When retries run out, the last response is returned.
+
+    Args:
+        method (str): HTTP method ("GET", "POST", ...).
+        url (str): Absolute URL or a path relative to GRAPH_API_URL (e.g. "/me/messages").
+        json (dict | None): Optional JSON body.
+        params (dict | None): Optional query parameters.
+        headers (dict | None): Extra headers merged over the auth headers.
+        idempotent (bool | None): Override replay/retry safety; defaults to the method's semantics.
+        account (str | None): Mailbox account whose token is used (default account if None).
+
+    Returns:
+        httpx.Response: The (possibly replayed) response. Callers decide whether to raise_for_status().
+
+    Raises:
+        RuntimeError: If no access token can be acquired.
+        httpx.HTTPError: On transport-level failures.
+    """
+    method = method.upper()
+    if not url.startswith("http"):
+        url = f"{settings.GRAPH_API_URL}{url}"
+    if idempotent is None:
+        idempotent = method in IDEMPOTENT_METHODS
+
+    client = get_graph_client()
+    context = account_pool.get(account)
+    token_manager = context.token_manager
+    token = await token_manager.get_token()
+
+    async def send(access_token: str) -> httpx.Response:
+        graph_metrics["requests"] += 1
+        request_headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json",
+            **with_id_preference(headers),
+        }
+        return await client.request(method, url, json=json, params=params, headers=request_headers)
+
+    async def send_with_retries(access_token: str) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                response = await send(access_token)
+            except httpx.TransportError as e:
+                if not retry_policy.is_retryable_error(e, idempotent):
+                    raise
+                retry_policy.retry_metrics["transport_errors"] += 1
+                if not can_retry(attempt):
+                    raise
+                delay = retry_policy.backoff_delay(attempt)
+            else:
+                if not retry_policy.is_retryable_status(response.status_code, idempotent):
+                    return response
+                retry_policy.retry_metrics["throttled" if response.status_code == 429 else "server_busy"] += 1
+                delay = retry_policy.retry_after_seconds(response.headers)
+                if delay is None:
+                    delay = retry_policy.backoff_delay(attempt)
+                if delay > settings.GRAPH_MAX_RETRY_DELAY or not can_retry(attempt):
+                    return response
+            attempt += 1
+            retry_policy.retry_metrics["retries"] += 1
+            await asyncio.sleep(delay)
+
+    def can_retry(attempt: int) -> bool:
+        if attempt >= settings.GRAPH_MAX_RETRIES:
+            retry_policy.retry_metrics["retries_exhausted"] += 1
+            return False
+        if not retry_policy.get_retry_budget(context.state).try_acquire():
+            retry_policy.retry_metrics["retry_budget_exhausted"] += 1
+            return False
+        return True
+
+    response = await send_with_retries(token)
+    if response.status_code != 401:
+        return response
+
+    # Token rejected - refresh once (shared by every caller holding the same stale token)
+    graph_metrics["unauthorized"] += 1
+    try:
+        new_token = await token_manager.refresh(force=True, stale_token=token)
+    except RuntimeError as e:
+        print(f"Warning: Token refresh after 401 failed: {e}")
+        return response
+    if not idempotent:
+        return response
+
+    graph_metrics["replayed"] += 1
+    return await send_with_retries(new_token)
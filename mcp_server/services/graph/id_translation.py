@@ -0,0 +1,84 @@
+"""
+Exchange Item Id Translation for Outlook MCP Server
+
+Default Graph message ids change whenever a message moves to another folder;
+immutable ids do not. Ids stored before the switch to immutable ids (in the
+local mail store, or anywhere else) can be converted in bulk with Graph's
+`translateExchangeIds` action, which this module wraps.
+
+Key Features:
+- translate_exchange_ids(): any number of ids, split into calls of at most
+  1000 ids (the Graph limit) sent with bounded concurrency
+- Returns a source -> target mapping; ids Graph cannot translate (e.g. the
+  message was deleted) are simply absent from it
+
+Dependencies:
+- httpx: HTTP status errors
+- services.graph.graph_client: Authenticated requests over the shared client
+- utils.concurrency: Bounded concurrent fan-out
+- config.settings: GRAPH_FANOUT_CONCURRENCY
+"""
+
+from typing import Dict, List
+from config import settings
+from services.graph.graph_client import graph_request
+from utils.concurrency import run_bounded
+
+# Id formats accepted by translateExchangeIds (sourceIdType / targetIdType)
+REST_ID = "restId"
+IMMUTABLE_ID = "restImmutableEntryId"
+
+# Graph translates at most 1000 ids per call
+MAX_TRANSLATE_IDS = 1000
+
+
+def current_id_type() -> str:
+    """Id format the service layer requests from Graph (see GRAPH_IMMUTABLE_IDS)."""
+    return IMMUTABLE_ID if settings.GRAPH_IMMUTABLE_IDS else REST_ID
+
+
+async def translate_exchange_ids(
+    ids: List[str],
+    source_id_type: str = REST_ID,
+    target_id_type: str = IMMUTABLE_ID,
+    account: str | None = None
+) -> Dict[str, str]:
+    """
+    Translate message ids between Exchange id formats.
+
+    Args:
+        ids (List[str]): Ids to translate.
+        source_id_type (str): Format of `ids` (e.g. "restId").
+        target_id_type (str): Wanted format (e.g. "restImmutableEntryId").
+        account (str | None): Mailbox account the ids belong to (default account if None).
+
+    Returns:
+        Dict[str, str]: source id -> target id for every id Graph could translate.
+
+    Raises:
+        httpx.HTTPStatusError: If a translation call fails.
+        RuntimeError: If no access token is available.
+    """
+    if source_id_type == target_id_type:
+        return {id_: id_ for id_ in ids}
+    chunks = [ids[i:i + MAX_TRANSLATE_IDS] for i in range(0, len(ids), MAX_TRANSLATE_IDS)]
+
+    async def translate(chunk: List[str]) -> list:
+        response = await graph_request(
+            "POST",
+            "/me/translateExchangeIds",
+            json={"inputIds": chunk, "sourceIdType": source_id_type, "targetIdType": target_id_type},
+            idempotent=True,  # pure lookup, safe to retry
+            account=account
+        )
+        response.raise_for_status()
+        return response.json().get("value", [])
+
+    mapping = {}
+    for result in await run_bounded(chunks, translate, settings.GRAPH_FANOUT_CONCURRENCY):
+        if isinstance(result, Exception):
+            raise result
+        for item in result:
+            if item.get("sourceId") and item.get("targetId"):
+                mapping[item["sourceId"]] = item["targetId"]
+    return mapping
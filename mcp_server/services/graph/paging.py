@@ -0,0 +1,103 @@
+"""
+Microsoft Graph Collection Paging for Outlook MCP Server
+
+Graph returns large collections page by page, linking each page to the next
+with `@odata.nextLink`. This module walks those links lazily with an async
+generator, so callers hold one page in memory at a time and stop fetching as
+soon as they have what they need.
+
+Key Features:
+- iterate_pages(): async generator over (page_url, page) following nextLink
+- Opaque continuation cursors: a resumable position (page URL + offset within
+  the page, plus any caller state) encoded as URL-safe base64 JSON
+- Cursors are only accepted for URLs under GRAPH_API_URL, so a forged cursor
+  can never send the mailbox's token to another host
+
+Dependencies:
+- httpx: URL construction
+- services.graph.graph_client: Authenticated requests over the shared client
+- config.settings: GRAPH_API_URL
+"""
+
+import base64
+import json
+from typing import AsyncIterator, Tuple
+import httpx
+from config import settings
+from services.graph.graph_client import graph_request
+
+
+async def iterate_pages(
+    url: str,
+    params: dict | None = None,
+    account: str | None = None,
+    headers: dict | None = None
+) -> AsyncIterator[Tuple[str, dict]]:
+    """
+    Lazily fetch the pages of a Graph collection.
+
+    Example:
+        async for page_url, page in iterate_pages("/me/mailFolders/inbox/messages", {"$top": 100}):
+            for message in page["value"]:
+                ...
+
+    Args:
+        url (str): Absolute URL or a path relative to GRAPH_API_URL.
+        params (dict | None): Query parameters of the first page (nextLinks carry their own).
+        account (str | None): Mailbox account whose token is used (default account if None).
+        headers (dict | None): Extra headers sent with every page request (e.g. Prefer).
+
+    Yields:
+        Tuple[str, dict]: The page's absolute URL (usable to resume) and the decoded page.
+
+    Raises:
+        httpx.HTTPStatusError: If Graph answers a page request with an error status.
+    """
+    if not url.startswith("http"):
+        url = f"{settings.GRAPH_API_URL}{url}"
+    page_url = str(httpx.URL(url, params=params)) if params else url
+
+    while page_url:
+        response = await graph_request("GET", page_url, headers=headers, account=account)
+        response.raise_for_status()
+        page = response.json()
+        yield page_url, page
+        page_url = page.get("@odata.nextLink")
+
+
+def encode_cursor(page_url: str, index: int = 0, **state) -> str:
+    """
+    Encode a resumable position as an opaque cursor.
+
+    Args:
+        page_url (str): URL of the page to resume from.
+        index (int): Number of items of that page already consumed.
+        **state: Extra JSON-serializable caller state (e.g. query criteria).
+
+    Returns:
+        str: URL-safe cursor string.
+    """
+    data = json.dumps({"url": page_url, "index": index, **state}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Decode a cursor created by encode_cursor().
+
+    Returns:
+        dict: {"url": ..., "index": ..., **state}
+
+    Raises:
+        ValueError: If the cursor is malformed or points outside GRAPH_API_URL.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        url, index = data["url"], int(data["index"])
+    except (ValueError, TypeError, KeyError, json.JSONDecodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(url, str) or not url.startswith(f"{settings.GRAPH_API_URL}/") or index < 0:
+        raise ValueError("Invalid cursor")
+    data["index"] = index
+    return data
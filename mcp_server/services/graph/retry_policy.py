@@ -0,0 +1,142 @@
+"""
+Graph Throttling and Retry Policy for Outlook MCP Server
+
+Microsoft Graph throttles per mailbox (429) and occasionally answers with
+503/504 when a backend is busy. This module decides whether and when a failed
+call may be sent again; graph_request() applies it to every Graph call.
+
+Key Features:
+- Retry-After is honoured (delta-seconds or HTTP-date)
+- Exponential backoff with full jitter when Graph gives no Retry-After
+- Replay safety: 429 means the request was not processed, so every call is
+  retried; 503/504 and read timeouts are only retried for idempotent calls
+  (GET, DELETE, ...) - a sendMail, /reply or /forward may already have happened
+- Per-mailbox retry budget (token bucket) so a throttled mailbox cannot
+  multiply its own load with retries
+- Retry/throttle counters exposed through /metrics
+
+Dependencies:
+- httpx: Transport error types
+- config.settings: Retry limits, delays and budget
+"""
+
+import random
+import time
+from email.utils import parsedate_to_datetime
+import httpx
+from config import settings
+
+# Statuses worth retrying, by replay safety
+THROTTLED_STATUSES = {429}
+TRANSIENT_STATUSES = {429, 503, 504}
+
+# Transport errors raised before the request reached Graph (safe to resend for any method)
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+# Counters for retries and throttling, exposed via /metrics
+retry_metrics = {
+    "retries": 0,
+    "throttled": 0,
+    "server_busy": 0,
+    "transport_errors": 0,
+    "retries_exhausted": 0,
+    "retry_budget_exhausted": 0,
+    "batch_item_retries": 0,
+}
+
+
+class RetryBudget:
+    """
+    Token bucket limiting how many retries one mailbox may spend.
+
+    The bucket holds up to `capacity` retries and refills at `refill_rate`
+    retries per second. Kept in AccountContext.state, so each mailbox has its own.
+    """
+
+    def __init__(self, capacity: float = settings.GRAPH_RETRY_BUDGET, refill_rate: float = settings.GRAPH_RETRY_BUDGET_REFILL):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_rate)
+        self._updated = now
+
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def try_acquire(self) -> bool:
+        """
+        Spend one retry from the budget.
+
+        Returns:
+            bool: False if the budget is exhausted (the caller should give up).
+        """
+        self._refill()
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+def get_retry_budget(state: dict) -> RetryBudget:
+    """Return the retry budget stored in an account's per-service state, creating it on first use."""
+    budget = state.get("retry_budget")
+    if budget is None:
+        budget = state["retry_budget"] = RetryBudget()
+    return budget
+
+
+def is_retryable_status(status: int, idempotent: bool) -> bool:
+    return status in (TRANSIENT_STATUSES if idempotent else THROTTLED_STATUSES)
+
+
+def is_retryable_error(error: Exception, idempotent: bool) -> bool:
+    if isinstance(error, NOT_SENT_ERRORS):
+        return True
+    return idempotent and isinstance(error, httpx.TransportError)
+
+
+def retry_after_seconds(headers) -> float | None:
+    """
+    Parse a Retry-After header.
+
+    Args:
+        headers: Response headers (any mapping; lookup is case-insensitive).
+
+    Returns:
+        float | None: Seconds to wait, or None if the header is missing or invalid.
+    """
+    value = None
+    for key, header_value in (headers or {}).items():
+        if key.lower() == "retry-after":
+            value = str(header_value).strip()
+            break
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = settings.GRAPH_RETRY_BASE_DELAY, cap: float = settings.GRAPH_MAX_RETRY_DELAY) -> float:
+    """
+    Exponential backoff with full jitter: uniform(0, min(cap, base * 2^attempt)).
+
+    Args:
+        attempt (int): Number of retries already made (0 for the first retry).
+        base (float): Base delay in seconds.
+        cap (float): Upper bound in seconds.
+
+    Returns:
+        float: Delay in seconds.
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
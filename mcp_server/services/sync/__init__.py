@@ -0,0 +1,26 @@
+"""
+Sync Services Package
+This package mirrors Outlook folders into a local store using Graph delta queries.
+
+- sync_folder: Runs one incremental delta sync of a folder.
+- get_new_emails: Syncs a folder and returns the changes after a client's sync token.
+- DeltaSyncScheduler: Periodic background sync started by the app lifespan.
+- search_local_emails: Ranked full-text search over the local mirror, with freshness.
+- get_mail_store / close_mail_store: Access to the local SQLite mail store.
+- migrate_store_ids: Translates stored message ids to the current id format (immutable ids).
+"""
+
+from .delta_sync import sync_folder, get_new_emails, DeltaSyncScheduler
+from .mail_store import get_mail_store, close_mail_store
+from .local_search import search_local_emails
+from .id_migration import migrate_store_ids
+
+__all__ = [
+    "sync_folder",
+    "get_new_emails",
+    "DeltaSyncScheduler",
+    "get_mail_store",
+    "close_mail_store",
+    "search_local_emails",
+    "migrate_store_ids"
+]
@@ -0,0 +1,210 @@
+"""
+Delta Query Mailbox Sync Engine for Outlook MCP Server
+
+Keeps the local mail store in step with Outlook folders using Graph delta
+queries (`/me/mailFolders/{folder}/messages/delta`). The first sync of a folder
+pages through its recent messages (SYNC_INITIAL_DAYS); every later sync
+replays the stored deltaLink and only transfers what changed since - usually a
+single small round trip.
+
+Key Features:
+- Adds, updates and removals (`@removed`) applied to the local store page by page
+- Plain-text bodies synced for the local full-text index (SYNC_INCLUDE_BODY)
+- deltaLink persisted per (account, folder), so syncs resume across restarts
+- Expired sync state (410 Gone) triggers a clean full resync of the folder
+- Removal tombstones older than SYNC_TOMBSTONE_DAYS are pruned after each sync
+- Stored ids are translated to the current id format (immutable ids) before
+  an account's first sync, so delta changes match the stored rows
+- Syncs of the same folder never overlap (the delta link is replayed by one at a time)
+- DeltaSyncScheduler: background task per (account, folder) with its own
+  interval (SYNC_FOLDERS), started and stopped by the app lifespan. Only the
+  worker (or server process) holding the store's sync lock file runs it; the
+  others keep trying to take the lock over in case that process exits
+
+Dependencies:
+- httpx: HTTP status errors
+- services.graph.paging: Lazy nextLink/deltaLink paging
+- services.sync.mail_store: Local SQLite store
+- services.sync.id_migration: Stored id translation
+- services.auth.account_pool: Account key normalization
+- services.email.query_planner: Summary field projection
+- services.email.fetch_cache: Invalidation of cached listings that changed
+- services.email.folder_cache: Custom folder name/path resolution
+- services.auth.token_store: Inter-process lock file
+- config.settings: Sync folders, intervals and page size
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any
+import httpx
+from config import settings
+from services.auth.account_pool import account_pool
+from services.email.query_planner import SUMMARY_FIELDS
+from services.email import fetch_cache
+from services.email.folder_cache import resolve_folder
+from services.graph.paging import iterate_pages
+from services.auth.token_store import try_lock_file
+from services.sync.mail_store import DEFAULT_STORE_PATH, get_mail_store
+from services.sync.id_migration import ensure_store_ids
+
+# One lock per (account, folder) so syncs of a folder never overlap
+_sync_locks: Dict[tuple, asyncio.Lock] = {}
+
+
+def _initial_delta_params() -> dict:
+    since = datetime.now(timezone.utc) - timedelta(days=settings.SYNC_INITIAL_DAYS)
+    fields = SUMMARY_FIELDS + ["body"] if settings.SYNC_INCLUDE_BODY else SUMMARY_FIELDS
+    return {
+        "$select": ",".join(fields),
+        "$filter": f"receivedDateTime ge {since.strftime('%Y-%m-%dT%H:%M:%SZ')}",
+    }
+
+
+async def _run_delta(account: str, folder: str) -> Dict[str, int]:
+    """Run one delta sync of a resolved folder (well-known name or folder id)."""
+    store = get_mail_store()
+    delta_link = await asyncio.to_thread(store.get_delta_link, account, folder)
+    if delta_link:
+        url, params = delta_link, None
+    else:
+        url, params = f"/me/mailFolders/{folder}/messages/delta", _initial_delta_params()
+    # Plain-text bodies are smaller and ready for the full-text index
+    headers = {"Prefer": f'odata.maxpagesize={settings.SYNC_PAGE_SIZE}, outlook.body-content-type="text"'}
+
+    counts = {"pages": 0, "upserted": 0, "removed": 0}
+    async for _, page in iterate_pages(url, params, account=account, headers=headers):
+        upserts, removed_ids = [], []
+        for item in page.get("value", []):
+            if "@removed" in item:
+                removed_ids.append(item["id"])
+            else:
+                upserts.append(item)
+        await asyncio.to_thread(store.apply_changes, account, folder, upserts, removed_ids)
+        counts["pages"] += 1
+        counts["upserted"] += len(upserts)
+        counts["removed"] += len(removed_ids)
+        if page.get("@odata.deltaLink"):
+            await asyncio.to_thread(store.set_delta_link, account, folder, page["@odata.deltaLink"])
+    return counts
+
+
+async def sync_folder(folder: str = "inbox", account: str | None = None) -> Dict[str, Any]:
+    """
+    Bring the local copy of a folder up to date with one delta sync.
+
+    Args:
+        folder (str): Well-known folder name, folder id, path or display name.
+        account (str | None): Mailbox account (default account if None).
+
+    Returns:
+        Dict[str, Any]: {"folder", "pages", "upserted", "removed", "resynced"}, where
+                        folder is the folder's key in the local store (well-known name or id)
+
+    Raises:
+        RuntimeError: If no access token is available.
+        ValueError: If the folder does not exist or its name is ambiguous.
+        httpx.HTTPError: If Graph requests fail.
+    """
+    account = account_pool.resolve(account)
+    await ensure_store_ids(account)
+    # "Inbox", "inbox" and a folder's path all sync into the same rows
+    folder_key = await resolve_folder(folder, account)
+    lock = _sync_locks.setdefault((account, folder_key), asyncio.Lock())
+    async with lock:
+        resynced = False
+        try:
+            counts = await _run_delta(account, folder_key)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 410:
+                raise
+            # Sync state expired on the server - start over from a full sync
+            await asyncio.to_thread(get_mail_store().reset_folder, account, folder_key)
+            counts = await _run_delta(account, folder_key)
+            resynced = True
+    await asyncio.to_thread(get_mail_store().prune_tombstones, account)
+    if counts["upserted"] or counts["removed"]:
+        fetch_cache.invalidate(account, folders={folder, folder_key})
+    return {"folder": folder_key, **counts, "resynced": resynced}
+
+
+class DeltaSyncScheduler:
+    """Runs periodic delta syncs for the configured accounts and folders."""
+
+    def __init__(self, folders: Dict[str, int] | None = None, accounts: list | None = None):
+        self.folders = folders if folders is not None else settings.SYNC_FOLDERS
+        self.accounts = accounts or settings.SYNC_ACCOUNTS or [settings.DEFAULT_ACCOUNT]
+        self.lock_path = f"{settings.MAIL_STORE_PATH or DEFAULT_STORE_PATH}.sync.lock"
+        self._lock_file = None
+        self._tasks: list[asyncio.Task] = []
+
+    async def _loop(self, account: str, folder: str, interval: int) -> None:
+        while True:
+            try:
+                await sync_folder(folder, account)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Not signed in yet, network trouble, throttling... try again next round
+                print(f"Warning: Delta sync of '{folder}' for '{account}' failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def _wait_for_lock(self) -> None:
+        # Another worker syncs; take over if it goes away
+        while self._lock_file is None:
+            await asyncio.sleep(min(self.folders.values(), default=60))
+            self._lock_file = try_lock_file(self.lock_path)
+        self._start_loops()
+
+    def _start_loops(self) -> None:
+        for account in self.accounts:
+            for folder, interval in self.folders.items():
+                self._tasks.append(asyncio.create_task(self._loop(account, folder, interval)))
+
+    def start(self) -> None:
+        """Start one background task per (account, folder), in the one process holding the sync lock."""
+        self._lock_file = try_lock_file(self.lock_path)
+        if self._lock_file is None:
+            self._tasks.append(asyncio.create_task(self._wait_for_lock()))
+        else:
+            self._start_loops()
+
+    async def stop(self) -> None:
+        """Cancel all background sync tasks and release the sync lock."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+async def get_new_emails(folder: str = "inbox", since: int = 0, top: int = 50, account: str | None = None) -> Dict[str, Any]:
+    """
+    Sync a folder and report what changed after the client's last sync token.
+
+    Args:
+        folder (str): Well-known folder name, folder id, path or display name.
+        since (int): sync_token from the previous call (0 for everything stored).
+        top (int): Maximum number of changed messages to return.
+        account (str | None): Mailbox account (default account if None).
+
+    Returns:
+        Dict[str, Any]: {"status": "success", "changed", "removed", "sync_token", "truncated", "sync"}
+                        or {"status": "error", "message": ...}
+    """
+    try:
+        sync = await sync_folder(folder, account)
+    except httpx.HTTPStatusError as http_err:
+        return {
+            "status": "error",
+            "message": f"HTTP Error {http_err.response.status_code}: {http_err.response.text}"
+        }
+    except Exception as e:
+        return {"status": "error", "message": f"Error syncing folder: {str(e)}"}
+
+    changes = await asyncio.to_thread(
+        get_mail_store().changes_since, account_pool.resolve(account), sync["folder"], since, top
+    )
+    return {"status": "success", **changes, "sync": sync}
@@ -0,0 +1,85 @@
+"""
+Stored Message Id Migration for Outlook MCP Server
+
+Ids in the local mail store are only useful while they match the ids Graph
+hands out. When the id format changes (GRAPH_IMMUTABLE_IDS switched on for an
+existing store, or off again), this module translates every stored id of an
+account in bulk with translateExchangeIds, folder by folder, so the mirror,
+its search index and its delta links stay valid without a full resync.
+
+Key Features:
+- migrate_store_ids(): translate the stored ids of every folder whose id
+  format differs from the one requested from Graph
+- Ids Graph cannot translate (usually messages deleted since they were
+  stored, and most removal tombstones) are dropped one by one; the rest of
+  the folder is kept
+- A folder none of whose messages translate (ids stored in another format
+  than recorded) is reset and fully resynced by the next delta sync instead
+- Runs once per account and process before the store is first written or
+  searched (delta sync, fetch mirroring, local search)
+
+Dependencies:
+- services.graph.id_translation: translateExchangeIds wrapper
+- services.sync.mail_store: Local SQLite store
+- services.auth.account_pool: Account key normalization
+"""
+
+import asyncio
+from typing import Dict, Any
+from services.auth.account_pool import account_pool
+from services.graph.id_translation import translate_exchange_ids
+from services.sync.mail_store import get_mail_store
+
+_migrated_accounts: set = set()
+_migration_lock = asyncio.Lock()
+
+
+async def migrate_store_ids(account: str | None = None) -> Dict[str, Any]:
+    """
+    Translate an account's stored message ids to the id format requested from Graph.
+
+    Args:
+        account (str | None): Mailbox account (default account if None).
+
+    Returns:
+        Dict[str, Any]: {"translated": {folder: id count}, "dropped": {folder: id count},
+                         "reset": [folders left to a full resync]}
+
+    Raises:
+        httpx.HTTPStatusError: If a translation call fails (nothing is changed for that folder).
+        RuntimeError: If no access token is available.
+    """
+    account = account_pool.resolve(account)
+    store = get_mail_store()
+    report = {"translated": {}, "dropped": {}, "reset": []}
+    folders = await asyncio.to_thread(store.folders_to_translate, account)
+    for folder, id_type in folders.items():
+        message_ids = await asyncio.to_thread(store.stored_ids, account, folder)
+        tombstone_ids = await asyncio.to_thread(store.tombstone_ids, account, folder)
+        ids = list(dict.fromkeys(message_ids + tombstone_ids))
+        mapping = await translate_exchange_ids(ids, id_type, store.id_type, account=account)
+        if message_ids and not any(message_id in mapping for message_id in message_ids):
+            # Not a few deleted messages - the stored ids are not in the recorded format
+            await asyncio.to_thread(store.reset_folder, account, folder)
+            report["reset"].append(folder)
+            continue
+        untranslated = [id_ for id_ in ids if id_ not in mapping]
+        await asyncio.to_thread(store.replace_ids, account, folder, mapping, untranslated)
+        report["translated"][folder] = len(mapping)
+        if untranslated:
+            report["dropped"][folder] = len(untranslated)
+    return report
+
+
+async def ensure_store_ids(account: str | None = None) -> None:
+    """Run migrate_store_ids() once per account and process (retried next time if it fails)."""
+    account = account_pool.resolve(account)
+    if account in _migrated_accounts:
+        return
+    async with _migration_lock:
+        if account in _migrated_accounts:
+            return
+        report = await migrate_store_ids(account)
+        if report["translated"] or report["dropped"] or report["reset"]:
+            print(f"Stored message ids of '{account}' migrated: {report}")
+        _migrated_accounts.add(account)
@@ -0,0 +1,73 @@
+"""
+Local Full-Text Email Search for Outlook MCP Server
+
+Answers searches from the local mail store (FTS5, BM25 ranking) instead of
+Graph: no network round trip and no throttling. The mirror is only as current
+as the last delta sync or fetch, so every answer carries a freshness report.
+
+Dependencies:
+- services.sync.mail_store: Local SQLite store with the full-text index
+- services.auth.account_pool: Account key normalization
+- services.email.folder_cache: Folder name/path resolution to the stored folder key
+- services.sync.id_migration: Stored ids translated to the current id format before searching
+"""
+
+import asyncio
+import time
+from typing import Dict, Any
+from services.auth.account_pool import account_pool
+from services.email.folder_cache import resolve_folder
+from services.sync.mail_store import get_mail_store
+from services.sync.id_migration import ensure_store_ids
+
+
+async def search_local_emails(query: str, folder: str | None = None, top: int = 20, account: str | None = None) -> Dict[str, Any]:
+    """
+    Search the locally mirrored emails of an account.
+
+    Args:
+        query (str): Free text; every word must appear (prefix match) in subject, sender, preview or body.
+        folder (str | None): Restrict the search to one folder.
+        top (int): Maximum number of results.
+        account (str | None): Mailbox account (default account if None).
+
+    Returns:
+        Dict[str, Any]:
+            - status: "success" or "error"
+            - results: Email summaries ranked best first, with folder, score and snippet
+            - took_ms: Local query time
+            - freshness: Per folder synced_at / updated_at / age_seconds / stale
+            - stale: True if any searched folder is stale or nothing has been mirrored yet
+    """
+    if not query or not query.strip():
+        return {"status": "error", "message": "A search query is required"}
+
+    account_key = account_pool.resolve(account)
+    try:
+        # Results must carry ids in the format Graph accepts now, not the one they were stored in
+        await ensure_store_ids(account_key)
+    except Exception as e:
+        print(f"Warning: Could not migrate stored message ids before local search: {e}")
+    if folder:
+        try:
+            # Folders are stored under their well-known name or id
+            folder = await resolve_folder(folder, account)
+        except Exception as e:
+            # Still answer offline; only an exact stored key can match then
+            print(f"Warning: Could not resolve folder '{folder}' for local search: {e}")
+    try:
+        store = get_mail_store()
+        started = time.perf_counter()
+        results = await asyncio.to_thread(store.search, account_key, query, folder, top)
+        took_ms = (time.perf_counter() - started) * 1000
+        freshness = await asyncio.to_thread(store.freshness, account_key, folder)
+    except Exception as e:
+        return {"status": "error", "message": f"Error searching local emails: {str(e)}"}
+
+    return {
+        "status": "success",
+        "results": results,
+        "took_ms": round(took_ms, 2),
+        "freshness": freshness,
+        "stale": not freshness or any(info["stale"] for info in freshness.values()),
+    }
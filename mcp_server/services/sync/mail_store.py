@@ -0,0 +1,657 @@
+"""
+Local Mail Store for Outlook MCP Server
+
+A small SQLite database holding the messages mirrored by the delta sync
+engine (and seen by fetch_outlook_emails), plus each folder's delta link. It
+lets "what's new" questions be answered from disk after one small delta round
+trip, and searches be answered locally in milliseconds instead of through Graph.
+
+Key Features:
+- WAL journal mode: readers (searches) never wait for the sync writer
+- FTS5 full-text index over subject, sender, preview and body, kept in step
+  by triggers and keyed on the messages' explicit INTEGER PRIMARY KEY (which,
+  unlike an implicit rowid, VACUUM never renumbers); results ranked with BM25
+  (subject matches weigh most). Falls back to LIKE matching when SQLite is
+  built without FTS5
+- Freshness per folder: when it was last delta-synced and last written
+- Messages keyed by (account, folder, id); updates merge with the stored row,
+  so partial delta items never erase known fields
+- Removals are kept as tombstones so clients can learn about deletions, for
+  SYNC_TOMBSTONE_DAYS; a client whose sync token is older than the newest
+  pruned tombstone is told to rebuild its view (reset)
+- Every applied change gets an increasing per-account sequence number; clients
+  pass the last number they saw (the sync token) to get only newer changes.
+  Messages merely seen by a fetch are stored without one
+- Rows are keyed by the resolved folder (well-known name or folder id), so
+  "Inbox", "inbox" and the folder's path share one copy
+- Delta link and last sync time persisted per (account, folder)
+- The id format of each folder's stored ids is recorded, so ids stored before
+  the switch to immutable ids can be translated in place (replace_ids)
+
+Dependencies:
+- sqlite3 (standard library)
+- services.graph.id_translation: Id format requested from Graph
+- config.settings: MAIL_STORE_PATH, LOCAL_SEARCH_STALE_AFTER and SYNC_TOMBSTONE_DAYS
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Any
+from config import settings
+from services.graph.id_translation import REST_ID, current_id_type
+
+
+def _fts5_available() -> bool:
+    try:
+        sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE probe USING fts5(text)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+FTS5_AVAILABLE = _fts5_available()
+
+DEFAULT_STORE_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", ".mailstore", "mailbox.sqlite3")
+)
+
+MESSAGES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    pk INTEGER PRIMARY KEY,
+    account TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    id TEXT NOT NULL,
+    subject TEXT,
+    sender TEXT,
+    received TEXT,
+    is_read INTEGER,
+    preview TEXT,
+    body TEXT,
+    seq INTEGER NOT NULL,
+    UNIQUE (account, folder, id)
+);
+CREATE INDEX IF NOT EXISTS messages_seq ON messages (account, folder, seq);
+"""
+
+SCHEMA = MESSAGES_SCHEMA + """
+CREATE TABLE IF NOT EXISTS removals (
+    account TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    removed_at REAL
+);
+CREATE INDEX IF NOT EXISTS removals_seq ON removals (account, folder, seq);
+CREATE TABLE IF NOT EXISTS sync_state (
+    account TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    delta_link TEXT,
+    synced_at REAL,
+    updated_at REAL,
+    id_type TEXT,
+    PRIMARY KEY (account, folder)
+);
+CREATE TABLE IF NOT EXISTS sequences (
+    account TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    pruned_seq INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    subject, sender, preview, body,
+    content = 'messages', content_rowid = 'pk',
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, subject, sender, preview, body)
+    VALUES (new.pk, new.subject, new.sender, new.preview, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, subject, sender, preview, body)
+    VALUES ('delete', old.pk, old.subject, old.sender, old.preview, old.body);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, subject, sender, preview, body)
+    VALUES ('delete', old.pk, old.subject, old.sender, old.preview, old.body);
+    INSERT INTO messages_fts (rowid, subject, sender, preview, body)
+    VALUES (new.pk, new.subject, new.sender, new.preview, new.body);
+END;
+"""
+
+# Columns added after the first release of the store
+MIGRATIONS = [
+    ("messages", "body", "TEXT"),
+    ("sync_state", "updated_at", "REAL"),
+    ("sync_state", "id_type", "TEXT"),  # NULL: stored before id formats were tracked (rest ids)
+    ("removals", "removed_at", "REAL"),  # NULL until the migration dates older tombstones to its own run
+    ("sequences", "pruned_seq", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+# Rebuilds the messages table of stores created before it had an explicit key, keeping each row's rowid
+REKEY_MESSAGES = """
+DROP TRIGGER IF EXISTS messages_fts_insert;
+DROP TRIGGER IF EXISTS messages_fts_delete;
+DROP TRIGGER IF EXISTS messages_fts_update;
+DROP TABLE IF EXISTS messages_fts;
+ALTER TABLE messages RENAME TO messages_unkeyed;
+DROP INDEX IF EXISTS messages_seq;
+""" + MESSAGES_SCHEMA + """
+INSERT INTO messages (pk, account, folder, id, subject, sender, received, is_read, preview, body, seq)
+SELECT rowid, account, folder, id, subject, sender, received, is_read, preview, body, seq FROM messages_unkeyed;
+DROP TABLE messages_unkeyed;
+"""
+
+UPSERT_MESSAGE = """
+INSERT INTO messages (account, folder, id, subject, sender, received, is_read, preview, body, seq)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (account, folder, id) DO UPDATE SET
+    subject = COALESCE(excluded.subject, subject),
+    sender = COALESCE(excluded.sender, sender),
+    received = COALESCE(excluded.received, received),
+    is_read = COALESCE(excluded.is_read, is_read),
+    preview = COALESCE(excluded.preview, preview),
+    body = COALESCE(excluded.body, body),
+    seq = {seq}
+"""
+
+# BM25 column weights: subject, sender, preview, body
+RANK_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+TAG_PATTERN = re.compile(r"<[^>]+>")
+
+
+def body_text(message: dict) -> str | None:
+    """Plain-text body of a Graph message (HTML tags stripped), or None if the body was not requested."""
+    body = message.get("body")
+    if not body:
+        return None
+    content = body.get("content") or ""
+    if (body.get("contentType") or "").lower() == "html":
+        content = " ".join(TAG_PATTERN.sub(" ", content).split())
+    return content
+
+
+def fts_query(query: str) -> str:
+    """
+    Turn free text into an FTS5 query: every word must match (as a prefix).
+
+    Example:
+        fts_query('budget "q3') -> '"budget"* "q3"*'
+    """
+    terms = re.findall(r"\w+", query.lower())
+    return " ".join('"' + term.replace('"', '""') + '"*' for term in terms)
+
+
+def _iso(timestamp: float | None) -> str | None:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds")
+
+
+def message_row(message: dict) -> tuple:
+    """Extract the stored columns from a Graph message (missing properties become NULL)."""
+    sender = message.get("from")
+    is_read = message.get("isRead")
+    return (
+        message.get("subject"),
+        (sender or {}).get("emailAddress", {}).get("address") if "from" in message else None,
+        message.get("receivedDateTime"),
+        int(is_read) if is_read is not None else None,
+        message.get("bodyPreview"),
+        body_text(message),
+    )
+
+
+def row_summary(row: sqlite3.Row) -> dict:
+    """Render a stored message like fetch_outlook_emails' email summaries."""
+    return {
+        "id": row["id"],
+        "subject": row["subject"] or "",
+        "from": row["sender"] or "",
+        "received": row["received"] or "",
+        "is_read": bool(row["is_read"]),
+        "preview": row["preview"] or "",
+    }
+
+
+class MailStore:
+    """Thread-safe access to the local SQLite mail store."""
+
+    def __init__(self, path: str | None = None):
+        self.path = path or settings.MAIL_STORE_PATH or DEFAULT_STORE_PATH
+        self.id_type = current_id_type()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            with self._conn:
+                self._conn.executescript(SCHEMA)
+                self._migrate()
+                if FTS5_AVAILABLE:
+                    self._create_fts_index()
+        if not FTS5_AVAILABLE:
+            print("Warning: SQLite was built without FTS5 - local search falls back to unranked LIKE matching")
+        # Separate connection for queries, so searches read the last committed state while a sync writes
+        self._read_lock = threading.Lock()
+        self._reader = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._reader.row_factory = sqlite3.Row
+
+    def _migrate(self) -> None:
+        for table, column, column_type in MIGRATIONS:
+            columns = {row["name"] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+        # Tombstones from before removed_at was recorded start their retention now
+        self._conn.execute("UPDATE removals SET removed_at = ? WHERE removed_at IS NULL", (time.time(),))
+        if "pk" not in {row["name"] for row in self._conn.execute("PRAGMA table_info(messages)")}:
+            # The FTS index (rebuilt by _create_fts_index) is keyed on pk, not the renumberable rowid
+            self._conn.executescript(REKEY_MESSAGES)
+
+    def _create_fts_index(self) -> None:
+        exists = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+        ).fetchone()
+        self._conn.executescript(FTS_SCHEMA)
+        if not exists:
+            # Index messages stored before the index existed
+            self._conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+
+    def _touch_folder(self, account: str, folder: str) -> None:
+        self._conn.execute(
+            "INSERT INTO sync_state (account, folder, updated_at, id_type) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (account, folder) DO UPDATE SET updated_at = excluded.updated_at",
+            (account, folder, time.time(), self.id_type),
+        )
+
+    def close(self) -> None:
+        with self._lock, self._read_lock:
+            self._reader.close()
+            self._conn.close()
+
+    def _next_seq(self, account: str, count: int) -> int:
+        """Reserve `count` sequence numbers for an account and return the first one."""
+        row = self._conn.execute("SELECT seq FROM sequences WHERE account = ?", (account,)).fetchone()
+        current = row["seq"] if row else 0
+        self._conn.execute(
+            "INSERT INTO sequences (account, seq) VALUES (?, ?) "
+            "ON CONFLICT (account) DO UPDATE SET seq = excluded.seq",
+            (account, current + count),
+        )
+        return current + 1
+
+    def current_seq(self, account: str) -> int:
+        with self._read_lock:
+            row = self._reader.execute("SELECT seq FROM sequences WHERE account = ?", (account,)).fetchone()
+        return row["seq"] if row else 0
+
+    def apply_changes(self, account: str, folder: str, upserts: List[dict], removed_ids: List[str]) -> None:
+        """
+        Apply one page of delta changes atomically.
+
+        Args:
+            account (str): Account key.
+            folder (str): Folder the changes belong to.
+            upserts (List[dict]): Added or updated Graph messages.
+            removed_ids (List[str]): Ids of messages removed from the folder.
+        """
+        if not upserts and not removed_ids:
+            return
+        with self._lock, self._conn:
+            seq = self._next_seq(account, len(upserts) + len(removed_ids))
+            for offset, message in enumerate(upserts):
+                self._conn.execute(
+                    UPSERT_MESSAGE.format(seq="excluded.seq"),
+                    (account, folder, message["id"], *message_row(message), seq + offset)
+                )
+            seq += len(upserts)
+            for offset, message_id in enumerate(removed_ids):
+                self._remove(account, folder, message_id, seq + offset)
+            self._touch_folder(account, folder)
+
+    def _remove(self, account: str, folder: str, message_id: str, seq: int) -> None:
+        self._conn.execute(
+            "DELETE FROM messages WHERE account = ? AND folder = ? AND id = ?", (account, folder, message_id)
+        )
+        self._conn.execute(
+            "INSERT INTO removals (account, folder, id, seq, removed_at) VALUES (?, ?, ?, ?, ?)",
+            (account, folder, message_id, seq, time.time()),
+        )
+
+    def prune_tombstones(self, account: str, max_age: float | None = None) -> int:
+        """
+        Delete an account's tombstones older than the retention period.
+
+        The newest pruned sequence number is remembered, so clients whose sync
+        token predates it get a reset instead of silently missing removals.
+
+        Args:
+            account (str): Account key.
+            max_age (float | None): Retention in seconds (SYNC_TOMBSTONE_DAYS if None).
+
+        Returns:
+            int: Number of tombstones deleted.
+        """
+        if max_age is None:
+            max_age = settings.SYNC_TOMBSTONE_DAYS * 24 * 60 * 60
+        cutoff = time.time() - max_age
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT MAX(seq) AS seq, COUNT(*) AS count FROM removals WHERE account = ? AND removed_at < ?",
+                (account, cutoff),
+            ).fetchone()
+            if not row["count"]:
+                return 0
+            self._conn.execute("DELETE FROM removals WHERE account = ? AND removed_at < ?", (account, cutoff))
+            self._conn.execute(
+                "UPDATE sequences SET pruned_seq = MAX(pruned_seq, ?) WHERE account = ?", (row["seq"], account)
+            )
+        return row["count"]
+
+    def remove_message(self, account: str, message_id: str) -> List[str]:
+        """
+        Remove a message deleted outside the delta sync (e.g. by delete_email) from every folder holding it.
+
+        Each removal gets a sequence number and a tombstone, as a delta removal does.
+
+        Args:
+            account (str): Account key.
+            message_id (str): Id of the deleted message.
+
+        Returns:
+            List[str]: Folders the message was removed from.
+        """
+        with self._lock, self._conn:
+            folders = [row["folder"] for row in self._conn.execute(
+                "SELECT folder FROM messages WHERE account = ? AND id = ?", (account, message_id)
+            )]
+            if not folders:
+                return []
+            seq = self._next_seq(account, len(folders))
+            for offset, folder in enumerate(folders):
+                self._remove(account, folder, message_id, seq + offset)
+                self._touch_folder(account, folder)
+        return folders
+
+    def record_messages(self, account: str, folder: str, messages: List[dict]) -> None:
+        """
+        Merge messages seen outside the delta sync (e.g. by a fetch) into the store.
+
+        A fetch is not a change feed: messages new to the store get no sequence
+        number (seq 0), and known messages keep theirs, so get_new_emails clients
+        only hear about them once the delta sync applies a change.
+
+        Args:
+            account (str): Account key.
+            folder (str): Folder key (well-known name or folder id) the messages were listed from.
+            messages (List[dict]): Graph messages (summary or full).
+        """
+        if not messages:
+            return
+        with self._lock, self._conn:
+            for message in messages:
+                self._conn.execute(
+                    UPSERT_MESSAGE.format(seq="seq"),
+                    (account, folder, message["id"], *message_row(message), 0)
+                )
+            self._touch_folder(account, folder)
+
+    def reset_folder(self, account: str, folder: str) -> None:
+        """Forget a folder's messages, tombstones and delta link (before a full resync)."""
+        with self._lock, self._conn:
+            for table in ("messages", "removals", "sync_state"):
+                self._conn.execute(f"DELETE FROM {table} WHERE account = ? AND folder = ?", (account, folder))
+
+    def folders_to_translate(self, account: str) -> Dict[str, str]:
+        """
+        Folders whose stored ids are not in the id format requested from Graph.
+
+        Returns:
+            Dict[str, str]: folder -> id format of its stored ids.
+        """
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT folder, COALESCE(id_type, ?) AS id_type FROM sync_state "
+                "WHERE account = ? AND COALESCE(id_type, ?) != ?",
+                (REST_ID, account, REST_ID, self.id_type),
+            ).fetchall()
+        return {row["folder"]: row["id_type"] for row in rows}
+
+    def stored_ids(self, account: str, folder: str) -> List[str]:
+        """Ids of a folder's stored messages."""
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT id FROM messages WHERE account = ? AND folder = ?", (account, folder)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def tombstone_ids(self, account: str, folder: str) -> List[str]:
+        """Ids of a folder's removal tombstones (messages that no longer exist)."""
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT DISTINCT id FROM removals WHERE account = ? AND folder = ?", (account, folder)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def replace_ids(self, account: str, folder: str, mapping: Dict[str, str], forget: Iterable[str] = ()) -> None:
+        """
+        Rewrite a folder's stored ids (e.g. to immutable ids) and record the new id format.
+
+        A message already stored under its new id (seen again since the switch)
+        keeps that row; the row under the old id is dropped.
+
+        Args:
+            account (str): Account key.
+            folder (str): Folder whose ids are rewritten.
+            mapping (Dict[str, str]): Old id -> new id.
+            forget (Iterable[str]): Ids that could not be translated; their messages and tombstones are deleted.
+        """
+        with self._lock, self._conn:
+            for old_id, new_id in mapping.items():
+                if old_id == new_id:
+                    continue
+                exists = self._conn.execute(
+                    "SELECT 1 FROM messages WHERE account = ? AND folder = ? AND id = ?", (account, folder, new_id)
+                ).fetchone()
+                if exists:
+                    # Plain DELETE rather than UPDATE OR REPLACE, so the FTS delete trigger runs
+                    self._conn.execute(
+                        "DELETE FROM messages WHERE account = ? AND folder = ? AND id = ?", (account, folder, old_id)
+                    )
+                else:
+                    self._conn.execute(
+                        "UPDATE messages SET id = ? WHERE account = ? AND folder = ? AND id = ?",
+                        (new_id, account, folder, old_id),
+                    )
+                self._conn.execute(
+                    "UPDATE removals SET id = ? WHERE account = ? AND folder = ? AND id = ?",
+                    (new_id, account, folder, old_id),
+                )
+            for message_id in forget:
+                for table in ("messages", "removals"):
+                    self._conn.execute(
+                        f"DELETE FROM {table} WHERE account = ? AND folder = ? AND id = ?", (account, folder, message_id)
+                    )
+            self._conn.execute(
+                "UPDATE sync_state SET id_type = ? WHERE account = ? AND folder = ?", (self.id_type, account, folder)
+            )
+
+    def get_delta_link(self, account: str, folder: str) -> str | None:
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT delta_link FROM sync_state WHERE account = ? AND folder = ?", (account, folder)
+            ).fetchone()
+        return row["delta_link"] if row else None
+
+    def set_delta_link(self, account: str, folder: str, delta_link: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO sync_state (account, folder, delta_link, synced_at, updated_at, id_type) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (account, folder) DO UPDATE SET "
+                "delta_link = excluded.delta_link, synced_at = excluded.synced_at, updated_at = excluded.updated_at",
+                (account, folder, delta_link, time.time(), time.time(), self.id_type),
+            )
+
+    def synced_at(self, account: str, folder: str) -> float | None:
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT synced_at FROM sync_state WHERE account = ? AND folder = ?", (account, folder)
+            ).fetchone()
+        return row["synced_at"] if row else None
+
+    def changes_since(self, account: str, folder: str, since: int, limit: int = 50) -> Dict[str, Any]:
+        """
+        Return the changes applied to a folder after sequence number `since`.
+
+        Changes are returned in the order they were applied. When more than
+        `limit` messages changed, the sync token stops at the last one returned,
+        so the next call picks up the rest.
+
+        Args:
+            account (str): Account key.
+            folder (str): Folder name or id.
+            since (int): Last sequence number the client has seen (0 for everything).
+            limit (int): Maximum number of changed messages to return.
+
+        Returns:
+            Dict[str, Any]:
+                - changed: Email summaries of added/updated messages
+                - removed: Ids of removed messages
+                - sync_token: Sequence number to pass as `since` next time
+                - truncated: True if more changes are waiting after sync_token
+                - reset: True if removals after `since` were pruned; the changes are then
+                  everything stored (as for since=0) and replace the client's view
+        """
+        with self._read_lock:
+            # Bound by the current sequence so a concurrent write is never half-reported
+            row = self._reader.execute(
+                "SELECT seq, pruned_seq FROM sequences WHERE account = ?", (account,)
+            ).fetchone()
+            current = row["seq"] if row else 0
+            reset = 0 < since < (row["pruned_seq"] if row else 0)
+            if reset:
+                since = 0
+            rows = self._reader.execute(
+                "SELECT * FROM messages WHERE account = ? AND folder = ? AND seq > ? AND seq <= ? "
+                "ORDER BY seq LIMIT ?",
+                (account, folder, since, current, limit + 1),
+            ).fetchall()
+            truncated = len(rows) > limit
+            # Only report up to the last returned change; later ones come with the next token
+            token = (rows[limit - 1]["seq"] if limit > 0 else since) if truncated else current
+            removed = self._reader.execute(
+                "SELECT id FROM removals WHERE account = ? AND folder = ? AND seq > ? AND seq <= ? ORDER BY seq",
+                (account, folder, since, token),
+            ).fetchall()
+        return {
+            "changed": [row_summary(r) for r in rows[:limit]],
+            "removed": [r["id"] for r in removed],
+            "sync_token": token,
+            "truncated": truncated,
+            "reset": reset,
+        }
+
+    def search(self, account: str, query: str, folder: str | None = None, limit: int = 20) -> List[dict]:
+        """
+        Full-text search over the stored messages of an account.
+
+        Args:
+            account (str): Account key.
+            query (str): Free text; every word must match (prefix match).
+            folder (str | None): Restrict to one folder.
+            limit (int): Maximum number of results.
+
+        Returns:
+            List[dict]: Email summaries, best match first, each with "folder",
+                        "score" (higher is better) and a highlighted "snippet".
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        folder_clause = "AND m.folder = ?" if folder else ""
+        folder_args = (folder,) if folder else ()
+        with self._read_lock:
+            if FTS5_AVAILABLE:
+                rows = self._reader.execute(
+                    f"SELECT m.*, bm25(messages_fts, {', '.join(map(str, RANK_WEIGHTS))}) AS rank, "
+                    "snippet(messages_fts, -1, '[', ']', '...', 12) AS snippet "
+                    "FROM messages_fts JOIN messages m ON m.pk = messages_fts.rowid "
+                    f"WHERE messages_fts MATCH ? AND m.account = ? {folder_clause} "
+                    "ORDER BY rank LIMIT ?",
+                    (match, account, *folder_args, limit),
+                ).fetchall()
+            else:
+                terms = re.findall(r"\w+", query.lower())
+                like = " AND ".join(
+                    "(LOWER(COALESCE(m.subject, '') || ' ' || COALESCE(m.sender, '') || ' ' || "
+                    "COALESCE(m.preview, '') || ' ' || COALESCE(m.body, '')) LIKE ?)"
+                    for _ in terms
+                )
+                rows = self._reader.execute(
+                    f"SELECT m.*, 0 AS rank, m.preview AS snippet FROM messages m "
+                    f"WHERE {like} AND m.account = ? {folder_clause} ORDER BY m.received DESC LIMIT ?",
+                    (*[f"%{term}%" for term in terms], account, *folder_args, limit),
+                ).fetchall()
+        return [
+            {**row_summary(row), "folder": row["folder"], "score": round(-row["rank"], 3), "snippet": row["snippet"] or ""}
+            for row in rows
+        ]
+
+    def freshness(self, account: str, folder: str | None = None) -> Dict[str, Any]:
+        """
+        Describe how current the local copy of an account's folders is.
+
+        Args:
+            account (str): Account key.
+            folder (str | None): Only report this folder.
+
+        Returns:
+            Dict[str, Any]: Per folder: synced_at (last delta sync), updated_at
+                            (last write from any source), age_seconds and stale
+                            (older than LOCAL_SEARCH_STALE_AFTER or never delta-synced).
+        """
+        folder_clause = "AND folder = ?" if folder else ""
+        with self._read_lock:
+            rows = self._reader.execute(
+                f"SELECT folder, synced_at, updated_at FROM sync_state WHERE account = ? {folder_clause}",
+                (account, *((folder,) if folder else ())),
+            ).fetchall()
+        now = time.time()
+        report = {}
+        for row in rows:
+            last = row["synced_at"] or row["updated_at"]
+            age = int(now - last) if last else None
+            report[row["folder"]] = {
+                "synced_at": _iso(row["synced_at"]),
+                "updated_at": _iso(row["updated_at"]),
+                "age_seconds": age,
+                "stale": row["synced_at"] is None or age > settings.LOCAL_SEARCH_STALE_AFTER,
+            }
+        return report
+
+
+_store: MailStore | None = None
+
+
+def get_mail_store() -> MailStore:
+    """Return the process-wide mail store, opening it on first use."""
+    global _store
+    if _store is None:
+        _store = MailStore()
+    return _store
+
+
+def close_mail_store() -> None:
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
@@ -0,0 +1,50 @@
+"""
+In-process stdio entry point for the Outlook MCP server.
+
+Runs the FastMCP email server directly over stdin/stdout, for MCP clients
+that launch their servers as subprocesses (Claude Desktop). Compared with
+devtools/claude/proxy_claude_stdio.py + main.py there is no HTTP hop: no
+loopback round trip, no extra JSON encode/decode per call, no waiting for
+an HTTP server to come up. The shared services (Graph client, account pool,
+background sync) are the same and are started by the session's lifespan.
+
+stdout carries the protocol, so everything the services print goes to
+stderr instead. Sign-in is not forced at startup; use login_tool when no
+token is cached.
+
+Usage:
+    python stdio_main.py
+"""
+
+import io
+import os
+import sys
+
+if "mcp_server" not in sys.path:
+    sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import anyio
+from mcp.server.stdio import stdio_server
+
+from app.lifespan import service_lifespan
+from server.mcp_email_server import create_email_mcp_server
+
+
+async def run_stdio(protocol_out: io.BufferedWriter) -> None:
+    """Serve one MCP session over stdin and `protocol_out`."""
+    mcp_app = create_email_mcp_server(lifespan=lambda server: service_lifespan())
+    stdout = anyio.wrap_file(io.TextIOWrapper(protocol_out, encoding="utf-8"))
+    async with stdio_server(stdout=stdout) as (read_stream, write_stream):
+        server = mcp_app._mcp_server  # noqa: SLF001
+        await server.run(read_stream, write_stream, server.create_initialization_options())
+
+
+def main() -> None:
+    protocol_out = sys.stdout.buffer
+    # Keep print() output (warnings, status messages) out of the protocol stream
+    sys.stdout = sys.stderr
+    anyio.run(run_stdio, protocol_out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Tests for the local mail store (MailStore): change feed, removals, id replacement and the full-text index.
+
+Run from the mcp_server directory:
+    python -m unittest discover tests
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+
+os.environ.setdefault("OUTLOOK_SCOPES", "Mail.Read")
+
+from services.sync.mail_store import FTS5_AVAILABLE, MailStore
+
+
+def message(message_id: str, received: str) -> dict:
+    return {"id": message_id, "subject": message_id, "receivedDateTime": received, "isRead": False}
+
+
+class ChangesSinceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="mailstore-test-")
+        self.store = MailStore(os.path.join(self.directory, "mailbox.sqlite3"))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def test_truncated_changes_resume_after_last_returned(self):
+        # Received dates run opposite to the order the changes were applied
+        self.store.apply_changes("a", "inbox", [message(f"m{i}", f"2026-01-0{6 - i}T00:00:00Z") for i in range(5)], [])
+
+        seen = []
+        token = 0
+        for _ in range(5):
+            changes = self.store.changes_since("a", "inbox", token, limit=2)
+            seen.extend(summary["id"] for summary in changes["changed"])
+            token = changes["sync_token"]
+            if not changes["truncated"]:
+                break
+
+        self.assertEqual(seen, ["m0", "m1", "m2", "m3", "m4"])
+        self.assertEqual(token, self.store.current_seq("a"))
+        self.assertEqual(self.store.changes_since("a", "inbox", token, limit=2)["changed"], [])
+
+    def test_removals_after_the_token_wait_for_the_next_call(self):
+        self.store.apply_changes("a", "inbox", [message("m0", "2026-01-01T00:00:00Z"), message("m1", "2026-01-02T00:00:00Z")], [])
+        self.store.apply_changes("a", "inbox", [], ["gone"])
+
+        first = self.store.changes_since("a", "inbox", 0, limit=1)
+        self.assertTrue(first["truncated"])
+        self.assertEqual(first["removed"], [])
+
+        second = self.store.changes_since("a", "inbox", first["sync_token"], limit=1)
+        self.assertEqual([summary["id"] for summary in second["changed"]], ["m1"])
+        self.assertEqual(second["removed"], ["gone"])
+        self.assertFalse(second["truncated"])
+
+    def test_fetched_messages_are_not_reported_as_changes(self):
+        self.store.apply_changes("a", "inbox", [message("m0", "2026-01-01T00:00:00Z")], [])
+        token = self.store.changes_since("a", "inbox", 0)["sync_token"]
+
+        self.store.record_messages("a", "inbox", [message("m0", "2026-01-01T00:00:00Z"), message("old", "2025-01-01T00:00:00Z")])
+
+        self.assertEqual(self.store.current_seq("a"), token)
+        self.assertEqual(self.store.changes_since("a", "inbox", token)["changed"], [])
+        self.assertEqual([summary["id"] for summary in self.store.changes_since("a", "inbox", 0)["changed"]], ["m0"])
+
+    def test_replace_ids_forgets_untranslated_ids_only(self):
+        self.store.apply_changes("a", "inbox", [message("m0", "2026-01-01T00:00:00Z"), message("gone", "2026-01-02T00:00:00Z")], ["t0", "t1"])
+
+        self.store.replace_ids("a", "inbox", {"m0": "M0", "t0": "T0"}, forget=["gone", "t1"])
+
+        self.assertEqual(self.store.stored_ids("a", "inbox"), ["M0"])
+        self.assertEqual(self.store.tombstone_ids("a", "inbox"), ["T0"])
+
+    def test_removed_message_leaves_every_folder_with_a_tombstone(self):
+        self.store.apply_changes("a", "inbox", [message("m0", "2026-01-01T00:00:00Z")], [])
+        self.store.record_messages("a", "archive", [message("m0", "2026-01-01T00:00:00Z")])
+        token = self.store.current_seq("a")
+
+        self.assertEqual(sorted(self.store.remove_message("a", "m0")), ["archive", "inbox"])
+
+        self.assertEqual(self.store.stored_ids("a", "inbox"), [])
+        self.assertEqual(self.store.search("a", "m0"), [])
+        self.assertEqual(self.store.changes_since("a", "inbox", token)["removed"], ["m0"])
+        self.assertEqual(self.store.remove_message("a", "m0"), [])
+
+    def test_pruned_tombstones_reset_older_tokens(self):
+        self.store.apply_changes("a", "inbox", [message("m0", "2026-01-01T00:00:00Z")], ["gone"])
+        old_token = 1
+        self.store.apply_changes("a", "inbox", [], ["recent"])
+        self.store._conn.execute("UPDATE removals SET removed_at = ? WHERE id = 'gone'", (time.time() - 3600,))
+        self.store._conn.commit()
+
+        self.assertEqual(self.store.prune_tombstones("a", max_age=60), 1)
+
+        changes = self.store.changes_since("a", "inbox", old_token)
+        self.assertTrue(changes["reset"])
+        self.assertEqual([summary["id"] for summary in changes["changed"]], ["m0"])
+        self.assertEqual(changes["removed"], ["recent"])
+        self.assertFalse(self.store.changes_since("a", "inbox", changes["sync_token"])["reset"])
+
+
+@unittest.skipUnless(FTS5_AVAILABLE, "SQLite built without FTS5")
+class FullTextIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="mailstore-test-")
+        self.path = os.path.join(self.directory, "mailbox.sqlite3")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_index_survives_vacuum(self):
+        store = MailStore(self.path)
+        store.apply_changes("a", "inbox", [message(f"m{i}", "2026-01-01T00:00:00Z") for i in range(4)], ["m1", "m2"])
+        store._conn.execute("VACUUM")
+
+        self.assertEqual([result["id"] for result in store.search("a", "m3")], ["m3"])
+        store.close()
+
+    def test_store_without_explicit_key_is_rekeyed(self):
+        legacy = sqlite3.connect(self.path)
+        legacy.executescript("""
+            CREATE TABLE messages (account TEXT NOT NULL, folder TEXT NOT NULL, id TEXT NOT NULL, subject TEXT,
+                sender TEXT, received TEXT, is_read INTEGER, preview TEXT, body TEXT, seq INTEGER NOT NULL,
+                PRIMARY KEY (account, folder, id));
+            CREATE TABLE removals (account TEXT NOT NULL, folder TEXT NOT NULL, id TEXT NOT NULL, seq INTEGER NOT NULL);
+            CREATE TABLE sequences (account TEXT PRIMARY KEY, seq INTEGER NOT NULL);
+            INSERT INTO messages VALUES ('a', 'inbox', 'm0', 'quarterly budget', NULL, NULL, 0, NULL, NULL, 1);
+            INSERT INTO removals VALUES ('a', 'inbox', 'gone', 2);
+            INSERT INTO sequences VALUES ('a', 2);
+        """)
+        legacy.close()
+
+        store = MailStore(self.path)
+        pk = [row for row in store._conn.execute("PRAGMA table_info(messages)") if row["name"] == "pk"]
+        self.assertEqual((pk[0]["type"], pk[0]["pk"]), ("INTEGER", 1))
+        self.assertEqual([result["id"] for result in store.search("a", "budget")], ["m0"])
+        store.apply_changes("a", "inbox", [message("m1", "2026-01-01T00:00:00Z")], [])
+        self.assertEqual(store.changes_since("a", "inbox", 1)["removed"], ["gone"])
+        self.assertEqual(store.prune_tombstones("a", max_age=60), 0)
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
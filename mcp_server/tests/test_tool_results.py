@@ -0,0 +1,49 @@
+"""
+Tests for tool result size capping (server.tool_results.fit_result).
+
+Run from the mcp_server directory:
+    python -m unittest discover tests
+"""
+
+import os
+import unittest
+
+os.environ.setdefault("OUTLOOK_SCOPES", "Mail.Read")
+
+from server.tool_results import fit_result
+
+
+class FitResultTest(unittest.TestCase):
+
+    def test_trimmed_listing_drops_its_cursor(self):
+        result = {
+            "status": "success",
+            "email_summaries": [{"id": str(i), "subject": "x" * 1400} for i in range(50)],
+            "next_cursor": "cursor-past-all-50",
+        }
+
+        fitted, encoded = fit_result(result, 20000)
+
+        self.assertLessEqual(len(encoded), 20000)
+        kept = len(fitted["email_summaries"])
+        self.assertLess(kept, 50)
+        self.assertIsNone(fitted["next_cursor"])
+        self.assertEqual(fitted["truncated"]["returned"], kept)
+        self.assertIn(f"top={kept}", fitted["truncated"]["hint"])
+
+    def test_cursor_kept_when_only_full_messages_are_dropped(self):
+        result = {
+            "status": "success",
+            "email_summaries": [{"id": "1"}],
+            "next_cursor": "next",
+            "emails": [{"id": "1", "body": "y" * 30000}],
+        }
+
+        fitted, encoded = fit_result(result, 20000)
+
+        self.assertNotIn("emails", fitted)
+        self.assertEqual(fitted["next_cursor"], "next")
+
+
+if __name__ == "__main__":
+    unittest.main()
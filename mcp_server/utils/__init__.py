@@ -1,9 +1,19 @@
 from .validators import validate_email_format
 from .template_utils import render_template
 from .input_utils import normalize_email_list
+from .concurrency import run_bounded
+from .ttl_cache import TTLCache
+from .single_flight import SingleFlight
+from .sized_cache import SizedLRUCache
+from .json_utils import dumps_bytes
 
 __all__ = [
     "validate_email_format",
     "render_template",
-    "normalize_email_list"
+    "normalize_email_list",
+    "run_bounded",
+    "TTLCache",
+    "SingleFlight",
+    "SizedLRUCache",
+    "dumps_bytes"
 ]
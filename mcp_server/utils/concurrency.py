@@ -0,0 +1,51 @@
+"""
+concurrency.py
+
+Small asyncio helpers for running many independent coroutines with a bound on
+how many are in flight at once.
+
+Currently includes:
+- run_bounded: concurrent fan-out with a semaphore, ordered results and
+  per-item failure capture (one failing item never cancels the others).
+
+If we need more elaborate scheduling (priorities, rate limits, cancellation
+groups), this can grow into a `scheduling/` package.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Iterable, List, TypeVar
+
+T = TypeVar("T")
+
+
+async def run_bounded(
+    items: Iterable[T],
+    worker: Callable[[T], Awaitable[Any]],
+    concurrency: int,
+) -> List[Any]:
+    """
+    Run `worker(item)` for every item with at most `concurrency` calls in flight.
+
+    Example:
+        results = await run_bounded(chunks, send_chunk, concurrency=4)
+        failures = [r for r in results if isinstance(r, Exception)]
+
+    Args:
+        items (Iterable[T]): Inputs to process.
+        worker (Callable[[T], Awaitable[Any]]): Coroutine function applied to each item.
+        concurrency (int): Maximum number of concurrent calls (values below 1 mean 1).
+
+    Returns:
+        List[Any]: One result per item, in input order. If a call raised, the
+                   exception object is returned in its place.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(item: T) -> Any:
+        async with semaphore:
+            try:
+                return await worker(item)
+            except Exception as e:
+                return e
+
+    return list(await asyncio.gather(*(run(item) for item in items)))
@@ -0,0 +1,34 @@
+"""
+json_utils.py
+
+Compact JSON encoding for responses built by hand.
+
+Currently includes:
+- dumps_bytes: encodes to compact UTF-8 JSON bytes, using orjson when it is
+  installed (several times faster on large nested results) and the standard
+  library otherwise. Values JSON has no type for (datetimes, ...) become strings.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson  # optional, faster encoder
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dumps_bytes(value: Any) -> bytes:
+    """
+    Encode a value as compact JSON.
+
+    Args:
+        value (Any): JSON-compatible value.
+
+    Returns:
+        bytes: UTF-8 encoded JSON without insignificant whitespace.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, default=str)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str).encode()
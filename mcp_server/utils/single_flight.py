@@ -0,0 +1,57 @@
+"""
+single_flight.py
+
+Coalesces identical concurrent async calls: while a call for a key is in
+flight, later callers with the same key wait for it instead of starting their
+own, and all of them receive the same result (or exception).
+
+Currently includes:
+- SingleFlight: do(key, factory) with leader/follower counters.
+
+The shared call runs as its own task, so a caller that is cancelled (e.g. a
+disconnected SSE session) does not cancel the call for everyone else.
+Intended for use from a single asyncio event loop.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Registry of in-flight calls keyed by what they compute."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run factory() unless a call for `key` is already in flight, then share its outcome.
+
+        Args:
+            key (Hashable): Identity of the call; equal keys must mean identical results.
+            factory (Callable[[], Awaitable[Any]]): Starts the call (only invoked by the leader).
+
+        Returns:
+            Any: The result of the shared call.
+
+        Raises:
+            Exception: Whatever the shared call raised, re-raised in every waiting caller.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        else:
+            self.followers += 1
+        return await asyncio.shield(task)
@@ -0,0 +1,70 @@
+"""
+sized_cache.py
+
+An in-memory LRU cache bounded by the total size of its values rather than
+their number, for values whose sizes vary widely (e.g. email bodies).
+
+Currently includes:
+- SizedLRUCache: get/set/pop with a byte budget, plus hit, miss and
+  eviction counters.
+
+Not thread-safe; intended for use from a single asyncio event loop.
+"""
+
+from collections import OrderedDict
+from typing import Any, Hashable, Tuple
+
+
+class SizedLRUCache:
+    """LRU cache that evicts least recently used entries once `max_bytes` is exceeded."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[Hashable, Tuple[int, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached value (marked most recently used), or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, size: int) -> None:
+        """
+        Store a value, evicting least recently used entries until the cache fits its budget.
+
+        Args:
+            key (Hashable): Cache key.
+            value (Any): Value to store.
+            size (int): Size of the value in bytes; values larger than max_bytes are not stored.
+        """
+        self.pop(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (size, value)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (evicted_size, _) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> Any | None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self.bytes -= entry[0]
+        return entry[1]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
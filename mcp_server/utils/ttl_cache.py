@@ -0,0 +1,92 @@
+"""
+ttl_cache.py
+
+A small in-memory cache combining a time-to-live with least-recently-used
+eviction, so it bounds both staleness and memory.
+
+Currently includes:
+- TTLCache: get/set/pop with hit, miss and eviction counters, plus items()
+  for callers that need to scan entries (e.g. targeted invalidation).
+  Optionally bounded by the total size of its values too (max_bytes), for
+  values whose sizes vary widely.
+
+Not thread-safe; intended for use from a single asyncio event loop.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterator, Tuple
+
+
+class TTLCache:
+    """LRU cache whose entries also expire `ttl` seconds after being stored."""
+
+    def __init__(self, max_entries: int, ttl: float, max_bytes: int = 0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes  # 0: bounded by max_entries only
+        self.bytes = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, int]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        """
+        Return the cached value, or None if it is missing or expired.
+
+        Args:
+            key (Hashable): Cache key.
+
+        Returns:
+            Any | None: The cached value (marked most recently used), or None.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                self.pop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, size: int = 0) -> None:
+        """
+        Store a value, evicting the least recently used entries beyond max_entries or max_bytes.
+
+        Args:
+            key (Hashable): Cache key.
+            value (Any): Value to store.
+            size (int): Size of the value in bytes (only counted when max_bytes is set);
+                        values larger than max_bytes are not stored.
+        """
+        self.pop(key)
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return
+        if self.max_bytes > 0 and size > self.max_bytes:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value, size)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or (self.max_bytes > 0 and self.bytes > self.max_bytes):
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> Any | None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self.bytes -= entry[2]
+        return entry[1]
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        """Snapshot of (key, value) pairs, including entries that may have expired."""
+        return iter([(key, entry[1]) for key, entry in self._entries.items()])
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0